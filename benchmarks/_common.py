@@ -0,0 +1,47 @@
+# Description: Helpers shared by the benchmark scripts
+import asyncio
+import os
+import sys
+import time
+from typing import List, Sequence
+
+# Make the repository root importable when a benchmark is run as a script
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from utils.metrics import percentile  # noqa: E402
+
+
+def summary(samples: Sequence[float], unit: str = "ms", scale: float = 1000) -> str:
+    """
+    Formats p50/p99/max of a list of durations in seconds.
+    """
+    return (f"p50={percentile(samples, 50) * scale:.2f}{unit} "
+            f"p99={percentile(samples, 99) * scale:.2f}{unit} "
+            f"max={max(samples, default=0) * scale:.2f}{unit}")
+
+
+class StallMonitor:
+    """
+    Measures how late the event loop wakes a coroutine that sleeps for ``interval`` seconds.
+    Any lateness is time the loop spent blocked, e.g. delayed gateway heartbeats.
+    """
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stalls: List[float] = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.stalls.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def __enter__(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,54 @@
+# Description: Synthetic join replay through the anti-raid detector, CPU time per event and memory per guild
+#
+# Usage: python benchmarks/bench_antiraid.py [--joins-per-minute 10000] [--minutes 10] [--guilds 50]
+import argparse
+import random
+import sys
+import time
+
+import _common  # noqa: F401  (puts the repository root on sys.path)
+
+from utils.antiraid import RaidDetector, Thresholds
+
+
+def deep_size(state) -> int:
+    size = sys.getsizeof(state)
+    for counter in (state.joins, state.young_joins, state.messages):
+        size += sys.getsizeof(counter) + sys.getsizeof(counter.counts)
+    size += sys.getsizeof(state.recent) + sum(sys.getsizeof(item) for item in state.recent)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--joins-per-minute", type=int, default=10_000)
+    parser.add_argument("--minutes", type=int, default=10)
+    parser.add_argument("--guilds", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    detector = RaidDetector(Thresholds())
+    events = args.joins_per_minute * args.minutes
+    interval = 60 / args.joins_per_minute
+    replay = [(rng.randrange(args.guilds), rng.getrandbits(62), rng.uniform(0, 30 * 86400)) for _ in range(events)]
+
+    triggers = 0
+    sizes_before = None
+    start = time.process_time()
+    for i, (guild_id, member_id, account_age) in enumerate(replay):
+        if detector.record_join(guild_id, member_id, account_age, i * interval) is not None:
+            triggers += 1
+        if detector.record_message(guild_id, i * interval) is not None:
+            triggers += 1
+        if i == events // 10:
+            sizes_before = [deep_size(state) for state in detector.guilds.values()]
+    cpu = time.process_time() - start
+    sizes_after = [deep_size(state) for state in detector.guilds.values()]
+
+    print(f"{events} joins + {events} messages over {args.minutes} simulated minutes across {args.guilds} guilds")
+    print(f"CPU per event: {cpu / (2 * events) * 1e6:.2f}us  ({2 * events / cpu:.0f} events/s), {triggers} lockdowns")
+    print(f"memory per guild: {max(sizes_before or [0])} bytes after 10% of the replay, {max(sizes_after)} bytes at the end")
+
+
+if __name__ == "__main__":
+    main()
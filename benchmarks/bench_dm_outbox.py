@@ -0,0 +1,86 @@
+# Description: Warn command latency with the DM sent inline vs queued in the outbox, on a mocked REST layer
+#
+# Usage: python benchmarks/bench_dm_outbox.py [--commands 300] [--rest-ms 80]
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from _common import summary
+
+from utils import outbox
+from utils.migrations import migrate
+from utils.storage import Database
+from utils.warning_store import MIGRATIONS, WarningStore
+
+
+class FakeUser:
+    def __init__(self, rest_latency: float):
+        self.rest_latency = rest_latency
+        self.received = 0
+
+    async def send(self, content):
+        await asyncio.sleep(random.uniform(0.5, 1.5) * self.rest_latency)
+        self.received += 1
+
+
+class FakeBot:
+    def __init__(self, user: FakeUser):
+        self.user = user
+
+    async def wait_until_ready(self):
+        return
+
+    def get_user(self, user_id):
+        return self.user
+
+
+async def run(commands: int, rest_latency: float, queued: bool):
+    with tempfile.TemporaryDirectory() as directory:
+        warnings_db = Database(os.path.join(directory, "warnings.db"), batch_window=0.005)
+        outbox_db = Database(os.path.join(directory, "outbox.db"))
+        await warnings_db.open()
+        await outbox_db.open()
+        await migrate(warnings_db, MIGRATIONS)
+        await migrate(outbox_db, outbox.MIGRATIONS)
+        store = WarningStore(warnings_db)
+        user = FakeUser(rest_latency)
+        box = outbox.Outbox(FakeBot(user), outbox_db)
+        box.start()
+        latencies = []
+
+        async def warn(i):
+            await asyncio.sleep(random.uniform(0, 2))
+            start = time.perf_counter()
+            await store.add(1, i, 42, "spam")
+            await asyncio.sleep(random.uniform(0.5, 1.5) * rest_latency)  # ctx.send(embed=...)
+            if queued:
+                await box.enqueue(i, "You were warned.")
+            else:
+                await user.send("You were warned.")
+            latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(warn(i) for i in range(commands)))
+        while user.received < commands:
+            await asyncio.sleep(0.05)
+        await box.stop()
+        await warnings_db.close()
+        await outbox_db.close()
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=300)
+    parser.add_argument("--rest-ms", type=float, default=80)
+    args = parser.parse_args()
+    for name, queued in (("inline DM", False), ("outbox", True)):
+        random.seed(0)
+        latencies = await run(args.commands, args.rest_ms / 1000, queued)
+        print(f"{name:<10} warn latency {summary(latencies)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
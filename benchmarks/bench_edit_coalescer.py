@@ -0,0 +1,50 @@
+# Description: Edits sent for a burst of votes on one suggestion, one edit per vote vs the edit coalescer
+#
+# Usage: python benchmarks/bench_edit_coalescer.py [--votes 200] [--seconds 60] [--interval 2] [--speedup 20]
+import argparse
+import asyncio
+import random
+
+import _common  # noqa: F401  (puts the repository root on sys.path)
+
+from utils.coalescer import EditCoalescer
+from utils.suggestion_store import Tally
+
+
+async def burst(votes: int, seconds: float, interval: float, speedup: float):
+    sent = []
+
+    async def edit(tally):
+        await asyncio.sleep(0.05 / speedup)  # round trip of a message edit
+        sent.append(tally)
+
+    coalescer = EditCoalescer(interval / speedup)
+    rng = random.Random(0)
+    counts = [0, 0, 0]
+    for _ in range(votes):
+        await asyncio.sleep(rng.expovariate(votes / seconds) / speedup)
+        counts[rng.randrange(3)] += 1
+        coalescer.request("message", Tally(*counts), edit)
+    while coalescer.tasks:
+        await asyncio.sleep(interval / speedup)
+
+    assert sent[-1] == Tally(*counts), "the final counts must always be sent"
+    return coalescer.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--votes", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--interval", type=float, default=2)
+    parser.add_argument("--speedup", type=float, default=20, help="run the simulated minute this many times faster")
+    args = parser.parse_args()
+
+    stats = asyncio.run(burst(args.votes, args.seconds, args.interval, args.speedup))
+    print(f"{args.votes} votes over {args.seconds:.0f}s, edit interval {args.interval:g}s")
+    print(f"  per vote    {args.votes} edits")
+    print(f"  coalesced   {stats['sent']} edits ({stats['requested']} requested, {stats['unchanged']} unchanged)")
+
+
+if __name__ == "__main__":
+    main()
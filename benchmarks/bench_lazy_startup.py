@@ -0,0 +1,105 @@
+# Description: Boot time and RSS of eager extension loading versus lazy stubs from the manifest
+#
+# Usage: python benchmarks/bench_lazy_startup.py [--runs 5]
+#
+# Each boot runs in a fresh interpreter (imports are what is being measured), inside a
+# scratch directory with a minimal config, without logging in to Discord.
+import argparse
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BOOT = time.perf_counter()
+
+import _common  # noqa: E402,F401  (puts the repository root on sys.path)
+
+CONFIG = "creds:\n  token: benchmark\n"
+
+
+def child(mode: str):
+    import asyncio
+    import logging
+
+    import discord
+    from discord.ext import commands
+    from pretty_help import PrettyHelp
+
+    from utils import storage
+    from utils.lazy import LazyCommandTree, LazyExtensions
+    from utils.startup import StartupReport, load_extensions
+
+    logging.disable(logging.CRITICAL)
+    extensions = ['jishaku', *sorted(f"cogs.{file[:-3]}" for file in os.listdir(os.path.join(_common.ROOT, 'cogs'))
+                                     if file.endswith('.py'))]
+
+    async def boot():
+        bot = commands.Bot(command_prefix='-', intents=discord.Intents.all(), tree_cls=LazyCommandTree, help_command=PrettyHelp())
+        report = StartupReport(BOOT)
+        try:
+            async with bot:
+                eager, deferred = extensions, []
+                lazy = None
+                if mode != 'eager':
+                    lazy = LazyExtensions(bot)
+                    eager, deferred = lazy.plan(extensions)
+                    lazy.install(deferred)
+                loaded = await load_extensions(bot, eager, report)
+                if lazy is not None:
+                    lazy.refresh(loaded)
+                boot_ms = (time.perf_counter() - BOOT) * 1000
+                rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                first_use = ''
+                if lazy is not None and deferred:
+                    start = time.perf_counter()
+                    await lazy.load(deferred[0])
+                    first_use = f"{deferred[0]}={(time.perf_counter() - start) * 1000:.1f}"
+                print(f"{boot_ms:.1f} {rss_mb:.1f} {len(deferred)} {first_use}")
+        finally:
+            await storage.close_all()
+
+    asyncio.run(boot())
+
+
+def run(mode: str, cwd: str):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode], cwd=cwd,
+                            capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), float(output[1]), int(output[2]), output[3] if len(output) > 3 else ''
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child")
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    scratch = tempfile.mkdtemp(prefix="bench-lazy-")
+    try:
+        for directory in ('conf', 'db', 'logs'):
+            os.makedirs(os.path.join(scratch, directory))
+        with open(os.path.join(scratch, 'conf', 'config.yaml'), 'w') as file:
+            file.write(CONFIG)
+
+        print(f"{args.runs} boots per mode, each in a fresh interpreter")
+        cold = run('lazy', scratch)
+        print(f"  lazy, no manifest yet   boot {cold[0]:7.1f}ms  rss {cold[1]:6.1f}MB  ({cold[2]} stubbed, manifest written)")
+        for mode in ('eager', 'lazy'):
+            results = [run(mode, scratch) for _ in range(args.runs)]
+            boot = statistics.median(result[0] for result in results)
+            rss = statistics.median(result[1] for result in results)
+            first = f", first use {results[-1][3]}ms" if results[-1][3] else ""
+            print(f"  {mode:<23} boot {boot:7.1f}ms  rss {rss:6.1f}MB  ({results[-1][2]} stubbed{first})")
+        print(f"  python {sys.version.split()[0]}")
+    finally:
+        shutil.rmtree(scratch)
+
+
+if __name__ == "__main__":
+    main()
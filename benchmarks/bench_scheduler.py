@@ -0,0 +1,116 @@
+# Description: Pending timers as one sleeping coroutine each vs the persisted heap scheduler: memory, lateness, restart cost
+#
+# Usage: python benchmarks/bench_scheduler.py [--timers 50000] [--window 3]
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from _common import summary
+
+from utils import scheduler
+from utils.migrations import migrate
+from utils.storage import Database
+
+
+class FakeBot:
+    async def wait_until_ready(self):
+        return
+
+
+SOON = 500
+
+
+def far_times(count: int, rng: random.Random):
+    # Most timers are hours away, like inactivity auto-close
+    now = time.time()
+    return [now + rng.uniform(3600, 72 * 3600) for _ in range(count)]
+
+
+def soon_times(count: int, window: float, rng: random.Random):
+    # Starting one window from now, so setup work doesn't count as lateness
+    now = time.time()
+    return [now + rng.uniform(window, 2 * window) for _ in range(count)]
+
+
+async def run_sleepers(timers: int, window: float, rng: random.Random):
+    lateness = []
+
+    async def sleeper(due_at):
+        await asyncio.sleep(due_at - time.time())
+        lateness.append(time.time() - due_at)
+
+    tracemalloc.start()
+    tasks = [asyncio.create_task(sleeper(due_at)) for due_at in far_times(timers - SOON, rng)]
+    await asyncio.sleep(0)
+    memory = tracemalloc.get_traced_memory()[0] * timers / (timers - SOON)
+    tracemalloc.stop()
+    tasks += [asyncio.create_task(sleeper(due_at)) for due_at in soon_times(SOON, window, rng)]
+    await asyncio.sleep(2 * window + 0.5)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f"  coroutine per timer  {memory / 1024 / 1024:6.1f} MB  lateness {summary(lateness)}  lost on restart")
+
+
+async def run_scheduler(path: str, timers: int, window: float, rng: random.Random):
+    db = Database(path)
+    await db.open()
+    try:
+        await migrate(db, scheduler.MIGRATIONS)
+        jobs = scheduler.Scheduler(FakeBot(), db)
+        lateness = []
+
+        async def handler(key, due_at):
+            lateness.append(time.time() - due_at)
+        jobs.register("bench", handler)
+
+        # Timestamps of the whole run are spread over three days; only the restart below fires them
+        start = time.perf_counter()
+        await asyncio.gather(*(jobs.schedule("bench", key, due_at, due_at) for key, due_at in enumerate(far_times(timers - SOON, rng))))
+        schedule_time = time.perf_counter() - start
+        await asyncio.gather(*(jobs.schedule("bench", -key - 1, due_at, due_at) for key, due_at in enumerate(soon_times(SOON, window, rng))))
+
+        # Memory of a loaded heap, measured apart from the timed run below
+        tracemalloc.start()
+        loaded = scheduler.Scheduler(FakeBot(), db)
+        loaded.register("bench", handler)
+        await loaded.start()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        await loaded.stop()
+        del loaded
+
+        # A restart: a fresh scheduler loads every pending row into its heap
+        restarted = scheduler.Scheduler(FakeBot(), db)
+        restarted.register("bench", handler)
+        start = time.perf_counter()
+        await restarted.start()
+        load_time = time.perf_counter() - start
+
+        await asyncio.sleep(2 * window + 0.5)
+        await restarted.stop()
+        print(f"  heap scheduler       {memory / 1024 / 1024:6.1f} MB  lateness {summary(lateness)}  "
+              f"schedule all {schedule_time:.1f}s, reload {load_time * 1000:.0f}ms, {restarted.fired} fired")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--timers", type=int, default=50_000)
+    parser.add_argument("--window", type=float, default=3.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{args.timers} pending timers, {SOON} due within {2 * args.window}s")
+    asyncio.run(run_sleepers(args.timers, args.window, rng))
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run_scheduler(os.path.join(directory, "scheduler.db"), args.timers, args.window, rng))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Description: Event-loop stall under concurrent warns and votes, blocking sqlite3 vs utils.storage
+#
+# Usage: python benchmarks/bench_storage.py [--ops 2000] [--concurrency 50]
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from _common import StallMonitor, summary
+
+from utils.storage import Database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS warnings (user_id INTEGER, reason TEXT);
+CREATE TABLE IF NOT EXISTS votes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    message_id INTEGER,
+    user_id INTEGER,
+    vote_type TEXT
+);
+"""
+
+
+async def blocking_workload(directory: str, ops: int, concurrency: int):
+    """
+    Reproduces the old cogs: one long-lived connection for warnings and a fresh
+    connection per vote, all called directly on the event loop.
+    """
+    warnings_path = os.path.join(directory, "warnings.db")
+    votes_path = os.path.join(directory, "suggestions.db")
+    for path in (warnings_path, votes_path):
+        with sqlite3.connect(path) as conn:
+            conn.executescript(SCHEMA)
+    warn_conn = sqlite3.connect(warnings_path)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warn(i):
+        async with semaphore:
+            warn_conn.execute("INSERT INTO warnings (user_id, reason) VALUES (?, ?)", (i, "spam"))
+            warn_conn.commit()
+            await asyncio.sleep(0)
+
+    async def vote(i):
+        async with semaphore:
+            with sqlite3.connect(votes_path) as db:
+                cursor = db.cursor()
+                cursor.execute("SELECT vote_type FROM votes WHERE message_id = ? AND user_id = ?", (1, i))
+                cursor.fetchone()
+                cursor.execute("INSERT INTO votes (message_id, user_id, vote_type) VALUES (?, ?, ?)", (1, i, "upvote"))
+                db.commit()
+                cursor.execute("SELECT vote_type, COUNT(*) FROM votes WHERE message_id = ? GROUP BY vote_type", (1,))
+                cursor.fetchall()
+            await asyncio.sleep(0)
+
+    await run(ops, warn, vote)
+    warn_conn.close()
+
+
+async def storage_workload(directory: str, ops: int, concurrency: int):
+    warnings_db = Database(os.path.join(directory, "warnings.db"))
+    votes_db = Database(os.path.join(directory, "suggestions.db"))
+    await warnings_db.open()
+    await votes_db.open()
+    await warnings_db.executescript(SCHEMA)
+    await votes_db.executescript(SCHEMA)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warn(i):
+        async with semaphore:
+            await warnings_db.execute("INSERT INTO warnings (user_id, reason) VALUES (?, ?)", (i, "spam"))
+
+    async def vote(i):
+        async with semaphore:
+            async def toggle(conn):
+                async with conn.execute("SELECT vote_type FROM votes WHERE message_id = ? AND user_id = ?", (1, i)) as cursor:
+                    await cursor.fetchone()
+                await conn.execute("INSERT INTO votes (message_id, user_id, vote_type) VALUES (?, ?, ?)", (1, i, "upvote"))
+            await votes_db.transaction(toggle)
+            await votes_db.fetchall("SELECT vote_type, COUNT(*) FROM votes WHERE message_id = ? GROUP BY vote_type", (1,))
+
+    await run(ops, warn, vote)
+    await warnings_db.close()
+    await votes_db.close()
+
+
+async def run(ops: int, warn, vote):
+    jobs = [warn(i) if random.random() < 0.5 else vote(i) for i in range(ops)]
+    await asyncio.gather(*jobs)
+
+
+async def measure(name: str, workload, ops: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        with StallMonitor() as monitor:
+            await workload(directory, ops, concurrency)
+        elapsed = time.perf_counter() - start
+    print(f"{name:<10} {ops / elapsed:8.0f} ops/s  loop stall {summary(monitor.stalls)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    random.seed(0)
+    await measure("blocking", blocking_workload, args.ops, args.concurrency)
+    random.seed(0)
+    await measure("storage", storage_workload, args.ops, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
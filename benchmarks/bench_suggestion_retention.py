@@ -0,0 +1,115 @@
+# Description: suggestions.db size and query latency before and after archiving closed suggestions and compacting their votes
+#
+# Usage: python benchmarks/bench_suggestion_retention.py [--suggestions 20000] [--votes 50] [--closed 0.8] [--samples 300]
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from _common import summary
+
+from utils.migrations import migrate
+from utils.storage import Database
+from utils.suggestion_store import MIGRATIONS, VOTE_TYPES, SuggestionStore
+
+
+def build(path: str, suggestions: int, votes: int):
+    rng = random.Random(0)
+    with sqlite3.connect(path) as conn:
+        conn.executescript(MIGRATIONS[0].apply) #type: ignore
+        conn.executemany("INSERT INTO suggestions (suggestion, message_link) VALUES (?, ?)",
+                         ((f"suggestion number {index} about {rng.choice(['music', 'events', 'roles', 'channels'])}",
+                           f"https://discord.com/channels/1/2/{index + 1}") for index in range(suggestions)))
+        conn.executemany("INSERT INTO votes (message_id, user_id, vote_type) VALUES (?, ?, ?)",
+                         ((message_id, user_id, rng.choice(VOTE_TYPES))
+                          for message_id in range(1, suggestions + 1) for user_id in range(votes)))
+
+
+async def file_size(db: Database) -> int:
+    await db.executescript("PRAGMA wal_checkpoint(TRUNCATE)")
+    return sum(os.path.getsize(db.path + suffix) for suffix in ("", "-wal") if os.path.exists(db.path + suffix))
+
+
+async def measure(db: Database, store: SuggestionStore, open_ids: list, samples: int, label: str):
+    rng = random.Random(1)
+    votes, leaderboard, history = [], [], []
+    for _ in range(samples):
+        start = time.perf_counter()
+        await store.toggle_vote(rng.choice(open_ids), -rng.randrange(1 << 30), rng.choice(VOTE_TYPES))
+        votes.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await store.leaderboard(limit=11)
+        leaderboard.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await store.page(limit=11)
+        history.append(time.perf_counter() - start)
+    count = (await db.fetchone("SELECT COUNT(*) FROM votes"))[0] #type: ignore
+    print(f"{label}: {await file_size(db) / 1024 / 1024:.1f} MB, {count} vote rows")
+    print(f"  vote         {summary(votes)}")
+    print(f"  leaderboard  {summary(leaderboard)}")
+    print(f"  history      {summary(history)}")
+
+
+async def run(path: str, closed: float, samples: int):
+    db = Database(path)
+    await db.open()
+    try:
+        await migrate(db, MIGRATIONS)
+        store = SuggestionStore(db)
+        total = (await db.fetchone("SELECT COUNT(*) FROM suggestions"))[0] #type: ignore
+        cutoff = int(total * closed)
+        # The oldest suggestions were accepted or rejected long ago
+        await db.execute("UPDATE suggestions SET status = CASE id % 2 WHEN 0 THEN 'accepted' ELSE 'rejected' END, closed_at = 0 "
+                         "WHERE id <= ?", (cutoff,))
+        open_ids = [row[0] for row in await db.fetchall("SELECT message_id FROM suggestions WHERE status = 'open'")]
+        await measure(db, store, open_ids, samples, "before")
+
+        start = time.perf_counter()
+        archived = await store.archive_closed(int(time.time()))
+        compacted, deleted = await store.compact_archived()
+        compact_time = time.perf_counter() - start
+        start = time.perf_counter()
+        await store.enable_incremental_vacuum()  # what the cog does at startup on a database from before auto-vacuum
+        convert_time = time.perf_counter() - start
+        print(f"archived {archived}, compacted {deleted} votes of {compacted} suggestions in {compact_time:.1f}s, "
+              f"auto-vacuum switch {convert_time:.1f}s")
+
+        await measure(db, store, open_ids, samples, "after")
+
+        # Later runs only free what the last compaction left behind, a few pages at a time
+        await db.execute("UPDATE suggestions SET status = 'archived', closed_at = 0 WHERE id > ? AND id <= ?",
+                         (cutoff, cutoff + max(1, (total - cutoff) // 4)))
+        await store.compact_archived()
+        start = time.perf_counter()
+        freed = steps = 0
+        while True:
+            pages = await store.reclaim_space(pages=200)
+            if not pages:
+                break
+            freed += pages
+            steps += 1
+        print(f"incremental vacuum freed {freed} pages in {steps} steps, {time.perf_counter() - start:.2f}s, "
+              f"now {await file_size(db) / 1024 / 1024:.1f} MB")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suggestions", type=int, default=20_000)
+    parser.add_argument("--votes", type=int, default=50)
+    parser.add_argument("--closed", type=float, default=0.8, help="share of suggestions that are closed")
+    parser.add_argument("--samples", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "suggestions.db")
+        build(path, args.suggestions, args.votes)
+        asyncio.run(run(path, args.closed, args.samples))
+
+
+if __name__ == "__main__":
+    main()
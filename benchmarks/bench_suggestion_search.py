@@ -0,0 +1,112 @@
+# Description: Full-text search and near-duplicate lookup latency over 100k suggestions, indexed vs full scan
+#
+# Usage: python benchmarks/bench_suggestion_search.py [--suggestions 100000] [--queries 200]
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from _common import summary
+
+from utils import minhash
+from utils.migrations import migrate
+from utils.storage import Database
+from utils.suggestion_store import MIGRATIONS, SuggestionStore
+
+SUBJECTS = ["music bot", "memes channel", "voice chat", "art contest", "movie night", "giveaway", "rules page",
+            "welcome message", "level roles", "game night", "minecraft server", "study room", "bot commands",
+            "emoji slots", "event calendar", "staff team", "birthday pings", "nsfw filter", "language channels"]
+VERBS = ["add", "remove", "improve", "rename", "bring back", "schedule", "moderate", "split", "merge", "limit"]
+EXTRAS = ["every week", "for new members", "on weekends", "please", "because it is always empty", "with better rewards",
+          "so people stop spamming", "like other servers do", "for the summer", "and announce it", "asap", "it would be fun"]
+
+
+def random_suggestion(rng: random.Random) -> str:
+    return f"{rng.choice(VERBS)} {rng.choice(SUBJECTS)} {rng.choice(EXTRAS)} {rng.choice(EXTRAS)} {rng.randrange(10_000)}"
+
+
+def reword(text: str, rng: random.Random) -> str:
+    words = text.split()
+    words.insert(rng.randrange(len(words)), rng.choice(["the", "a", "maybe", "pls"]))
+    return " ".join(words).capitalize() + "!"
+
+
+def build(path: str, count: int, rng: random.Random):
+    with sqlite3.connect(path) as conn:
+        conn.executescript(MIGRATIONS[0].apply) #type: ignore
+        conn.executemany("INSERT INTO suggestions (suggestion, message_link) VALUES (?, ?)",
+                         ((random_suggestion(rng), f"https://discord.com/channels/1/2/{index}") for index in range(count)))
+
+
+async def run(path: str, queries: int, rng: random.Random):
+    db = Database(path)
+    await db.open()
+    try:
+        start = time.perf_counter()
+        await migrate(db, MIGRATIONS)
+        print(f"migration (fts rebuild + signatures)  {time.perf_counter() - start:.1f}s")
+        store = SuggestionStore(db)
+        total = (await db.fetchone("SELECT MAX(id) FROM suggestions"))[0] #type: ignore
+
+        probes = []
+        for _ in range(queries):
+            original = (await db.fetchone("SELECT suggestion FROM suggestions WHERE id = ?", (rng.randrange(1, total + 1),)))[0] #type: ignore
+            probes.append(reword(original, rng))
+
+        signature_times, lsh_times, found = [], [], 0
+        for probe in probes:
+            start = time.perf_counter()
+            signature = minhash.signature(probe)
+            signature_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            found += bool(await store.find_similar(signature))
+            lsh_times.append(time.perf_counter() - start)
+
+        scan_times = []
+        for probe in probes[:max(1, queries // 20)]:
+            # The alternative without band index: compare against every stored signature
+            signature = minhash.signature(probe)
+            start = time.perf_counter()
+            rows = await db.fetchall("SELECT id, minhash FROM suggestions")
+            sorted((minhash.similarity(signature, minhash.unpack(blob)), row_id) for row_id, blob in rows)
+            scan_times.append(time.perf_counter() - start)
+
+        words = [probe.split()[1] for probe in probes]
+        fts_times, like_times = [], []
+        for word in words:
+            start = time.perf_counter()
+            await store.search(word)
+            fts_times.append(time.perf_counter() - start)
+        for word in words[:max(1, queries // 20)]:
+            start = time.perf_counter()
+            # Ranking needs every match, so a scan has to read the whole table
+            await db.fetchall("SELECT id, suggestion FROM suggestions WHERE suggestion LIKE ?", (f"%{word}%",))
+            like_times.append(time.perf_counter() - start)
+
+        print(f"signature            {summary(signature_times)}")
+        print(f"similar (lsh)        {summary(lsh_times)}  found {found}/{len(probes)} reworded copies")
+        print(f"similar (full scan)  {summary(scan_times)}")
+        print(f"search (fts5)        {summary(fts_times)}")
+        print(f"search (LIKE scan)   {summary(like_times)}")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suggestions", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "suggestions.db")
+        build(path, args.suggestions, rng)
+        asyncio.run(run(path, args.queries, rng))
+
+
+if __name__ == "__main__":
+    main()
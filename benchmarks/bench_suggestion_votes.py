@@ -0,0 +1,89 @@
+# Description: Vote click latency at 10k/100k/1M votes, legacy read-then-count vs unique index with materialized tallies
+#
+# Usage: python benchmarks/bench_suggestion_votes.py [--sizes 10000 100000 1000000] [--messages 2000] [--clicks 300]
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from _common import summary
+
+from utils.migrations import migrate
+from utils.storage import Database
+from utils.suggestion_store import MIGRATIONS, VOTE_TYPES, SuggestionStore
+
+
+def build_legacy(path: str, rows: int, messages: int):
+    with sqlite3.connect(path) as conn:
+        conn.executescript(MIGRATIONS[0].apply) #type: ignore
+        conn.executemany("INSERT INTO votes (message_id, user_id, vote_type) VALUES (?, ?, ?)",
+                         ((index % messages, index, random.choice(VOTE_TYPES)) for index in range(rows)))
+
+
+async def legacy_click(db: Database, message_id: int, user_id: int, vote_type: str):
+    # What the button callback used to do: look the vote up, write it, then count every vote on the message
+    async def toggle_vote(conn):
+        async with conn.execute("SELECT vote_type FROM votes WHERE message_id = ? AND user_id = ?", (message_id, user_id)) as cursor:
+            existing_vote = await cursor.fetchone()
+        if existing_vote:
+            if existing_vote[0] == vote_type:
+                await conn.execute("DELETE FROM votes WHERE message_id = ? AND user_id = ?", (message_id, user_id))
+            return
+        await conn.execute("INSERT INTO votes (message_id, user_id, vote_type) VALUES (?, ?, ?)", (message_id, user_id, vote_type))
+
+    await db.transaction(toggle_vote)
+    await db.fetchall("SELECT vote_type, COUNT(*) FROM votes WHERE message_id = ? GROUP BY vote_type", (message_id,))
+
+
+async def time_clicks(path: str, clicks: int, messages: int, migrated: bool):
+    db = Database(path)
+    await db.open()
+    try:
+        store = None
+        if migrated:
+            start = time.perf_counter()
+            await migrate(db, MIGRATIONS)
+            print(f"  migration {time.perf_counter() - start:.2f}s")
+            store = SuggestionStore(db)
+
+        rng = random.Random(1)
+        samples = []
+        for _ in range(clicks):
+            # New voters on random messages, like a burst of clicks across the channel
+            message_id, user_id, vote_type = rng.randrange(messages), -rng.randrange(1 << 30), rng.choice(VOTE_TYPES)
+            start = time.perf_counter()
+            if store is not None:
+                await store.toggle_vote(message_id, user_id, vote_type)
+            else:
+                await legacy_click(db, message_id, user_id, vote_type)
+            samples.append(time.perf_counter() - start)
+        return samples
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--clicks", type=int, default=300)
+    args = parser.parse_args()
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            legacy_path = os.path.join(directory, f"legacy-{size}.db")
+            migrated_path = os.path.join(directory, f"migrated-{size}.db")
+            build_legacy(legacy_path, size, args.messages)
+            shutil.copy(legacy_path, migrated_path)
+            print(f"{size} votes")
+            print(f"  legacy    {summary(asyncio.run(time_clicks(legacy_path, args.clicks, args.messages, False)))}")
+            print(f"  tallies   {summary(asyncio.run(time_clicks(migrated_path, args.clicks, args.messages, True)))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Description: Ticket creation latency against a mocked REST layer, sequential calls vs provisioner vs warm pool
+#
+# Usage: python benchmarks/bench_ticket_provisioning.py [--tickets 200] [--burst 30] [--latency-ms 90] [--create-ms 250] [--pool 5]
+import argparse
+import asyncio
+import itertools
+import random
+
+from _common import summary
+
+from utils.tickets import TicketProvisioner
+
+_ids = itertools.count(1)
+
+
+class FakeREST:
+    """
+    Every request takes a log-normally distributed round trip around ``median`` seconds, like real REST calls.
+    Creating a channel takes around ``create_median`` instead, as it is the slowest of these routes.
+    """
+    def __init__(self, median: float, create_median: float, rng: random.Random):
+        self.median = median
+        self.create_median = create_median
+        self.rng = rng
+        self.requests = 0
+
+    async def call(self, create: bool = False):
+        self.requests += 1
+        await asyncio.sleep((self.create_median if create else self.median) * self.rng.lognormvariate(0, 0.35))
+
+
+class FakeRole:
+    def __init__(self):
+        self.id = next(_ids)
+
+
+class FakeGuild:
+    def __init__(self):
+        self.id = next(_ids)
+        self.default_role = FakeRole()
+        self.me = FakeRole()
+        self.channels = {}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+class FakeChannel:
+    def __init__(self, rest: FakeREST, guild: FakeGuild, category_id: int, name: str):
+        self.rest = rest
+        self.id = next(_ids)
+        self.name = name
+        self.category_id = category_id
+        self.mention = f"<#{self.id}>"
+        guild.channels[self.id] = self
+
+    async def edit(self, **fields):
+        await self.rest.call()
+        self.name = fields.get("name", self.name)
+
+    async def set_permissions(self, target, **permissions):
+        await self.rest.call()
+
+    async def send(self, **message):
+        await self.rest.call()
+
+
+class FakeCategory:
+    def __init__(self, rest: FakeREST, guild: FakeGuild):
+        self.rest = rest
+        self.guild = guild
+        self.id = next(_ids)
+
+    @property
+    def text_channels(self):
+        return [channel for channel in self.guild.channels.values() if channel.category_id == self.id]
+
+    async def create_text_channel(self, name, **fields):
+        await self.rest.call(create=True)
+        return FakeChannel(self.rest, self.guild, self.id, name)
+
+
+async def legacy_ticket(category: FakeCategory, owner, role):
+    # What the ticket select used to do, one request after another
+    channel = await category.create_text_channel(name="ticket-user")
+    await channel.set_permissions(category.guild.default_role, view_channel=False)
+    await channel.set_permissions(owner, view_channel=True, send_messages=True)
+    await channel.set_permissions(role, view_channel=True, send_messages=True)
+    await channel.send(content="header")
+    await channel.send(embed="embed", view="view")
+
+
+async def time_tickets(create, tickets: int, burst: int, loop_time):
+    sequential, bursty = [], []
+    for _ in range(tickets):
+        start = loop_time()
+        await create()
+        sequential.append(loop_time() - start)
+        await asyncio.sleep(0.5)  # tickets trickling in, so a pool has time to refill
+
+    async def timed():
+        start = loop_time()
+        await create()
+        bursty.append(loop_time() - start)
+    await asyncio.gather(*(timed() for _ in range(burst)))
+    return sequential, bursty
+
+
+async def run(args):
+    loop_time = asyncio.get_running_loop().time
+    owner, role = FakeRole(), FakeRole()
+    print(f"{args.tickets} tickets one at a time, then a burst of {args.burst}, REST median {args.latency_ms}ms, "
+          f"channel creation {args.create_ms}ms")
+
+    for label, pool_size in (("sequential calls", None), ("provisioner", 0), (f"pool of {args.pool}", args.pool)):
+        rest = FakeREST(args.latency_ms / 1000, args.create_ms / 1000, random.Random(0))
+        category = FakeCategory(rest, FakeGuild())
+        if pool_size is None:
+            async def create():
+                await legacy_ticket(category, owner, role)
+        else:
+            provisioner = TicketProvisioner(pool_size=pool_size)
+            await provisioner.warm(category) #type: ignore
+
+            async def create():
+                await provisioner.provision(category, owner, role, "ticket-user", content="header", embed="embed") #type: ignore
+        rest.requests = 0
+        sequential, bursty = await time_tickets(create, args.tickets, args.burst, loop_time)
+        per_ticket = rest.requests / (args.tickets + args.burst)
+        print(f"  {label:<17} one at a time {summary(sequential)} | burst {summary(bursty)} | {per_ticket:.1f} requests/ticket")
+        if pool_size:
+            await provisioner.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickets", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=90)
+    parser.add_argument("--create-ms", type=float, default=250)
+    parser.add_argument("--pool", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Description: Warns per second through WarningStore with group commit on and off
+#
+# Usage: python benchmarks/bench_warn_batching.py [--warns 3000] [--concurrency 200] [--window-ms 20]
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from _common import summary
+
+from utils.migrations import migrate
+from utils.storage import Database
+from utils.warning_store import MIGRATIONS, WarningStore
+
+
+async def run(warns: int, concurrency: int, batch_window: float, max_batch: int):
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, "warnings.db"), batch_window=batch_window, max_batch=max_batch)
+        await db.open()
+        await migrate(db, MIGRATIONS)
+        store = WarningStore(db)
+        semaphore = asyncio.Semaphore(concurrency)
+        acks = []
+
+        async def warn(i):
+            async with semaphore:
+                start = time.perf_counter()
+                await store.add(1, i % 500, 42, "raid")
+                acks.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(warn(i) for i in range(warns)))
+        elapsed = time.perf_counter() - start
+        commits = db.commits
+        await db.close()
+    return warns / elapsed, commits, acks
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--warns", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--window-ms", type=float, default=20)
+    parser.add_argument("--max-batch", type=int, default=100)
+    args = parser.parse_args()
+
+    for name, window, max_batch in (("off", 0.0, 1), ("on", args.window_ms / 1000, args.max_batch)):
+        rate, commits, acks = await run(args.warns, args.concurrency, window, max_batch)
+        print(f"batching {name:<3} {rate:8.0f} warns/s  {commits:5d} commits  ack {summary(acks)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
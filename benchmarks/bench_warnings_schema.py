@@ -0,0 +1,77 @@
+# Description: Warning lookup latency on a 1M-row table, legacy full scan vs migrated indexed schema
+#
+# Usage: python benchmarks/bench_warnings_schema.py [--rows 1000000] [--users 50000] [--lookups 200]
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from _common import summary
+
+from utils.migrations import migrate
+from utils.storage import Database
+from utils.warning_store import MIGRATIONS
+
+
+def build_legacy(path: str, rows: int, users: int):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE warnings (user_id INTEGER, reason TEXT)")
+        conn.executemany("INSERT INTO warnings (user_id, reason) VALUES (?, ?)",
+                         ((random.randrange(users), "spam") for _ in range(rows)))
+
+
+def legacy_lookup(conn: sqlite3.Connection, user_id: int, position: int):
+    # What removewarn used to do: fetch every row of the member, then pick one by position
+    warnings = conn.execute("SELECT rowid, * FROM warnings WHERE user_id = ?", (user_id,)).fetchall()
+    return warnings[position - 1] if position <= len(warnings) else None
+
+
+def indexed_lookup(conn: sqlite3.Connection, user_id: int, position: int):
+    return conn.execute(
+        "SELECT id FROM warnings WHERE guild_id = ? AND user_id = ? ORDER BY created_at, id LIMIT 1 OFFSET ?",
+        (0, user_id, position - 1)).fetchone()
+
+
+def time_lookups(path: str, lookup, users: int, lookups: int):
+    samples = []
+    with sqlite3.connect(path) as conn:
+        for _ in range(lookups):
+            user_id = random.randrange(users)
+            start = time.perf_counter()
+            lookup(conn, user_id, 1)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def run_migration(path: str) -> float:
+    db = Database(path)
+    await db.open()
+    start = time.perf_counter()
+    await migrate(db, MIGRATIONS)
+    elapsed = time.perf_counter() - start
+    await db.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "warnings.db")
+        build_legacy(path, args.rows, args.users)
+        print(f"legacy scan  {summary(time_lookups(path, legacy_lookup, args.users, args.lookups))}")
+        elapsed = asyncio.run(run_migration(path))
+        print(f"migration    {elapsed:.2f}s for {args.rows} rows")
+        print(f"indexed      {summary(time_lookups(path, indexed_lookup, args.users, args.lookups))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+import time
+from typing import Optional
+from utils import scheduler, storage
+from utils.antiraid import RaidDetector, Thresholds, Trigger
+from utils.bulk import RouteLimiter, run_bulk
+from utils.config import settings
+from utils.migrations import migrate
+
+config = settings()
+CLR = config.CLR
+
+antiraid_config = config.antiraid
+THRESHOLDS = Thresholds(
+    window=antiraid_config.window_seconds,
+    max_joins=antiraid_config.max_joins,
+    young_account_age=antiraid_config.young_account_days * 86400,
+    max_young_joins=antiraid_config.max_young_joins,
+    max_messages=antiraid_config.max_messages,
+    cooldown=antiraid_config.lockdown_minutes * 60,
+)
+# Any of: slowmode, pause_invites, kick_young
+ACTIONS = set(antiraid_config.actions)
+SLOWMODE_SECONDS = antiraid_config.slowmode_seconds
+ALERT_CHANNEL_ID = antiraid_config.alert_channel_id
+
+LIFT_JOB = "antiraid_lift"
+
+logger = logging.getLogger(__name__)
+
+class Lockdown:
+    "What a lockdown changed, so it can be undone"
+    def __init__(self, trigger: Optional[Trigger]):
+        self.trigger = trigger
+        self.slowmodes = {}
+        self.paused_invites = False
+
+    def payload(self):
+        return {"slowmodes": self.slowmodes, "paused_invites": self.paused_invites}
+
+    @classmethod
+    def from_payload(cls, payload):
+        # Restored after a restart or reload; JSON turned the channel ids into strings
+        lockdown = cls(None)
+        lockdown.slowmodes = {int(channel_id): delay for channel_id, delay in payload["slowmodes"].items()}
+        lockdown.paused_invites = payload["paused_invites"]
+        return lockdown
+
+class AntiRaid(commands.Cog):
+    "Raid detection and server lockdown"
+    def __init__(self, bot):
+        self.bot = bot
+        self.detector = RaidDetector(THRESHOLDS)
+        self.lockdowns = {}
+        self.channel_limiter = RouteLimiter(rate=2, burst=5)
+        self.scheduler: scheduler.Scheduler = None #type: ignore
+        self.tasks = set()
+
+    async def cog_load(self):
+        # Lifting is a persisted job, so a lockdown still ends after a reload or restart
+        db = await storage.get_database(storage.SCHEDULER_DB)
+        await migrate(db, scheduler.MIGRATIONS)
+        self.scheduler = scheduler.Scheduler(self.bot, db)
+        self.scheduler.register(LIFT_JOB, self.finish_lift)
+        await self.scheduler.start()
+        for job in self.scheduler.pending(LIFT_JOB):
+            self.lockdowns[job.key] = Lockdown.from_payload(job.payload)
+
+    async def cog_unload(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.scheduler.stop()
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        account_age = (discord.utils.utcnow() - member.created_at).total_seconds()
+        trigger = self.detector.record_join(member.guild.id, member.id, account_age, time.monotonic())
+        if trigger is not None:
+            self.spawn(self.lockdown(member.guild, trigger))
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild is None or message.author.bot:
+            return
+        trigger = self.detector.record_message(message.guild.id, time.monotonic())
+        if trigger is not None:
+            self.spawn(self.lockdown(message.guild, trigger))
+
+    async def alert(self, guild: discord.Guild, description: str):
+        logger.warning(f"[{guild.name}] {description}")
+        channel = guild.get_channel(ALERT_CHANNEL_ID) if ALERT_CHANNEL_ID else None
+        if isinstance(channel, discord.abc.Messageable):
+            try:
+                await channel.send(embed=discord.Embed(title="Anti-Raid", description=description, color=CLR))
+            except discord.HTTPException:
+                pass
+
+    async def lockdown(self, guild: discord.Guild, trigger: Trigger):
+        """
+        Applies the configured lockdown actions and schedules them to be lifted.
+        """
+        if guild.id in self.lockdowns:
+            return
+        lockdown = self.lockdowns[guild.id] = Lockdown(trigger)
+        pause_invites = 'pause_invites' in ACTIONS and 'INVITES_DISABLED' not in guild.features
+        channels = []
+        if 'slowmode' in ACTIONS:
+            channels = [channel for channel in guild.text_channels
+                        if channel.slowmode_delay < SLOWMODE_SECONDS and channel.permissions_for(guild.me).manage_channels]
+            for channel in channels:
+                lockdown.slowmodes[channel.id] = channel.slowmode_delay
+        # Recorded before anything changes: restoring a setting that wasn't changed is harmless
+        lockdown.paused_invites = pause_invites
+        await self.scheduler.schedule(LIFT_JOB, guild.id, time.time() + THRESHOLDS.cooldown, lockdown.payload())
+        await self.alert(guild, f"Raid detected: {trigger.reason}. Locking down for {THRESHOLDS.cooldown / 60:.0f} minutes.")
+
+        if pause_invites:
+            try:
+                await guild.edit(invites_disabled=True, reason=f"Anti-raid: {trigger.reason}")
+            except discord.HTTPException as e:
+                logger.error(f"Failed to pause invites: {e}")
+
+        if channels:
+            async def slow_down(channel):
+                await channel.edit(slowmode_delay=SLOWMODE_SECONDS, reason="Anti-raid lockdown")
+            await run_bulk(channels, lambda channel: channel.id, slow_down, concurrency=3, limiter=self.channel_limiter)
+
+        if 'kick_young' in ACTIONS and trigger.kind != "messages" and trigger.joiners:
+            await self.kick_joiners(guild, trigger)
+
+    async def kick_joiners(self, guild: discord.Guild, trigger: Trigger):
+        """
+        Kicks the young accounts that joined during the raid window through the Moderation cog's checks and limiter.
+        """
+        moderation = self.bot.get_cog('Moderation')
+        if moderation is None:
+            return
+        bot_top = guild.me.top_role.position
+        members = [guild.get_member(member_id) for member_id in trigger.joiners]
+        targets = [member for member in members
+                   if member is not None and moderation.hierarchy_error(member, self.bot.user.id, bot_top, bot_top, "kick") is None] #type: ignore
+
+        async def kick(member):
+            await guild.kick(member, reason=f"Anti-raid: {trigger.reason}")
+        report = await run_bulk(targets, lambda member: member.id, kick, concurrency=5,
+                                limiter=moderation.route_limiter('kick', guild.id)) #type: ignore
+        await self.alert(guild, f"Kicked {len(report.succeeded)} new account(s) that joined during the raid.")
+
+    async def finish_lift(self, guild_id: int, payload):
+        """
+        Scheduler handler: lifts the lockdown once its cooldown is over.
+        """
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            self.lockdowns.pop(guild_id, None)
+            return
+        self.lockdowns.setdefault(guild_id, Lockdown.from_payload(payload))
+        await self.lift(guild)
+
+    async def lift(self, guild: discord.Guild):
+        """
+        Restores slowmode and invites to how they were before the lockdown.
+        """
+        lockdown = self.lockdowns.pop(guild.id, None)
+        self.detector.release(guild.id)
+        if lockdown is None:
+            return
+        if (LIFT_JOB, guild.id) in self.scheduler:
+            await self.scheduler.cancel(LIFT_JOB, guild.id)
+
+        if lockdown.paused_invites:
+            try:
+                await guild.edit(invites_disabled=False, reason="Anti-raid lockdown lifted")
+            except discord.HTTPException as e:
+                logger.error(f"Failed to resume invites: {e}")
+
+        channels = [(guild.get_channel(channel_id), delay) for channel_id, delay in lockdown.slowmodes.items()]
+
+        async def restore(item):
+            channel, delay = item
+            await channel.edit(slowmode_delay=delay, reason="Anti-raid lockdown lifted")
+        await run_bulk([item for item in channels if item[0] is not None], lambda item: item[0].id, restore,
+                       concurrency=3, limiter=self.channel_limiter)
+        await self.alert(guild, "Lockdown lifted.")
+
+    @commands.hybrid_group(name='raidmode', fallback='status')
+    @commands.has_permissions(manage_guild=True)
+    async def raidmode(self, ctx):
+        """
+        Shows the anti-raid counters and lockdown state for this server.
+        """
+        state = self.detector.state(ctx.guild.id)
+        now = time.monotonic()
+        embed = discord.Embed(title="Anti-Raid Status", color=CLR)
+        embed.add_field(name="Lockdown", value="Active" if ctx.guild.id in self.lockdowns else "Inactive", inline=False)
+        embed.add_field(name=f"Joins ({THRESHOLDS.window:.0f}s)", value=f"{state.joins.count(now)}/{THRESHOLDS.max_joins}", inline=True)
+        embed.add_field(name="New Accounts", value=f"{state.young_joins.count(now)}/{THRESHOLDS.max_young_joins}", inline=True)
+        embed.add_field(name="Messages", value=f"{state.messages.count(now)}/{THRESHOLDS.max_messages}", inline=True)
+        await ctx.send(embed=embed)
+
+    @raidmode.command(name='on')
+    @commands.has_permissions(manage_guild=True)
+    async def raidmode_on(self, ctx):
+        """
+        Locks the server down by hand.
+        """
+        if ctx.guild.id in self.lockdowns:
+            return await ctx.send("The server is already locked down.")
+        await ctx.send("Locking the server down.")
+        await self.lockdown(ctx.guild, self.detector.trip(ctx.guild.id, time.monotonic(), f"manual lockdown by {ctx.author}"))
+
+    @raidmode.command(name='off')
+    @commands.has_permissions(manage_guild=True)
+    async def raidmode_off(self, ctx):
+        """
+        Lifts an active lockdown.
+        """
+        if ctx.guild.id not in self.lockdowns:
+            return await ctx.send("The server is not locked down.")
+        await self.lift(ctx.guild)
+        await ctx.send("Lockdown lifted.")
+
+async def setup(bot):
+    await bot.add_cog(AntiRaid(bot))
@@ -0,0 +1,177 @@
+import discord
+from discord.ext import commands
+from typing import Optional
+import asyncio
+import re
+from utils import automod, storage
+from utils.config import settings
+from utils.migrations import migrate
+
+CLR = settings().CLR
+
+class AutoModSettingsFlags(commands.FlagConverter):
+    enabled: Optional[bool] = commands.flag(default=None, description="Turn auto-moderation on or off")
+    invites: Optional[bool] = commands.flag(default=None, description="Remove Discord invite links")
+    max_mentions: Optional[int] = commands.flag(default=None, description="Most mentions allowed in one message (0 disables)")
+    caps_ratio: Optional[float] = commands.flag(default=None, description="Share of capital letters that counts as shouting (0 disables)")
+    caps_min_length: Optional[int] = commands.flag(default=None, description="Only check caps on messages with at least this many letters")
+
+class AutoMod(commands.Cog):
+    "Automatic moderation of messages"
+    def __init__(self, bot):
+        self.bot = bot
+        self.rules: automod.AutoModStore = None #type: ignore
+
+    async def cog_load(self):
+        """
+        Opens the shared automod database and upgrades its schema to the latest version.
+        """
+        db = await storage.get_database(storage.AUTOMOD_DB)
+        await migrate(db, automod.MIGRATIONS)
+        self.rules = automod.AutoModStore(db)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """
+        Checks every guild message against the guild's compiled rules.
+        """
+        if message.author.bot or message.guild is None or not isinstance(message.author, discord.Member):
+            return
+        if message.author.guild_permissions.manage_messages:
+            return
+
+        rules = await self.rules.rules(message.guild.id)
+        mentions = len(message.raw_mentions) + len(message.raw_role_mentions) + int(message.mention_everyone)
+        violation = rules.evaluate(message.content, mentions)
+        if violation is not None:
+            await self.punish(message, violation)
+
+    async def punish(self, message: discord.Message, violation: automod.Violation):
+        """
+        Removes the message and records a warning through the Moderation cog.
+        """
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+
+        reason = f"AutoMod: {violation.rule}"
+        moderation = self.bot.get_cog('Moderation')
+        if moderation is not None:
+            try:
+                await moderation.warnings.add(message.guild.id, message.author.id, self.bot.user.id, f"{reason} ({violation.detail[:100]})") #type: ignore
+                await moderation.outbox.enqueue(message.author.id, f"You were warned in {message.guild.name} for {reason}.") #type: ignore
+            except Exception as e:
+                print(f"Database error: {e}")
+
+        try:
+            await message.channel.send(f"{message.author.mention}, your message was removed ({violation.rule}).", delete_after=10)
+        except discord.HTTPException:
+            pass
+
+    @commands.hybrid_group(name='automod', fallback='show')
+    @commands.has_permissions(manage_guild=True)
+    async def automod(self, ctx):
+        """
+        Shows this server's auto-moderation settings.
+        """
+        settings, words, patterns = await self.rules.load(ctx.guild.id)
+        embed = discord.Embed(title="AutoMod Settings", color=CLR)
+        embed.add_field(name="Enabled", value=str(settings.enabled), inline=True)
+        embed.add_field(name="Block Invites", value=str(settings.block_invites), inline=True)
+        embed.add_field(name="Max Mentions", value=str(settings.max_mentions or "Off"), inline=True)
+        embed.add_field(name="Caps Ratio", value=f"{settings.caps_ratio:.0%} (min {settings.caps_min_length} letters)" if settings.caps_ratio else "Off", inline=True)
+        embed.add_field(name="Banned Words", value=str(len(words)), inline=True)
+        embed.add_field(name="Banned Patterns", value=str(len(patterns)), inline=True)
+        if not settings.enabled:
+            embed.set_footer(text="Turn it on with: automod set enabled:true")
+        await ctx.send(embed=embed)
+
+    @automod.command(name='addwords')
+    @commands.has_permissions(manage_guild=True)
+    async def addwords(self, ctx, *, words: str):
+        """
+        Adds banned words or phrases, separated by commas.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            words (str): Comma separated words or phrases.
+        """
+        values = [word.strip().lower() for word in words.split(",") if word.strip()]
+        added = await self.rules.add_terms(ctx.guild.id, automod.WORD, values)
+        await ctx.send(f"Added {added} banned word(s).")
+
+    @automod.command(name='removewords')
+    @commands.has_permissions(manage_guild=True)
+    async def removewords(self, ctx, *, words: str):
+        """
+        Removes banned words or phrases, separated by commas.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            words (str): Comma separated words or phrases.
+        """
+        values = [word.strip().lower() for word in words.split(",") if word.strip()]
+        removed = await self.rules.remove_terms(ctx.guild.id, automod.WORD, values)
+        await ctx.send(f"Removed {removed} banned word(s).")
+
+    @automod.command(name='addpattern')
+    @commands.has_permissions(manage_guild=True)
+    async def addpattern(self, ctx, *, pattern: str):
+        """
+        Adds a banned regular expression. Prefer addwords for plain words, it scales to large lists.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            pattern (str): A Python regular expression.
+        """
+        error = automod.pattern_error(pattern)
+        if error is not None:
+            return await ctx.send(f"That is not a valid pattern: {error}")
+        # Compiled together with the guild's current rules, exactly as messages will be checked
+        settings, words, patterns = await self.rules.load(ctx.guild.id)
+        try:
+            await asyncio.to_thread(automod.CompiledRules, settings, words, [*patterns, pattern])
+        except re.error as e:
+            return await ctx.send(f"That pattern doesn't combine with the existing rules: {e}")
+        await self.rules.add_terms(ctx.guild.id, automod.PATTERN, [pattern])
+        await ctx.send(f"Added banned pattern `{pattern}`.")
+
+    @automod.command(name='removepattern')
+    @commands.has_permissions(manage_guild=True)
+    async def removepattern(self, ctx, *, pattern: str):
+        """
+        Removes a banned regular expression.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            pattern (str): The pattern exactly as it was added.
+        """
+        removed = await self.rules.remove_terms(ctx.guild.id, automod.PATTERN, [pattern])
+        await ctx.send("Removed the pattern." if removed else "That pattern is not banned.")
+
+    @automod.command(name='set')
+    @commands.has_permissions(manage_guild=True)
+    async def set_settings(self, ctx, *, flags: AutoModSettingsFlags):
+        """
+        Changes auto-moderation settings.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            flags (AutoModSettingsFlags): enabled:, invites:, max_mentions:, caps_ratio: and caps_min_length:.
+        """
+        changes = {
+            'enabled': flags.enabled,
+            'block_invites': flags.invites,
+            'max_mentions': flags.max_mentions,
+            'caps_ratio': flags.caps_ratio,
+            'caps_min_length': flags.caps_min_length,
+        }
+        changes = {name: value for name, value in changes.items() if value is not None}
+        if not changes:
+            return await ctx.send("Nothing to change.")
+        await self.rules.update_settings(ctx.guild.id, **changes)
+        await ctx.send("AutoMod settings updated.")
+
+async def setup(bot):
+    await bot.add_cog(AutoMod(bot))
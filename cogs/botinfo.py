@@ -6,12 +6,8 @@ import psutil
 import cpuinfo
 import subprocess
 from datetime import datetime
-import yaml
+from utils.config import settings
 
-with open('conf/config.yaml', 'r') as file:
-    config = yaml.safe_load(file)
-
-support_server = config['creds']['support_server']
 class BotInfo(commands.Cog):
     """
     Commands related to bot's information
@@ -85,7 +81,7 @@ class BotInfo(commands.Cog):
         embed.add_field(name="Neofetch Output", value=f"```{neofetch_output}```", inline=False)
 
         view = discord.ui.View()
-        view.add_item(discord.ui.Button(label="Support Server", url=support_server, emoji='✨'))
+        view.add_item(discord.ui.Button(label="Support Server", url=settings().creds.support_server, emoji='✨'))
         view.add_item(discord.ui.Button(label="Developer GitHub", url="https://github.com/a3ro-dev", emoji='<:github:1256935375679655976>'))
 
         await ctx.send(embed=embed, view=view)
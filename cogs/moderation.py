@@ -1,19 +1,106 @@
 import discord
 from discord.ext import commands
-import sqlite3
-import yaml
-
-with open('conf/config.yaml', 'r') as file:
-    config = yaml.safe_load(file)
-
-CLR = config['CLR']
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import logging
+import time
+from utils import outbox, storage
+from utils.bulk import BulkReport, ProgressMessage, RouteLimiter, run_bulk
+from utils.config import settings
+from utils.metrics import LatencyRecorder
+from utils.migrations import migrate
+from utils.paginator import KeysetPaginator
+from utils.warning_store import MIGRATIONS, WarningStore
+
+logger = logging.getLogger(__name__)
+
+config = settings()
+CLR = config.CLR
+
+# Warns arriving within this window are committed together (group commit)
+moderation_config = config.moderation
+WARN_BATCH_WINDOW = moderation_config.warn_batch_window_ms / 1000
+WARN_BATCH_MAX = moderation_config.warn_batch_max
+
+# Bulk actions: parallel requests, per-route request rate and the largest batch accepted
+MASS_CONCURRENCY = moderation_config.mass_concurrency
+MASS_RATE = moderation_config.mass_rate_per_second
+MASS_BURST = moderation_config.mass_burst
+MASS_MAX_TARGETS = moderation_config.mass_max_targets
+
+# DM notifications are delivered in the background by the outbox worker
+DM_CONCURRENCY = moderation_config.dm_concurrency
+DM_MAX_ATTEMPTS = moderation_config.dm_max_attempts
+
+class MassActionFlags(commands.FlagConverter):
+    ids: Optional[str] = commands.flag(default=None, description="Space or comma separated user IDs")
+    role: Optional[discord.Role] = commands.flag(default=None, description="Every member with this role")
+    joined_within: Optional[int] = commands.flag(default=None, description="Only members who joined in the last N minutes")
+    reason: str = commands.flag(default="No reason provided", description="The reason for the action")
 
 class Moderation(commands.Cog):
     "Moderation related commands"
     def __init__(self, bot):
         self.bot = bot
-        self.conn = sqlite3.connect('./db/warnings.db')
-        self.cursor = self.conn.cursor()
+        self.db: storage.Database = None #type: ignore
+        self.warnings: WarningStore = None #type: ignore
+        self.route_limiters = {}
+        self.outbox: outbox.Outbox = None #type: ignore
+        self.latency = LatencyRecorder()
+
+    async def cog_load(self):
+        """
+        Opens the shared warnings and outbox databases, upgrades their schemas to the
+        latest version and starts the DM outbox worker.
+        """
+        self.db = await storage.get_database(storage.WARNINGS_DB, batch_window=WARN_BATCH_WINDOW, max_batch=WARN_BATCH_MAX)
+        await migrate(self.db, MIGRATIONS)
+        self.warnings = WarningStore(self.db)
+
+        outbox_db = await storage.get_database(storage.OUTBOX_DB)
+        await migrate(outbox_db, outbox.MIGRATIONS)
+        self.outbox = outbox.Outbox(self.bot, outbox_db, concurrency=DM_CONCURRENCY, max_attempts=DM_MAX_ATTEMPTS)
+        self.outbox.start()
+
+    async def cog_unload(self):
+        await self.outbox.stop()
+
+    async def cog_before_invoke(self, ctx):
+        ctx.started_at = time.perf_counter()
+
+    async def cog_after_invoke(self, ctx):
+        # Records how long each moderation command takes, see the modstats command
+        started_at = getattr(ctx, 'started_at', None)
+        if started_at is not None:
+            self.latency.record(ctx.command.qualified_name, time.perf_counter() - started_at)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """
+        Assigns warnings migrated from the old guild-less table to the bot's guild. With more
+        than one guild the bot can't tell whose they are, so the owner adopts them with adopt_warnings.
+        """
+        if len(self.bot.guilds) == 1:
+            adopted = await self.warnings.adopt_legacy(self.bot.guilds[0].id)
+            if adopted:
+                logger.info(f"Assigned {adopted} legacy warnings to {self.bot.guilds[0].name}")
+            return
+        waiting = await self.warnings.legacy_count()
+        if waiting:
+            logger.warning(f"{waiting} legacy warnings belong to no guild yet, run adopt_warnings in the guild they came from")
+
+    @commands.hybrid_command(name='adopt_warnings')
+    @commands.is_owner()
+    @commands.guild_only()
+    async def adopt_warnings(self, ctx):
+        """
+        Assigns the warnings migrated from the old guild-less table to this server.
+        """
+        adopted = await self.warnings.adopt_legacy(ctx.guild.id)
+        if not adopted:
+            return await ctx.send("There are no legacy warnings to adopt.")
+        logger.info(f"Assigned {adopted} legacy warnings to {ctx.guild.name} at the request of {ctx.author}")
+        await ctx.send(f"Assigned {adopted} legacy warning(s) to this server.")
 
     @commands.hybrid_command(name='warn')
     @commands.has_permissions(kick_members=True)
@@ -36,10 +123,10 @@ class Moderation(commands.Cog):
         if member == ctx.author:
             return await ctx.send("You can't warn yourself.")
 
-        # Using parameterized queries to prevent SQL injection
+        # Using parameterized queries to prevent SQL injection.
+        # add() only returns once the batch holding this warning is committed.
         try:
-            self.cursor.execute("INSERT INTO warnings (user_id, reason) VALUES (?, ?)", (member.id, reason))
-            self.conn.commit()
+            await self.warnings.add(ctx.guild.id, member.id, ctx.author.id, reason)
         except Exception as e:
             await ctx.send("Failed to record the warning in the database.")
             print(f"Database error: {e}")
@@ -48,18 +135,9 @@ class Moderation(commands.Cog):
         embed = discord.Embed(title="Member Warned", description=f"{member.mention} was warned by {ctx.author.mention} for {reason}.", color=0x00ff00)  # Assuming CLR is defined elsewhere
         await ctx.send(embed=embed)
 
-        try:
-            await member.send(f"You were warned in {ctx.guild.name} for {reason}.")
-        except discord.Forbidden:
-            await ctx.send(f"{member.mention} was warned, but I couldn't DM them to tell them why.")
-
-    @commands.Cog.listener()
-    async def on_ready(self):
-        """
-        Initializes the database table for warnings if it does not exist.
-        """
-        self.cursor.execute("CREATE TABLE IF NOT EXISTS warnings (user_id INTEGER, reason TEXT)")
-        self.conn.commit()
+        await self.outbox.enqueue(member.id, f"You were warned in {ctx.guild.name} for {reason}.",
+                                  fallback_channel_id=ctx.channel.id,
+                                  fallback_message=f"{member.mention} was warned, but I couldn't DM them to tell them why.")
 
     @commands.hybrid_command(name='show_warnings')
     @commands.has_permissions(kick_members=True)
@@ -72,18 +150,32 @@ class Moderation(commands.Cog):
             member (discord.Member): The member to show warnings for.
         """
         try:
-            # Using parameterized queries to prevent SQL injection
-            self.cursor.execute("SELECT * FROM warnings WHERE user_id = ?", (member.id,))
-            warnings = self.cursor.fetchall()
+            # The count and first page come from the cache when this member was looked up recently
+            summary = await self.warnings.summary(ctx.guild.id, member.id)
 
-            if not warnings:
+            if not summary.count:
                 return await ctx.send(f"{member.mention} has no warnings.")
 
-            embed = discord.Embed(title=f"{member.name}'s Warnings", color=CLR)
-            for i, warning in enumerate(warnings):
-                embed.add_field(name=f"Warning {i + 1}", value=warning[1], inline=False)
-
-            await ctx.send(embed=embed)
+            async def fetch(cursor, forward, limit):
+                if forward:
+                    return await self.warnings.page(ctx.guild.id, member.id, after=cursor, limit=limit)
+                return await self.warnings.page(ctx.guild.id, member.id, before=cursor, limit=limit)
+
+            def render(warnings, start):
+                embed = discord.Embed(title=f"{member.name}'s Warnings", color=CLR)
+                for i, warning in enumerate(warnings, start=start):
+                    # Keeps ten fields well inside the 6000 character embed limit
+                    reason = warning.reason if len(warning.reason) <= 400 else warning.reason[:397] + "..."
+                    details = f"by <@{warning.moderator_id}>" if warning.moderator_id else ""
+                    if warning.created_at:
+                        details += f" <t:{warning.created_at}:R>"
+                    embed.add_field(name=f"Warning {i}", value=f"{reason}\n{details}".strip(), inline=False)
+                embed.set_footer(text=f"{summary.count} warning(s) in total")
+                return embed
+
+            paginator = KeysetPaginator(ctx.author.id, fetch, lambda warning: (warning.created_at, warning.id),
+                                        render, page_size=self.warnings.page_size)
+            await paginator.send(ctx, first_page=summary.first_page)
         except Exception as e:
             await ctx.send("An error occurred while retrieving the warnings.")
             print(f"Database error: {e}")
@@ -104,16 +196,13 @@ class Moderation(commands.Cog):
         """
         try:
             # Using parameterized queries to prevent SQL injection
-            self.cursor.execute("SELECT rowid, * FROM warnings WHERE user_id = ?", (member.id,))
-            warnings = self.cursor.fetchall()
+            warning_to_remove = await self.warnings.get_by_position(ctx.guild.id, member.id, warning_number)
 
-            if warning_number > len(warnings) or warning_number < 1:
+            if warning_to_remove is None:
                 return await ctx.send(f"Warning {warning_number} does not exist for {member.mention}.")
 
-            # Use the rowid to uniquely identify and delete the warning
-            warning_to_remove = warnings[warning_number - 1]
-            self.cursor.execute("DELETE FROM warnings WHERE rowid = ?", (warning_to_remove[0],))
-            self.conn.commit()
+            # Use the id to uniquely identify and delete the warning
+            await self.warnings.remove(ctx.guild.id, warning_to_remove.id)
 
             await ctx.send(f"Removed warning {warning_number} for {member.mention}.")
         except Exception as e:
@@ -134,37 +223,26 @@ class Moderation(commands.Cog):
         Raises:
             discord.Forbidden: If the bot lacks the required permissions.
         """
-        if member.id == ctx.author.id:
-            return await ctx.send("You cannot kick yourself.")
-
-        if member.id == self.bot.user.id:
-            return await ctx.send("You cannot kick me.")
-
-        if member.top_role.position >= ctx.author.top_role.position:
-            return await ctx.send("You cannot kick someone with a higher or equal role than you.")
-
-        if member.top_role.position >= ctx.guild.me.top_role.position:
-            return await ctx.send("I cannot kick someone with a higher or equal role than me.")
+        error = self.hierarchy_error(member, ctx.author.id, ctx.author.top_role.position, ctx.guild.me.top_role.position, "kick")
+        if error:
+            return await ctx.send(error)
 
         try:
             await member.kick(reason=reason)
-            embed = discord.Embed(title="Member Kicked", color=CLR)
-            embed.add_field(name="Member", value=f"{member} ({member.id})", inline=False)
-            embed.add_field(name="Kicked By", value=f"{ctx.author} ({ctx.author.id})", inline=False)
-            if reason:
-                embed.add_field(name="Reason", value=reason, inline=False)
-            await ctx.send(embed=embed)
         except discord.Forbidden:
             return await ctx.send("I do not have permission to kick this member.")
         except Exception as e:
-            await ctx.send("An error occurred while trying to kick the member.")
             print(f"Error kicking member: {e}")
-
-        try:
-            await member.send(f"You have been kicked from {ctx.guild.name} by {ctx.author}.\nReason: {reason if reason else 'No reason provided.'}")
-        except discord.Forbidden:
-            # Member has DMs disabled or has blocked the bot
-            pass
+            return await ctx.send("An error occurred while trying to kick the member.")
+
+        # Only announced once it happened; the outbox fetches users who are no longer in the server
+        await self.outbox.enqueue(member.id, f"You have been kicked from {ctx.guild.name} by {ctx.author}.\nReason: {reason if reason else 'No reason provided.'}")
+        embed = discord.Embed(title="Member Kicked", color=CLR)
+        embed.add_field(name="Member", value=f"{member} ({member.id})", inline=False)
+        embed.add_field(name="Kicked By", value=f"{ctx.author} ({ctx.author.id})", inline=False)
+        if reason:
+            embed.add_field(name="Reason", value=reason, inline=False)
+        await ctx.send(embed=embed)
 
     @commands.hybrid_command(name='ban')
     @commands.has_permissions(ban_members=True)  # Corrected permission check
@@ -180,37 +258,183 @@ class Moderation(commands.Cog):
         Raises:
             discord.Forbidden: If the bot lacks the required permissions.
         """
-        if member.id == ctx.author.id:
-            return await ctx.send("You cannot ban yourself.")
-
-        if member.id == self.bot.user.id:
-            return await ctx.send("You cannot ban me.")
-
-        if member.top_role.position >= ctx.author.top_role.position:
-            return await ctx.send("You cannot ban someone with a higher or equal role than you.")
-
-        if member.top_role.position >= ctx.guild.me.top_role.position:
-            return await ctx.send("I cannot ban someone with a higher or equal role than me.")
+        error = self.hierarchy_error(member, ctx.author.id, ctx.author.top_role.position, ctx.guild.me.top_role.position, "ban")
+        if error:
+            return await ctx.send(error)
 
         try:
             await member.ban(reason=reason)
-            embed = discord.Embed(title="Member Banned", color=CLR)
-            embed.add_field(name="Member", value=f"{member} ({member.id})", inline=False)
-            embed.add_field(name="Banned By", value=f"{ctx.author} ({ctx.author.id})", inline=False)
-            if reason:
-                embed.add_field(name="Reason", value=reason, inline=False)
-            await ctx.send(embed=embed)
         except discord.Forbidden:
             return await ctx.send("I do not have permission to ban this member.")
         except Exception as e:
-            await ctx.send("An error occurred while trying to ban the member.")
             print(f"Error banning member: {e}")
+            return await ctx.send("An error occurred while trying to ban the member.")
+
+        # Only announced once it happened; the outbox fetches users who are no longer in the server
+        await self.outbox.enqueue(member.id, f"You have been banned from {ctx.guild.name} by {ctx.author}.\nReason: {reason if reason else 'No reason provided.'}")
+        embed = discord.Embed(title="Member Banned", color=CLR)
+        embed.add_field(name="Member", value=f"{member} ({member.id})", inline=False)
+        embed.add_field(name="Banned By", value=f"{ctx.author} ({ctx.author.id})", inline=False)
+        if reason:
+            embed.add_field(name="Reason", value=reason, inline=False)
+        await ctx.send(embed=embed)
 
-        try:
-            await member.send(f"You have been banned from {ctx.guild.name} by {ctx.author}.\nReason: {reason if reason else 'No reason provided.'}")
-        except discord.Forbidden:
-            # Member has DMs disabled or has blocked the bot
-            pass
+    @commands.hybrid_command(name='modstats')
+    @commands.has_permissions(kick_members=True)
+    async def modstats(self, ctx):
+        """
+        Shows moderation command latency percentiles and the DM outbox backlog.
+        """
+        embed = discord.Embed(title="Moderation Stats", color=CLR)
+        for name in self.latency.names():
+            pcts = self.latency.percentiles(name)
+            embed.add_field(name=name, value=" | ".join(f"p{pct:g}: {value * 1000:.0f}ms" for pct, value in pcts.items()), inline=False)
+        stats = await self.outbox.stats()
+        embed.add_field(name="DM Outbox", value=f"Pending: {stats.get('pending', 0)} | Dead-lettered: {stats.get('dead', 0)}", inline=False)
+        await ctx.send(embed=embed)
+
+    def hierarchy_error(self, member: discord.Member, author_id: int, author_top: int, bot_top: int, action: str) -> Optional[str]:
+        """
+        Returns why ``member`` cannot be actioned, or None if they can.
+
+        Takes role positions rather than a context so bulk commands can look them up once per batch.
+        """
+        if member.id == author_id:
+            return f"You cannot {action} yourself."
+
+        if member.id == self.bot.user.id:
+            return f"You cannot {action} me."
+
+        if member.top_role.position >= author_top:
+            return f"You cannot {action} someone with a higher or equal role than you."
+
+        if member.top_role.position >= bot_top:
+            return f"I cannot {action} someone with a higher or equal role than me."
+
+        return None
+
+    def route_limiter(self, route: str, guild_id: int) -> RouteLimiter:
+        """
+        Returns the shared limiter for a REST route in a guild, so concurrent bulk jobs pace together.
+        """
+        key = (route, guild_id)
+        if key not in self.route_limiters:
+            self.route_limiters[key] = RouteLimiter(MASS_RATE, MASS_BURST)
+        return self.route_limiters[key]
+
+    def resolve_targets(self, guild: discord.Guild, flags: MassActionFlags):
+        """
+        Resolves the flags into (members, ids of users not in the guild).
+
+        ``ids`` and ``role`` are combined; ``joined_within`` filters them, or selects
+        every recent joiner when used on its own.
+        """
+        user_ids = set()
+        if flags.ids:
+            for token in flags.ids.replace(",", " ").split():
+                if token.strip("<@!>").isdigit():
+                    user_ids.add(int(token.strip("<@!>")))
+        if flags.role is not None:
+            user_ids.update(member.id for member in flags.role.members)
+
+        if flags.joined_within is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(minutes=flags.joined_within)
+            candidates = [guild.get_member(user_id) for user_id in user_ids] if (flags.ids or flags.role) else guild.members
+            recent = [member for member in candidates if member and member.joined_at and member.joined_at >= cutoff]
+            return recent, []
+
+        members, missing = [], []
+        for user_id in user_ids:
+            member = guild.get_member(user_id)
+            if member is None:
+                missing.append(user_id)
+            else:
+                members.append(member)
+        return members, missing
+
+    async def mass_action(self, ctx, flags: MassActionFlags, action: str, title: str, perform, route: Optional[str],
+                          allow_missing: bool = False, concurrency: int = MASS_CONCURRENCY):
+        """
+        Shared driver for the mass commands: resolves targets, runs the hierarchy checks once
+        per batch and feeds the rest through the bulk executor with a live progress message.
+        """
+        if not (flags.ids or flags.role or flags.joined_within is not None):
+            return await ctx.send("Provide `ids:`, `role:` or `joined_within:` to select members.")
+
+        members, missing = self.resolve_targets(ctx.guild, flags)
+        if len(members) + len(missing) > MASS_MAX_TARGETS:
+            return await ctx.send(f"Refusing to {action} more than {MASS_MAX_TARGETS} users at once.")
+        if not members and not missing:
+            return await ctx.send("No users matched.")
+
+        # Positions are looked up once, not once per member
+        author_top = ctx.author.top_role.position
+        bot_top = ctx.guild.me.top_role.position
+        skipped, targets = {}, []
+        for member in members:
+            error = self.hierarchy_error(member, ctx.author.id, author_top, bot_top, action)
+            if error:
+                skipped[member.id] = error
+            else:
+                targets.append(member)
+        for user_id in missing:
+            if allow_missing:
+                targets.append(discord.Object(id=user_id))
+            else:
+                skipped[user_id] = "Not a member of this server."
+
+        report = BulkReport(len(targets) + len(skipped), skipped)
+        progress = ProgressMessage(await ctx.send(f"{title}: starting on {len(targets)} users..."), title, CLR)
+        limiter = self.route_limiter(route, ctx.guild.id) if route else None
+        await run_bulk(targets, lambda target: target.id, perform, concurrency=concurrency,
+                       limiter=limiter, report=report, progress=progress)
+
+    @commands.hybrid_command(name='massban')
+    @commands.has_permissions(ban_members=True)
+    async def massban(self, ctx, *, flags: MassActionFlags):
+        """
+        Bans many users at once, e.g. after a raid.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            flags (MassActionFlags): ids:, role:, joined_within: and reason: selectors.
+        """
+        reason = f"{flags.reason} (massban by {ctx.author})"
+
+        async def perform(target):
+            await ctx.guild.ban(target, reason=reason)
+        await self.mass_action(ctx, flags, "ban", "Mass ban", perform, route="ban", allow_missing=True)
+
+    @commands.hybrid_command(name='masskick')
+    @commands.has_permissions(kick_members=True)
+    async def masskick(self, ctx, *, flags: MassActionFlags):
+        """
+        Kicks many members at once, e.g. after a raid.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            flags (MassActionFlags): ids:, role:, joined_within: and reason: selectors.
+        """
+        reason = f"{flags.reason} (masskick by {ctx.author})"
+
+        async def perform(member):
+            await ctx.guild.kick(member, reason=reason)
+        await self.mass_action(ctx, flags, "kick", "Mass kick", perform, route="kick")
+
+    @commands.hybrid_command(name='masswarn')
+    @commands.has_permissions(kick_members=True)
+    async def masswarn(self, ctx, *, flags: MassActionFlags):
+        """
+        Warns many members at once. The warnings are group-committed to the database.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            flags (MassActionFlags): ids:, role:, joined_within: and reason: selectors.
+        """
+        async def perform(member):
+            await self.warnings.add(ctx.guild.id, member.id, ctx.author.id, flags.reason)
+        # No REST route involved, so no limiter; a full batch in flight lets the writer group-commit it
+        await self.mass_action(ctx, flags, "warn", "Mass warn", perform, route=None, concurrency=WARN_BATCH_MAX)
 
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
@@ -1,14 +1,125 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.ui import Button, View
-import sqlite3
-import yaml
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+from utils import minhash, storage, suggestion_store
+from utils.config import Config, get_config, settings
+from utils.migrations import migrate
+from utils.coalescer import EditCoalescer
+from utils.export import export_gzip
+from utils.paginator import KeysetPaginator
+from utils.suggestion_store import SuggestionFilter, SuggestionStore, Tally
 
-# Load configuration from YAML file
-with open('conf/config.yaml') as file:
-    config = yaml.safe_load(file)
+logger = logging.getLogger(__name__)
 
-suggestions_id = config['suggestion']['channel_id']
+# Settings live in the suggestion section of the config and are re-read when it changes:
+# - vote count edits to one suggestion message are batched to at most one per edit_interval_seconds
+# - suggestions at least similar_threshold alike are listed back to the author, if found within similar_budget_ms
+# - a pinned leaderboard in leaderboard_channel_id is refreshed every leaderboard_interval_minutes
+# - accepted and rejected suggestions are archived after archive_after_days, and the votes of archived
+#   suggestions are compacted into their tallies every retention_interval_hours
+LEADERBOARD_TITLE = "Suggestion Leaderboard"
+
+HISTORY_PAGE_SIZE = 10
+EXPORT_FIELDS = ("id", "suggestion", "message_link", "message_id", "author_id", "status", "created_at",
+                 "upvotes", "downvotes", "nota", "score")
+
+VOTE_EMOJIS = {
+    "upvote": "<:upvote:1259171536053735424>",
+    "downvote": "<:downvote:1259171762831364107>",
+    "nota": "<:red_dot:1259172069497897070>",
+}
+
+def render_counts(embed: discord.Embed, tally: Tally) -> discord.Embed:
+    """
+    Writes the vote counts into a suggestion embed and colours it by the balance of votes.
+    """
+    embed.set_field_at(0, name="Upvotes", value=str(tally.upvotes), inline=True)
+    embed.set_field_at(1, name="Downvotes", value=str(tally.downvotes), inline=True)
+    embed.set_field_at(2, name="Nota", value=str(tally.nota), inline=True)
+
+    # Set the color of the embed based on the vote counts
+    if tally.upvotes > tally.downvotes:
+        embed.color = discord.Color.green()
+    elif tally.downvotes > tally.upvotes:
+        embed.color = discord.Color.red()
+    else:
+        embed.color = discord.Color.blue()
+    return embed
+
+def render_leaderboard(entries, start: int) -> discord.Embed:
+    """
+    Lists suggestions by rank with their vote counts and Wilson score.
+    """
+    embed = discord.Embed(title=LEADERBOARD_TITLE, color=discord.Color.gold())
+    for rank, entry in enumerate(entries, start=start):
+        text = entry.suggestion if len(entry.suggestion) <= 200 else entry.suggestion[:197] + "..."
+        link = f"\n[Jump to suggestion]({entry.message_link})" if entry.message_link else ""
+        embed.add_field(name=f"{rank}. #{entry.id} · score {entry.score:.2f}",
+                        value=f"{text}\n{entry.upvotes} up · {entry.downvotes} down · {entry.nota} nota{link}", inline=False)
+    if not entries:
+        embed.description = "No votes yet."
+    embed.set_footer(text="Ranked by the Wilson lower bound of the upvote share; nota votes are not counted")
+    return embed
+
+class SuggestionFilterFlags(commands.FlagConverter):
+    status: Optional[str] = commands.flag(default=None, description="Only suggestions in this state")
+    since: Optional[str] = commands.flag(default=None, description="Submitted on or after this date (YYYY-MM-DD)")
+    until: Optional[str] = commands.flag(default=None, description="Submitted on or before this date (YYYY-MM-DD)")
+    min_score: Optional[int] = commands.flag(default=None, description="At least this many upvotes more than downvotes")
+    max_score: Optional[int] = commands.flag(default=None, description="At most this many upvotes more than downvotes")
+
+    def to_filter(self) -> SuggestionFilter:
+        """
+        Raises ValueError with a message for the user when a flag is malformed.
+        """
+        if self.status is not None and self.status.lower() not in suggestion_store.STATUSES:
+            raise ValueError(f"Status must be one of: {', '.join(suggestion_store.STATUSES)}.")
+        return SuggestionFilter(
+            status=self.status.lower() if self.status else None,
+            since=parse_day(self.since),
+            until=parse_day(self.until, 1),
+            min_score=self.min_score,
+            max_score=self.max_score,
+        )
+
+def parse_day(value: Optional[str], offset: int = 0) -> Optional[int]:
+    """
+    Converts a YYYY-MM-DD date to the unix time of that day's start in UTC, plus ``offset`` days.
+    """
+    if not value:
+        return None
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise ValueError(f"`{value}` is not a date, use YYYY-MM-DD.")
+    return int((day + timedelta(days=offset)).timestamp())
+
+class VoteButton(discord.ui.DynamicItem[Button], template=r'(?:suggestion:)?(?P<vote>upvote|downvote|nota)'):
+    """
+    One voting button for every suggestion message, old or new.
+
+    The vote is encoded in the custom id, and everything else is loaded from the clicked
+    message, so nothing is kept in memory per suggestion and votes keep working after a
+    restart. The template also matches the bare ids of buttons sent before this existed.
+    """
+    def __init__(self, vote: str):
+        super().__init__(Button(emoji=VOTE_EMOJIS[vote], custom_id=f"suggestion:{vote}"))
+        self.vote = vote
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match):
+        return cls(match['vote'])
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog('Suggestions') #type: ignore
+        if cog is None:
+            return await interaction.response.send_message("Suggestions are unavailable right now.", ephemeral=True)
+        await cog.handle_vote(interaction, self.vote)
 
 class Suggestions(commands.Cog):
     """
@@ -16,28 +127,54 @@ class Suggestions(commands.Cog):
     """
     def __init__(self, bot):
         self.bot = bot
-        self.suggestion_channel_id = suggestions_id
-        self.bot.loop.create_task(self.setup_database())
+        self.settings = settings().suggestion
+        self.suggestion_channel_id = self.settings.channel_id
+        self.store: SuggestionStore = None #type: ignore
+        self.edits = EditCoalescer(self.settings.edit_interval_seconds)
+        self.leaderboard_message: Optional[discord.Message] = None
+        self.leaderboard_embed: Optional[dict] = None
+
+    async def cog_load(self):
+        await self.setup_database()
+        self.bot.add_dynamic_items(VoteButton)
+        self.apply_config(settings())
+        self.retention.start()
+        get_config().subscribe(self.apply_config)
+
+    async def cog_unload(self):
+        get_config().unsubscribe(self.apply_config)
+        self.bot.remove_dynamic_items(VoteButton)
+        self.refresh_leaderboard.cancel()
+        self.retention.cancel()
+        await self.edits.close()
+
+    def apply_config(self, config: Config):
+        """
+        Picks up the suggestion channel, intervals and thresholds from a new config.
+        """
+        self.settings = config.suggestion
+        self.suggestion_channel_id = self.settings.channel_id
+        self.edits.interval = self.settings.edit_interval_seconds
+        self.refresh_leaderboard.change_interval(minutes=self.settings.leaderboard_interval_minutes)
+        self.retention.change_interval(hours=self.settings.retention_interval_hours)
+        if self.settings.leaderboard_channel_id and not self.refresh_leaderboard.is_running():
+            self.refresh_leaderboard.start()
+        elif not self.settings.leaderboard_channel_id:
+            self.refresh_leaderboard.cancel()
+        if self.leaderboard_message is not None and self.leaderboard_message.channel.id != self.settings.leaderboard_channel_id:
+            self.leaderboard_message, self.leaderboard_embed = None, None
 
     async def setup_database(self):
-        # Use sqlite3 for database operations
-        with sqlite3.connect("./db/suggestions.db") as db:
-            db.execute("""
-                CREATE TABLE IF NOT EXISTS suggestions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    suggestion TEXT,
-                    message_link TEXT
-                )
-            """)
-            db.execute("""
-                CREATE TABLE IF NOT EXISTS votes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    message_id INTEGER,
-                    user_id INTEGER,
-                    vote_type TEXT
-                )
-            """)
-            db.commit()
+        """
+        Opens the shared suggestions database and upgrades its schema to the latest version.
+        """
+        db = await storage.get_database(storage.SUGGESTIONS_DB)
+        self.store = SuggestionStore(db)
+        # Before the first table exists this is free; an older database is rewritten once, here rather than mid-retention
+        start = time.perf_counter()
+        if await self.store.enable_incremental_vacuum():
+            logger.info(f"Switched {db.path} to incremental auto-vacuum in {time.perf_counter() - start:.1f}s")
+        await migrate(db, suggestion_store.MIGRATIONS)
 
     @commands.hybrid_command(name="suggest")
     async def suggest(self, ctx, *, suggestion: str):
@@ -50,103 +187,283 @@ class Suggestions(commands.Cog):
         embed.add_field(name="Downvotes", value="0", inline=True)
         embed.add_field(name="Nota", value="0", inline=True)
 
-        # Create buttons
-        upvote_button = Button(emoji="<:upvote:1259171536053735424>", custom_id="upvote")
-        downvote_button = Button(emoji="<:downvote:1259171762831364107>", custom_id="downvote")
-        nota_button = Button(emoji="<:red_dot:1259172069497897070>", custom_id="nota")
-
-        # Add buttons to a view
-        view = View()
-        view.add_item(upvote_button)
-        view.add_item(downvote_button)
-        view.add_item(nota_button)
-
-        # Send the suggestion embed with buttons
-        suggestion_channel = self.bot.get_channel(self.suggestion_channel_id)
-        message = await suggestion_channel.send(embed=embed, view=view)
-
-        # Store the suggestion message link in history
-        with sqlite3.connect("./db/suggestions.db") as db:
-            db.execute("INSERT INTO suggestions (suggestion, message_link) VALUES (?, ?)", (suggestion, message.jump_url))
-            db.commit()
-
-        # Update embed counts on button press
-        async def button_callback(interaction: discord.Interaction):
-            user_id = interaction.user.id
-            message_id = message.id
-            vote_type = interaction.data['custom_id'] #type: ignore
-
-            with sqlite3.connect("./db/suggestions.db") as db:
-                cursor = db.cursor()
-
-                # Check if the user has already voted for this suggestion
-                cursor.execute("SELECT vote_type FROM votes WHERE message_id = ? AND user_id = ?", (message_id, user_id))
-                existing_vote = cursor.fetchone()
-
-                if existing_vote:
-                    if existing_vote[0] == vote_type:
-                        # Remove the user's vote
-                        cursor.execute("DELETE FROM votes WHERE message_id = ? AND user_id = ?", (message_id, user_id))
-                        db.commit()
-                        await interaction.response.send_message("Your vote has been deducted.", ephemeral=True)
-                    else:
-                        # The user has already voted for a different type
-                        await interaction.response.send_message(f"You've already voted for {existing_vote[0]}.", ephemeral=True)
-                        return
-                else:
-                    # Add the user's vote
-                    cursor.execute("INSERT INTO votes (message_id, user_id, vote_type) VALUES (?, ?, ?)", (message_id, user_id, vote_type))
-                    db.commit()
-                    await interaction.response.send_message("Your vote has been added.", ephemeral=True)
-
-                # Update the embed counts
-                cursor.execute("SELECT vote_type, COUNT(*) FROM votes WHERE message_id = ? GROUP BY vote_type", (message_id,))
-                votes = cursor.fetchall()
-
-                upvotes = sum(count for vote, count in votes if vote == "upvote")
-                downvotes = sum(count for vote, count in votes if vote == "downvote")
-                nota = sum(count for vote, count in votes if vote == "nota")
-
-                embed.set_field_at(0, name="Upvotes", value=str(upvotes), inline=True)
-                embed.set_field_at(1, name="Downvotes", value=str(downvotes), inline=True)
-                embed.set_field_at(2, name="Nota", value=str(nota), inline=True)
-
-                # Set the color of the embed based on the vote counts
-                if upvotes > downvotes:
-                    embed.color = discord.Color.green()
-                elif downvotes > upvotes:
-                    embed.color = discord.Color.red()
-                else:
-                    embed.color = discord.Color.blue()
-
-                await message.edit(embed=embed)
-
-        upvote_button.callback = button_callback
-        downvote_button.callback = button_callback
-        nota_button.callback = button_callback
-
-        await ctx.send(f"Suggestion submitted: {suggestion}", ephemeral=True)
+        # The buttons are dispatched by VoteButton's template, so the view isn't kept per message
+        view = View(timeout=None)
+        for vote in suggestion_store.VOTE_TYPES:
+            view.add_item(VoteButton(vote))
+
+        # Look for earlier copies of the idea while the suggestion is being posted. The new row may be stored
+        # before the lookup reads, so one extra match is asked for and the suggestion itself dropped below
+        signature = minhash.signature(suggestion)
+        similar = asyncio.create_task(self.store.find_similar(signature, threshold=self.settings.similar_threshold, limit=4))
+
+        try:
+            # Send the suggestion embed with buttons
+            suggestion_channel = self.bot.get_channel(self.suggestion_channel_id)
+            message = await suggestion_channel.send(embed=embed, view=view)
+
+            # Store the suggestion message link in history
+            suggestion_id = await self.store.add(suggestion, message.id, message.jump_url, ctx.author.id,
+                                                 int(message.created_at.timestamp()), signature)
+        except BaseException:
+            similar.cancel()
+            raise
+
+        try:
+            matches = await asyncio.wait_for(similar, self.settings.similar_budget_ms / 1000)
+        except asyncio.TimeoutError:
+            matches = []
+        except Exception as e:
+            logger.warning(f"Similar suggestion lookup failed: {e}")
+            matches = []
+        matches = [match for match in matches if match.id != suggestion_id][:3]
+        reply = f"Suggestion submitted: {suggestion}"
+        if matches:
+            reply += "\n\nSimilar existing suggestions:\n" + "\n".join(
+                f"- #{match.id} ({match.similarity:.0%}) {match.message_link or match.suggestion[:100]}" for match in matches)
+        await ctx.send(reply, ephemeral=True)
+
+    @commands.hybrid_command(name="suggestion_search")
+    async def suggestion_search(self, ctx, *, query: str):
+        """
+        Searches past suggestions by text, best matches first.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            query (str): Words that must all appear in the suggestion.
+        """
+        results = await self.store.search(query)
+        if not results:
+            return await ctx.send("No suggestions match that search.")
+        embed = discord.Embed(title=f"Suggestions matching \"{query[:200]}\"", color=discord.Color.blue())
+        for result in results:
+            details = f"\n[Jump to suggestion]({result.message_link})" if result.message_link else ""
+            embed.add_field(name=f"#{result.id} · {result.status}", value=result.snippet[:900] + details, inline=False)
+        await ctx.send(embed=embed)
+
+    async def handle_vote(self, interaction: discord.Interaction, vote_type: str):
+        """
+        Records a button press and updates the counts on the suggestion it belongs to.
+        """
+        message = interaction.message
+        if message is None or not message.embeds:
+            return await interaction.response.send_message("This suggestion can no longer be voted on.", ephemeral=True)
+
+        outcome = await self.store.toggle_vote(message.id, interaction.user.id, vote_type)
+        if outcome.action == "conflict":
+            await interaction.response.send_message(f"You've already voted for {outcome.existing_vote}.", ephemeral=True)
+            return
+        if outcome.action == "closed":
+            await interaction.response.send_message("Voting on this suggestion has closed.", ephemeral=True)
+            return
+
+        # Queue the embed update before replying, so the newest tally is always the one left pending
+        async def update_embed(tally: Tally):
+            await message.edit(embed=render_counts(message.embeds[0], tally))
+        self.edits.request(message.id, outcome.tally, update_embed)
+
+        if outcome.action == "removed":
+            await interaction.response.send_message("Your vote has been deducted.", ephemeral=True)
+        else:
+            await interaction.response.send_message("Your vote has been added.", ephemeral=True)
+
+    @tasks.loop(minutes=10)
+    async def refresh_leaderboard(self):
+        """
+        Keeps the pinned leaderboard current, editing it only when the rankings changed.
+        """
+        channel = self.bot.get_channel(self.settings.leaderboard_channel_id) #type: ignore
+        if not isinstance(channel, discord.TextChannel):
+            return
+        embed = render_leaderboard(await self.store.leaderboard(limit=HISTORY_PAGE_SIZE), 1)
+        if embed.to_dict() == self.leaderboard_embed:
+            return
+        try:
+            if self.leaderboard_message is None:
+                # Reuse the leaderboard pinned before a restart
+                async for message in channel.pins():
+                    if message.author == self.bot.user and message.embeds and message.embeds[0].title == LEADERBOARD_TITLE:
+                        self.leaderboard_message = message
+                        break
+            if self.leaderboard_message is None:
+                self.leaderboard_message = await channel.send(embed=embed)
+                await self.leaderboard_message.pin(reason="Suggestion leaderboard")
+            else:
+                await self.leaderboard_message.edit(embed=embed)
+            self.leaderboard_embed = embed.to_dict()
+        except discord.NotFound:
+            # The pinned message was deleted, post a new one next time
+            self.leaderboard_message = None
+        except discord.HTTPException as e:
+            logger.error(f"Failed to update the suggestion leaderboard: {e}")
+
+    @refresh_leaderboard.before_loop
+    async def before_refresh_leaderboard(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=24)
+    async def retention(self):
+        """
+        Archives long-closed suggestions, compacts their votes and gives the freed pages back to the file system.
+        """
+        try:
+            archived = await self.store.archive_closed(int(time.time() - self.settings.archive_after_days * 86400))
+            compacted, votes = await self.store.compact_archived()
+            freed = 0
+            while True:
+                # Small steps, so the writer is never held for long
+                pages = await self.store.reclaim_space(pages=200)
+                freed += pages
+                if not pages:
+                    break
+                await asyncio.sleep(1)
+            if archived or compacted or freed:
+                logger.info(f"Suggestion retention: archived {archived}, compacted {votes} votes of {compacted} suggestions, freed {freed} pages")
+        except Exception as e:
+            logger.error(f"Suggestion retention failed: {e}")
+
+    @retention.before_loop
+    async def before_retention(self):
+        await self.bot.wait_until_ready()
+
+    @commands.hybrid_command(name="suggestion_status")
+    @commands.has_permissions(administrator=True)
+    async def suggestion_status(self, ctx, suggestion_id: int, status: Literal["open", "accepted", "rejected", "archived"],
+                                *, note: Optional[str] = None):
+        """
+        Marks a suggestion as open, accepted, rejected or archived. Voting is only possible while it is open.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            suggestion_id (int): The number shown in the suggestion history.
+            status (str): open, accepted, rejected or archived.
+            note (str): Optional explanation shown on the suggestion.
+        """
+        try:
+            record = await self.store.set_status(suggestion_id, status, int(time.time()))
+        except ValueError as e:
+            return await ctx.send(str(e))
+
+        channel = self.bot.get_channel(self.suggestion_channel_id)
+        if record.message_id and isinstance(channel, discord.abc.Messageable):
+            try:
+                message = await channel.fetch_message(record.message_id)
+                embed = message.embeds[0]
+                embed.set_footer(text=f"Status: {status.capitalize()}" + (f" · {note}" if note else ""))
+                view = View(timeout=None)
+                if status == "open":
+                    for vote in suggestion_store.VOTE_TYPES:
+                        view.add_item(VoteButton(vote))
+                await message.edit(embed=embed, view=view)
+            except (discord.HTTPException, IndexError) as e:
+                logger.warning(f"Could not update the message of suggestion #{suggestion_id}: {e}")
+        await ctx.send(f"Suggestion #{suggestion_id} is now {status}.")
+
+    @commands.hybrid_command(name="suggestion_top")
+    async def suggestion_top(self, ctx):
+        """
+        Shows the best received suggestions, a page at a time.
+        """
+        async def fetch(cursor, forward, limit):
+            if forward:
+                return await self.store.leaderboard(after=cursor, limit=limit)
+            return await self.store.leaderboard(before=cursor, limit=limit)
+
+        first_page = await fetch(None, True, HISTORY_PAGE_SIZE + 1)
+        if not first_page:
+            return await ctx.send("No suggestions have been voted on yet.")
+        paginator = KeysetPaginator(ctx.author.id, fetch, lambda entry: (entry.score, entry.message_id),
+                                    render_leaderboard, page_size=HISTORY_PAGE_SIZE)
+        await paginator.send(ctx, first_page=first_page)
+
+    @commands.hybrid_command(name="suggestion_stats")
+    @commands.has_permissions(administrator=True)
+    async def suggestion_stats(self, ctx):
+        """
+        Shows how many vote count edits were requested and how many were actually sent to Discord.
+        """
+        stats = self.edits.stats()
+        embed = discord.Embed(title="Suggestion Edits", color=discord.Color.blue())
+        embed.add_field(name="Requested", value=str(stats['requested']), inline=True)
+        embed.add_field(name="Sent", value=str(stats['sent']), inline=True)
+        embed.add_field(name="Skipped (unchanged)", value=str(stats['unchanged']), inline=True)
+        embed.add_field(name="Failed", value=str(stats['failed']), inline=True)
+        embed.add_field(name="Pending", value=str(stats['pending']), inline=True)
+        embed.set_footer(text=f"At most one edit per suggestion every {self.edits.interval:g}s")
+        await ctx.send(embed=embed)
 
     @commands.hybrid_command(name="suggestions_history")
     @commands.has_permissions(administrator=True)
-    async def suggestions_history(self, ctx):
+    async def suggestions_history(self, ctx, *, flags: SuggestionFilterFlags):
         """
-        Retrieves the history of suggestions.
+        Browses past suggestions newest first, a page at a time.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            flags (SuggestionFilterFlags): status:, since:, until:, min_score: and max_score:.
         """
-        with sqlite3.connect("./db/suggestions.db") as db:
-            cursor = db.execute("SELECT suggestion, message_link FROM suggestions")
-            rows = cursor.fetchall()
-            if not rows:
-                await ctx.send("No suggestions found.")
-                return
+        try:
+            filters = flags.to_filter()
+        except ValueError as e:
+            return await ctx.send(str(e))
+
+        async def fetch(cursor, forward, limit):
+            if forward:
+                return await self.store.page(filters, after=cursor, limit=limit)
+            return await self.store.page(filters, before=cursor, limit=limit)
+
+        first_page = await fetch(None, True, HISTORY_PAGE_SIZE + 1)
+        if not first_page:
+            return await ctx.send("No suggestions found.")
+
+        def render(suggestions, start):
             embed = discord.Embed(title="Suggestions History", color=discord.Color.blue())
-            for row in rows:
-                suggestion = row[0]
-                message_link = row[1]
-                embed.add_field(name="Suggestion", value=suggestion, inline=False)
-                embed.add_field(name="Message Link", value=message_link, inline=False)
-                embed.add_field(name="\u200b", value="\u200b", inline=False)  # Empty field for spacing
-            await ctx.send(embed=embed)
+            for suggestion in suggestions:
+                # Ten fields of this size stay well inside the 6000 character embed limit
+                text = suggestion.suggestion if len(suggestion.suggestion) <= 300 else suggestion.suggestion[:297] + "..."
+                details = f"[Jump to suggestion]({suggestion.message_link})" if suggestion.message_link else ""
+                if suggestion.created_at:
+                    details += f" <t:{suggestion.created_at}:d>"
+                embed.add_field(name=f"#{suggestion.id} · {suggestion.status} · score {suggestion.score:+d}",
+                                value=f"{text}\n{details}".strip(), inline=False)
+            embed.set_footer(text=f"Showing from result {start}")
+            return embed
+
+        paginator = KeysetPaginator(ctx.author.id, fetch, lambda suggestion: (suggestion.created_at, suggestion.id),
+                                    render, page_size=HISTORY_PAGE_SIZE)
+        await paginator.send(ctx, first_page=first_page)
+
+    @commands.hybrid_command(name="suggestions_export")
+    @commands.has_permissions(administrator=True)
+    async def suggestions_export(self, ctx, fmt: Literal["jsonl", "csv"] = "jsonl", *, flags: SuggestionFilterFlags):
+        """
+        Exports matching suggestions as a gzip-compressed JSONL or CSV attachment.
+
+        Args:
+            ctx (commands.Context): The context of the command.
+            fmt (str): jsonl or csv.
+            flags (SuggestionFilterFlags): status:, since:, until:, min_score: and max_score:.
+        """
+        try:
+            filters = flags.to_filter()
+        except ValueError as e:
+            return await ctx.send(str(e))
+        await ctx.defer()
+
+        async def rows():
+            async for batch in self.store.batches(filters):
+                yield [dict(suggestion._asdict(), score=suggestion.score) for suggestion in batch]
+
+        file, count = await export_gzip(rows(), EXPORT_FIELDS, fmt)
+        with file:
+            if not count:
+                return await ctx.send("No suggestions found.")
+            size = file.seek(0, 2)
+            file.seek(0)
+            limit = ctx.guild.filesize_limit if ctx.guild else 10 * 1024 * 1024
+            if size > limit:
+                return await ctx.send(f"The export is {size / 1024 / 1024:.1f} MB, over this server's upload limit. Narrow it down with filters.")
+            await ctx.send(f"Exported {count} suggestion(s).", file=discord.File(file, filename=f"suggestions.{fmt}.gz"))
 
 async def setup(bot):
     await bot.add_cog(Suggestions(bot))
@@ -1,9 +1,15 @@
 import discord
-from discord.ext import commands
-import yaml
+from discord.ext import commands, tasks
 import asyncio
 import logging
 import time
+from utils import scheduler, storage, ticket_store, transcripts
+from utils.config import Config, get_config, settings
+from utils.migrations import migrate
+from utils.paginator import KeysetPaginator
+from utils.routing import TicketRouter, is_available
+from utils.throttle import TicketThrottle
+from utils.tickets import TicketProvisioner
 
 # Configure logging
 log_filename = f"./logs/log_{time.strftime('%Y%m%d-%H%M%S')}.log"
@@ -16,30 +22,278 @@ logging.basicConfig(
     ]
 )
 
+CLAIM_JOB = "ticket_claim"
+INACTIVE_JOB = "ticket_inactive"
+
+def throttle_limits(tickets_config):
+    # The config counts per minute, the buckets refill per second
+    return (tickets_config.throttle_user_per_minute / 60, tickets_config.throttle_user_burst,
+            tickets_config.throttle_guild_per_minute / 60, tickets_config.throttle_guild_burst,
+            tickets_config.max_concurrent_creations)
+
 class TicketSystem(commands.Cog):
     """
     This is the main class for ticket-related commands.
     """
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.config = self.load_config()
         self.log_file = f"logs/log_{time.strftime('%Y%m%d-%H%M%S')}.log"
+        tickets_config = self.config.tickets
+        self.provisioner = TicketProvisioner(pool_size=tickets_config.pool_size)
+        self.routers = {}
+        self.throttle = TicketThrottle(*throttle_limits(tickets_config))
+        self.tickets: ticket_store.TicketStore = None #type: ignore
+        self.scheduler: scheduler.Scheduler = None #type: ignore
+        self.archiver: transcripts.TranscriptArchiver = None #type: ignore
+        # Latest message time per ticket channel, written to the registry by flush_activity
+        self.activity = {}
+        self.tasks = set()
 
-    def load_config(self):
-        try:
-            with open('conf/config.yaml', 'r') as file:
-                config = yaml.safe_load(file)
-                if not isinstance(config, dict):
-                    logging.error("Config file is not a valid YAML dictionary.")
-                    return None
-                return config
-        except Exception as e:
-            logging.error(f"Failed to load config file: {e}")
-            return None
+    @property
+    def config(self) -> Config:
+        # Always the latest config, so the panel and every setting follow edits to the file
+        return settings()
+
+    async def apply_config(self, config: Config):
+        """
+        Applies new limits to the parts of the ticket system that hold on to them.
+        """
+        tickets_config = config.tickets
+        self.throttle.configure(*throttle_limits(tickets_config))
+        self.provisioner.pool_size = tickets_config.pool_size
+        self.archiver.log_channel_id = tickets_config.log_channel_id
+        self.archiver.log_message = tickets_config.ticket_close_log
+        self.archiver.reason = tickets_config.ticket_close_log_reason
+        self.archiver.html = tickets_config.transcript_html
+        for router in self.routers.values():
+            router.queue.priorities = dict(tickets_config.type_priority)
+        if tickets_config.auto_close_hours:
+            await self.schedule_auto_close()
 
     async def cog_load(self):
-        self.bot.add_view(TicketView(self.config))
+        db = await storage.get_database(storage.TICKETS_DB)
+        await migrate(db, ticket_store.MIGRATIONS)
+        self.tickets = ticket_store.TicketStore(db)
+        scheduler_db = await storage.get_database(storage.SCHEDULER_DB)
+        await migrate(scheduler_db, scheduler.MIGRATIONS)
+        self.scheduler = scheduler.Scheduler(self.bot, scheduler_db)
+        self.scheduler.register(CLAIM_JOB, self.finish_claim)
+        self.scheduler.register(INACTIVE_JOB, self.check_inactive)
+        tickets_config = self.config.tickets
+        self.archiver = transcripts.TranscriptArchiver(
+            self.bot, self.tickets, self.scheduler, tickets_config.log_channel_id,
+            log_message=tickets_config.ticket_close_log, reason=tickets_config.ticket_close_log_reason,
+            html=tickets_config.transcript_html)
+        await self.scheduler.start()
+        self.archiver.start()
+        await self.rebuild_routers()
+        self.spawn(self.track_staff())
+        self.spawn(self.reconcile())
+        self.bot.add_view(TicketView())
         self.bot.add_view(CloseandClaim())
+        self.spawn(self.warm_pool())
+        if tickets_config.auto_close_hours:
+            await self.schedule_auto_close()
+        self.flush_activity.start()
+        get_config().subscribe(self.apply_config)
+
+    async def cog_unload(self):
+        get_config().unsubscribe(self.apply_config)
+        # Startup work still waiting for ready must not outlive the provisioner and stores closed below
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.flush_activity.cancel()
+        await self.flush_activity()
+        await self.provisioner.close()
+        await self.archiver.stop()
+        await self.scheduler.stop()
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def rebuild_routers(self):
+        """
+        Restores every guild's staff loads and unclaimed queue from the registry, e.g. after a restart.
+        """
+        loads, unclaimed = {}, {}
+        for guild_id, staff_id, count in await self.tickets.claimer_loads():
+            loads.setdefault(guild_id, []).append((staff_id, count))
+        for guild_id, *ticket in await self.tickets.unclaimed():
+            unclaimed.setdefault(guild_id, []).append(ticket)
+        self.routers = {}
+        for guild_id in loads.keys() | unclaimed.keys():
+            self.router(guild_id).rebuild(loads.get(guild_id, []), unclaimed.get(guild_id, []))
+
+    def router(self, guild_id: int) -> TicketRouter:
+        router = self.routers.get(guild_id)
+        if router is None:
+            router = self.routers[guild_id] = TicketRouter(self.config.tickets.type_priority)
+        return router
+
+    async def track_staff(self):
+        """
+        Marks support role members who are online or idle as available for new tickets.
+        """
+        await self.bot.wait_until_ready()
+        role_id = self.config.tickets.unifiedSupportRole
+        for guild in self.bot.guilds:
+            role = guild.get_role(role_id) if role_id else None
+            if role is not None:
+                for member in role.members:
+                    self.router(guild.id).staff.set_available(member.id, is_available(member))
+
+    def update_staff(self, member: discord.Member):
+        role_id = self.config.tickets.unifiedSupportRole
+        if role_id:
+            available = member.get_role(role_id) is not None and is_available(member)
+            self.router(member.guild.id).staff.set_available(member.id, available)
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before: discord.Member, after: discord.Member):
+        if before.status != after.status:
+            self.update_staff(after)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles:
+            self.update_staff(after)
+
+    async def close_ticket(self, channel_id: int):
+        ticket = await self.tickets.get_by_channel(channel_id)
+        if await self.tickets.close(channel_id) and ticket is not None:
+            self.router(ticket.guild_id).closed(channel_id, ticket.claimer_id)
+
+    async def forget_channel(self, channel_id: int):
+        """
+        Closes the ticket of a channel that no longer exists, along with its pending jobs.
+        """
+        ticket = await self.tickets.get_by_channel(channel_id)
+        if ticket is None or ticket.status != 'open':
+            return
+        await self.close_ticket(channel_id)
+        for kind in (INACTIVE_JOB, CLAIM_JOB):
+            if (kind, channel_id) in self.scheduler:
+                await self.scheduler.cancel(kind, channel_id)
+
+    async def reconcile(self):
+        """
+        Brings the registry back in line with Discord after downtime: reservations whose
+        channel was never created are dropped and tickets whose channel was deleted while
+        the bot was offline are closed, so neither counts against the member's open limit.
+        """
+        # Reservations this old can't belong to a ticket that is still being created
+        discarded = await self.tickets.discard_stale(time.time() - 300)
+        await self.bot.wait_until_ready()
+        closed = 0
+        for guild_id, channel_id in await self.tickets.open_by_guild():
+            guild = self.bot.get_guild(guild_id)
+            # An unavailable guild is an outage, not proof the channel is gone
+            if guild is None or guild.unavailable or guild.get_channel(channel_id) is not None:
+                continue
+            await self.forget_channel(channel_id)
+            closed += 1
+        if discarded or closed:
+            logging.info(f"Ticket registry reconciled: {discarded} stale reservation(s) dropped, {closed} ticket(s) without a channel closed")
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        # Covers channels deleted by hand; the bot's own deletes find the ticket already closed
+        await self.forget_channel(channel.id)
+
+    @commands.hybrid_command(name='queue')
+    @commands.has_permissions(manage_channels=True)
+    async def queue(self, ctx: commands.Context):
+        """
+        Shows the unclaimed tickets in priority order and how many open tickets each staff member has.
+        """
+        router = self.router(ctx.guild.id) #type: ignore
+        embed = discord.Embed(title="Ticket Queue", color=self.config.CLR)
+        waiting = [f"{i}. **{ticket.ticket_type}** <#{ticket.channel_id}> · <@{ticket.owner_id}> <t:{ticket.created_at}:R>"
+                   for i, ticket in enumerate(router.queue.first(10), start=1)]
+        embed.add_field(name=f"Unclaimed ({len(router.queue)})", value="\n".join(waiting) or "Nothing waiting.", inline=False)
+        loads = [f"<@{staff_id}>: {load}{'' if staff_id in router.staff.available else ' (away)'}"
+                 for load, staff_id in router.staff.busiest(10)]
+        embed.add_field(name=f"Staff Load ({len(router.staff.available)} available)", value="\n".join(loads) or "No open claimed tickets.", inline=False)
+        await ctx.send(embed=embed)
+
+    async def schedule_auto_close(self):
+        """
+        Gives open tickets from before auto-close was enabled their inactivity job.
+        """
+        for channel_id, last_activity in await self.tickets.open_channels():
+            if (INACTIVE_JOB, channel_id) not in self.scheduler:
+                await self.scheduler.schedule(INACTIVE_JOB, channel_id, last_activity + self.config.tickets.auto_close_hours * 3600)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        # A dict write per message; the inactivity job reads it when it comes due
+        if not message.author.bot and (INACTIVE_JOB, message.channel.id) in self.scheduler:
+            self.activity[message.channel.id] = int(message.created_at.timestamp())
+
+    @tasks.loop(minutes=5)
+    async def flush_activity(self):
+        """
+        Persists recent ticket activity, so auto-close timing survives a restart.
+        """
+        if self.activity:
+            activity, self.activity = self.activity, {}
+            await self.tickets.touch_many(activity)
+
+    async def check_inactive(self, channel_id: int, payload=None):
+        """
+        Scheduler handler: closes the ticket if nobody wrote in it for auto_close_hours, otherwise
+        moves the job to that many hours after the last message.
+        """
+        auto_close_hours = self.config.tickets.auto_close_hours
+        if not auto_close_hours:
+            return
+        ticket = await self.tickets.get_by_channel(channel_id)
+        if ticket is None or ticket.status != 'open':
+            return
+        last_activity = max(self.activity.get(channel_id, 0), await self.tickets.last_activity(channel_id) or 0)
+        due_at = last_activity + auto_close_hours * 3600
+        if due_at > time.time():
+            await self.scheduler.schedule(INACTIVE_JOB, channel_id, due_at)
+            return
+
+        await self.close_ticket(channel_id)
+        channel = self.bot.get_channel(channel_id)
+        if isinstance(channel, discord.TextChannel):
+            await channel.send(f"This ticket was closed after {auto_close_hours:g} hours without messages.")
+            await self.archiver.archive(channel, self.bot.user.id, delay=10) #type: ignore
+
+    async def finish_claim(self, channel_id: int, payload):
+        """
+        Scheduler handler: hides a claimed ticket from everyone but the claimer.
+        """
+        channel = self.bot.get_channel(channel_id)
+        if not isinstance(channel, discord.TextChannel):
+            return
+        await channel.set_permissions(channel.guild.default_role, view_channel=False)
+        member = channel.guild.get_member(payload['claimer_id'])
+        if member is None:
+            try:
+                member = await channel.guild.fetch_member(payload['claimer_id'])
+            except discord.NotFound:
+                return
+        await channel.set_permissions(member, view_channel=True, send_messages=True)
+
+    async def warm_pool(self):
+        """
+        Pre-creates hidden ticket channels once the bot is ready, if a pool is configured.
+        """
+        if not self.provisioner.pool_size or not self.config.tickets.category_id:
+            return
+        await self.bot.wait_until_ready()
+        category = self.bot.get_channel(self.config.tickets.category_id)
+        if isinstance(category, discord.CategoryChannel):
+            try:
+                await self.provisioner.warm(category)
+            except Exception as e:
+                logging.error(f"Failed to pre-create ticket channels: {e}")
 
     @commands.hybrid_command(aliases=['tick', 'ticket', 'support'])
     @commands.has_permissions(administrator=True)
@@ -48,13 +302,58 @@ class TicketSystem(commands.Cog):
         Sends the ticker menu panel
         """
         try:
-            await ctx.send(content="Please select a ticket type", view=TicketView(self.config))
+            await ctx.send(content="Please select a ticket type", view=TicketView())
         except Exception as e:
             logging.error(f"Failed to open ticket: {e}")
 
+    def render_tickets(self, title: str):
+        def render(tickets, start):
+            embed = discord.Embed(title=title, color=self.config.CLR)
+            for i, ticket in enumerate(tickets, start=start):
+                channel = f"<#{ticket.channel_id}>" if ticket.channel_id else "being created"
+                embed.add_field(name=f"{i}. {ticket.ticket_type}",
+                                value=f"{channel} · opened by <@{ticket.owner_id}> <t:{ticket.created_at}:R>", inline=False)
+            return embed
+        return render
+
+    @commands.hybrid_command(name='my_tickets')
+    @commands.has_permissions(manage_channels=True)
+    async def my_tickets(self, ctx: commands.Context):
+        """
+        Lists the open tickets you have claimed, oldest first.
+        """
+        async def fetch(cursor, forward, limit):
+            if forward:
+                return await self.tickets.claimed_page(ctx.guild.id, ctx.author.id, after=cursor, limit=limit) #type: ignore
+            return await self.tickets.claimed_page(ctx.guild.id, ctx.author.id, before=cursor, limit=limit) #type: ignore
+
+        first_page = await fetch(None, True, self.tickets.page_size + 1)
+        if not first_page:
+            return await ctx.send("You have no open claimed tickets.")
+        paginator = KeysetPaginator(ctx.author.id, fetch, lambda ticket: (ticket.created_at, ticket.id),
+                                    self.render_tickets("Your Open Tickets"), page_size=self.tickets.page_size)
+        await paginator.send(ctx, first_page=first_page)
+
+    @commands.hybrid_command(name='unclaimed_tickets')
+    @commands.has_permissions(manage_channels=True)
+    async def unclaimed_tickets(self, ctx: commands.Context):
+        """
+        Lists open tickets nobody has claimed yet, oldest first.
+        """
+        async def fetch(cursor, forward, limit):
+            if forward:
+                return await self.tickets.unclaimed_page(ctx.guild.id, after=cursor, limit=limit) #type: ignore
+            return await self.tickets.unclaimed_page(ctx.guild.id, before=cursor, limit=limit) #type: ignore
+
+        first_page = await fetch(None, True, self.tickets.page_size + 1)
+        if not first_page:
+            return await ctx.send("There are no unclaimed tickets.")
+        paginator = KeysetPaginator(ctx.author.id, fetch, lambda ticket: (ticket.created_at, ticket.id),
+                                    self.render_tickets("Unclaimed Tickets"), page_size=self.tickets.page_size)
+        await paginator.send(ctx, first_page=first_page)
+
 class Ticket(discord.ui.Select):
-    def __init__(self, config):
-        self.config = config
+    def __init__(self):
         options = [
             discord.SelectOption(label="Order", description="Order issue", value="Order"),
             discord.SelectOption(label="Issue", description="General issue", value="Issue"),
@@ -66,56 +365,106 @@ class Ticket(discord.ui.Select):
 
     async def callback(self, interaction: discord.Interaction):
         try:
-            if self.config is None:
-                logging.error("Configuration is not loaded.")
-                await interaction.response.send_message("Configuration error. Please contact an administrator.", ephemeral=True)
-                return
-            
+            tickets_config = settings().tickets
             if interaction.guild is None:
                 logging.error("Guild not found.")
                 await interaction.response.send_message("This command cannot be used in direct messages.", ephemeral=True)
                 return
 
-            categ = discord.utils.get(interaction.guild.categories, id=self.config['tickets']['category_id'])
+            categ = discord.utils.get(interaction.guild.categories, id=tickets_config.category_id)
             if not categ:
                 logging.error("Category not found.")
                 await interaction.response.send_message("There was an error creating your ticket. Please try again later.", ephemeral=True)
                 return
 
-            await interaction.response.send_message("Creating a ticket for you, this may take a while!", ephemeral=True)
-            ticket_channel_name = self.config['tickets']['ticket_name'].format(user=interaction.user.name)
-            ticket_channel = await categ.create_text_channel(name=ticket_channel_name)
-
-            role_id = self.config['tickets']['unifiedSupportRole']
+            role_id = tickets_config.unifiedSupportRole
             if not role_id:
                 logging.error("Unified Role ID not found.")
-                await interaction.followup.send("There was an error creating your ticket. Please try again later.", ephemeral=True)
+                await interaction.response.send_message("There was an error creating your ticket. Please try again later.", ephemeral=True)
                 return
 
             role = interaction.guild.get_role(role_id)
             if not role:
                 logging.error("Role not found.")
-                await interaction.followup.send("There was an error creating your ticket. Please try again later.", ephemeral=True)
+                await interaction.response.send_message("There was an error creating your ticket. Please try again later.", ephemeral=True)
                 return
 
-            if isinstance(interaction.user, discord.Member):
-                await ticket_channel.set_permissions(interaction.guild.default_role, view_channel=False)
-                await ticket_channel.set_permissions(interaction.user, view_channel=True, send_messages=True)
-            await ticket_channel.set_permissions(role, view_channel=True, send_messages=True)
+            tickets = interaction.client.get_cog('TicketSystem')
+            if tickets is None:
+                await interaction.response.send_message("Tickets are unavailable right now.", ephemeral=True)
+                return
 
-            view = CloseandClaim()
-            await ticket_channel.send(f"{interaction.user.mention} | <@&{role_id}>")
+            # Spam and raids are turned away before anything touches the database or the API
+            limited = tickets.throttle.check(interaction.guild.id, interaction.user.id) #type: ignore
+            if limited is not None:
+                retry_at = int(time.time() + tickets.throttle.retry_after(interaction.guild.id, interaction.user.id)) + 1 #type: ignore
+                reason = "You are opening tickets too quickly." if limited == "user" else "Lots of tickets are being opened right now."
+                await interaction.response.send_message(f"{reason} Please try again <t:{retry_at}:R>.", ephemeral=True)
+                return
+
+            # Checked and recorded before any channel is created
+            max_open = tickets_config.max_open_per_user
+            ticket_id = await tickets.tickets.reserve(interaction.guild.id, interaction.user.id, self.values[0], max_open) #type: ignore
+            if ticket_id is None:
+                await interaction.response.send_message(
+                    f"You already have {max_open} open ticket(s). Please use those or wait until they are closed.", ephemeral=True)
+                return
+
+            # Everything up to the ready message is undone on failure, so the reservation never outlives it
+            staff_id = ticket_channel = None
+            queued = False
+            try:
+                await interaction.response.defer(ephemeral=True, thinking=True)
+                ticket_channel_name = tickets_config.ticket_name.format(user=interaction.user.name)
+                ticket_topic = tickets_config.ticket_topic.format(user=interaction.user) or None
+                ticket_message = tickets_config.ticket_message.format(user=interaction.user.mention)
+                embed = discord.Embed(title=f"{interaction.guild.name} Ticker", description=ticket_message)
 
-            ticket_message = self.config['tickets']['ticket_message'].format(user=interaction.user.mention)
-            embed = discord.Embed(title=f"{interaction.guild.name} Ticker", description=ticket_message)
-            await ticket_channel.send(embed=embed, view=view)
+                # Routed to the least-loaded available staff member, or left in the unclaimed queue for the role
+                router = tickets.router(interaction.guild.id) #type: ignore
+                staff_id = router.assign() if tickets_config.auto_assign else None
+                mention = f"<@{staff_id}>" if staff_id else f"<@&{role_id}>"
+
+                async def on_queued(position: int):
+                    await interaction.edit_original_response(content=f"You are #{position} in the queue, your ticket will open shortly.")
+
+                # One request for the channel with its permissions, one for the header and embed
+                async with tickets.throttle.in_flight.slot(on_queued): #type: ignore
+                    ticket_channel = await tickets.provisioner.provision( #type: ignore
+                        categ, interaction.user, role, ticket_channel_name, topic=ticket_topic,
+                        content=f"{interaction.user.mention} | {mention}", embed=embed, view=CloseandClaim())
+                await tickets.tickets.attach_channel(ticket_id, ticket_channel.id) #type: ignore
+                if staff_id:
+                    await tickets.tickets.claim(ticket_channel.id, staff_id) #type: ignore
+                else:
+                    router.queue.push(ticket_id, ticket_channel.id, interaction.user.id, self.values[0], int(time.time()))
+                    queued = True
+                if tickets_config.auto_close_hours:
+                    await tickets.scheduler.schedule(INACTIVE_JOB, ticket_channel.id, time.time() + tickets_config.auto_close_hours * 3600) #type: ignore
+            except Exception:
+                if staff_id:
+                    router.staff.add(staff_id, -1)
+                if queued:
+                    router.queue.remove(ticket_channel.id) #type: ignore
+                await tickets.tickets.discard(ticket_id) #type: ignore
+                if ticket_channel is not None:
+                    try:
+                        await ticket_channel.delete(reason="Ticket creation failed")
+                    except discord.HTTPException as e:
+                        logging.error(f"Failed to delete the channel of a failed ticket: {e}")
+                try:
+                    await interaction.followup.send("There was an error creating your ticket. Please try again later.", ephemeral=True)
+                except discord.HTTPException:
+                    pass
+                raise
+            await interaction.followup.send(f"Your ticket is ready: {ticket_channel.mention}", ephemeral=True)
         except Exception as e:
             logging.error(f"Failed to create ticket: {e}")
 
 class TicketView(discord.ui.View):
-    def __init__(self, config):
+    def __init__(self):
         super().__init__(timeout=None)
-        self.add_item(Ticket(config))
+        self.add_item(Ticket())
 
 class CloseandClaim(discord.ui.View):
     def __init__(self):
@@ -126,11 +475,17 @@ class CloseandClaim(discord.ui.View):
     async def tick_close(self, interaction: discord.Interaction, button: discord.ui.Button):
         try:
             if interaction.user.guild_permissions.manage_channels: #type: ignore
-                await interaction.response.send_message('Deleting the channel in 10 seconds!', ephemeral=True)
-                await asyncio.sleep(10)
-                if isinstance(interaction.channel, discord.abc.GuildChannel):
-                    await interaction.channel.delete()
-                    self.value = True
+                tickets = interaction.client.get_cog('TicketSystem')
+                if tickets is None or not isinstance(interaction.channel, discord.TextChannel):
+                    await interaction.response.send_message('Tickets are unavailable right now.', ephemeral=True)
+                    return
+                # The transcript is saved in the background; the channel goes once it is, 10 seconds at the earliest
+                await interaction.response.send_message('Saving the transcript and deleting the channel in 10 seconds!', ephemeral=True)
+                await tickets.close_ticket(interaction.channel.id) #type: ignore
+                await tickets.scheduler.cancel(INACTIVE_JOB, interaction.channel.id) #type: ignore
+                if not await tickets.archiver.archive(interaction.channel, interaction.user.id, delay=10): #type: ignore
+                    await interaction.followup.send('This ticket is already being closed.', ephemeral=True)
+                self.value = True
             else:
                 await interaction.response.send_message('You are missing permissions to delete the channel!', ephemeral=True)
         except Exception as e:
@@ -140,18 +495,25 @@ class CloseandClaim(discord.ui.View):
     async def claim_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
         try:
             # Check if the user has the manage_channels permission
-            if interaction.user.guild_permissions.manage_channels:
+            if interaction.user.guild_permissions.manage_channels: #type: ignore
+                tickets = interaction.client.get_cog('TicketSystem')
+                if tickets is None or interaction.channel_id is None:
+                    await interaction.response.send_message('Tickets are unavailable right now.', ephemeral=True)
+                    return
+                claimed, ticket = await tickets.tickets.claim(interaction.channel_id, interaction.user.id) #type: ignore
+                if claimed:
+                    tickets.router(ticket.guild_id).claimed(ticket.channel_id, interaction.user.id) #type: ignore
+                if ticket is not None and not claimed and ticket.claimer_id != interaction.user.id:
+                    if ticket.claimer_id is not None:
+                        await interaction.response.send_message(f'This ticket was already claimed by <@{ticket.claimer_id}>.', ephemeral=True)
+                    else:
+                        await interaction.response.send_message('This ticket is closed.', ephemeral=True)
+                    return
                 await interaction.response.send_message('Claiming the ticket!', ephemeral=True)
-                await asyncio.sleep(10)
-                # Ensure the interaction.channel is a GuildChannel and interaction.guild is not None
-                if isinstance(interaction.channel, discord.abc.GuildChannel) and interaction.guild:
-                    # Use @everyone role directly from the guild's roles
-                    everyone_role = interaction.guild.default_role
-                    await interaction.channel.set_permissions(everyone_role, view_channel=False)
-                    # Ensure interaction.user is a Member instance before setting permissions
-                    if isinstance(interaction.user, discord.Member):
-                        await interaction.channel.set_permissions(interaction.user, view_channel=True, send_messages=True)
-                        self.value = True
+                # Permissions change in 10 seconds, even if the bot restarts in between
+                await tickets.scheduler.schedule(CLAIM_JOB, interaction.channel_id, time.time() + 10, #type: ignore
+                                                 {'claimer_id': interaction.user.id})
+                self.value = True
             else:
                 await interaction.response.send_message('You are missing permissions to claim the ticket!', ephemeral=True)
         except Exception as e:
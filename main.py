@@ -1,6 +1,6 @@
 # Description: Main file for the bot
-import psutil
-import yaml
+import time
+BOOT = time.perf_counter()  # Taken before the heavy imports, so the startup report includes them
 import discord
 from discord.ext import commands 
 import os 
@@ -8,18 +8,25 @@ import logging
 from pretty_help import PrettyHelp
 import asyncio
 import random
-import subprocess
 import sys
 from datetime import datetime, timezone
 import platform
+from utils import storage
+from utils.config import get_config, settings
+from utils.lazy import LazyCommandTree, LazyExtensions
+from utils.reloader import HotReloader
+from utils.startup import StartupReport, clear_bytecode, cog_extensions, load_extensions, run_command, sync_commands
 
-with open('conf/config.yaml', 'r') as file:
-    config = yaml.safe_load(file)
+startup = StartupReport(BOOT)
+startup.record("imports", time.perf_counter() - BOOT)
 
-CLR = config['CLR']
-PREFIX = config['creds']['prefix']
-OWNER_IDS = config['creds']['owner_ids']
-TOKEN = config['creds']['token']
+# Parsed and validated once; cogs share it through utils.config and see edits without a restart
+with startup.stage("config"):
+    config = get_config().current
+
+CLR = config.CLR
+OWNER_IDS = config.creds.owner_ids
+TOKEN = config.creds.token
 
 # Set up logging
 log_file = f"./logs/{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}.log"
@@ -36,14 +43,19 @@ logger.addHandler(console)
 
 # Set up the bot
 
+def get_prefix(bot, message):
+    # Read on every message, so a prefix change in the config applies straight away
+    return commands.when_mentioned_or(settings().creds.prefix)(bot, message)
+
 class Bot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.all()
         self.launch_time = datetime.now(timezone.utc)  # Moved launch_time initialization here
         super().__init__(
             case_sensitive=True,
-            command_prefix=commands.when_mentioned_or(PREFIX),
+            command_prefix=get_prefix,
             intents=intents,
+            tree_cls=LazyCommandTree,
             owner_ids=OWNER_IDS,
             auto_sync_commands=True,
             help_command=PrettyHelp(case_insensitive=True,
@@ -52,41 +64,83 @@ class Bot(commands.Bot):
                                     thumbnail_url='https://media.discordapp.net/attachments/1247526752465453057/1259386212041625732/goshikbennor.jpg?ex=668b7e4f&is=668a2ccf&hm=4760ded6b122553aa00ffed52c17055738df8be3d3ab95b4bee6968d618ea756&=',
                                     color=CLR))
         
-        self.startup_time = 0  # Moved startup_time initialization here
+        self.startup = startup
+        self.lazy = LazyExtensions(self) if config.lazy_cogs else None
+        self.reloader = HotReloader(self)
+
+    async def setup_hook(self):
+        """
+        Runs once, after login and before the gateway connects (``on_ready`` fires again on
+        every reconnect). Independent stages run concurrently and each one is timed.
+        """
+        get_config().start()
+        try:
+            with startup.stage("databases"):
+                await asyncio.gather(*(storage.get_database(path) for path in storage.ALL_DATABASES))
+        except Exception as e:
+            # Each cog opens its own databases again and reports its own failure
+            logger.error(f"Failed to open the databases: {e}")
+
+        logger.info(f"-----------------------------------------------------------------------------")
+        logger.info(f"| ✨ | Now loading cogs | ✨ |")
+        logger.info(f"-----------------------------------------------------------------------------")
+        # The sources about to be imported, for reload_changed to compare against
+        self.reloader.snapshot()
+        extensions = ['jishaku', *cog_extensions()]
+        pending = []
+        if self.lazy is not None:
+            # Stubs for cogs the manifest still matches; everything else loads now and refreshes it
+            start = time.perf_counter()
+            extensions, deferred = self.lazy.plan(extensions)
+            self.lazy.install(deferred)
+            self.tree.lazy = self.lazy #type: ignore
+            startup.record("lazy manifest", time.perf_counter() - start, detail=f"stubs for {', '.join(deferred) or 'nothing'}")
+        loaded = await load_extensions(self, extensions, startup)
+        if self.lazy is not None:
+            self.lazy.refresh(loaded)
+            pending = self.lazy.app_payloads()
+
+        start = time.perf_counter()
+        try:
+            result = await sync_commands(self, pending)
+            startup.record("command sync", time.perf_counter() - start, detail=result)
+        except Exception as e:
+            startup.record("command sync", time.perf_counter() - start, False, str(e))
+            logger.error(f"Failed to sync application commands: {e}")
+        startup.finish()
+        self.loop.create_task(after_ready())
 
 bot = Bot()
 
-@bot.event
-async def on_ready():
-    bot.loop.create_task(update_presence())
-    subprocess.run(["git", "pull"])
-    link = await bot.guilds[0].text_channels[0].create_invite(max_age=0, max_uses=0, unique=True)
+async def after_ready():
+    """
+    The once-per-process work that needs the gateway, kept off the startup path.
+    """
+    await bot.wait_until_ready()
+    startup.record("gateway ready", time.perf_counter() - startup.finished) #type: ignore
     logger.info(f"-----------------------------------------------------------------------------")
-    print(f"{link}")
-    # Fixed the issue with bot.user being None by moving the log inside on_ready
     logger.info(f"Logged in as {bot.user.name} | {bot.user.id}") #type: ignore
+    logger.info(f"Startup report:\n" + "\n".join(startup.lines()))
     logger.info(f"-----------------------------------------------------------------------------")
-    await bot.load_extension(f'jishaku')
+    bot.loop.create_task(update_presence())
+    try:
+        link = await bot.guilds[0].text_channels[0].create_invite(max_age=0, max_uses=0, unique=True)
+        print(f"{link}")
+    except (IndexError, discord.HTTPException) as e:
+        logger.error(f"Could not create an invite: {e}")
 
-    logger.info(f"-----------------------------------------------------------------------------")
-    logger.info(f"| ✨ | Now loading cogs | ✨ |")
-    logger.info(f"-----------------------------------------------------------------------------")   
-    for file in os.listdir('cogs'):
-        if file.endswith('.py'):
-            try:
-                await bot.load_extension(f'cogs.{file[:-3]}')
-                logger.info(f"| ✅ | Loaded cog: {file}")
-            except Exception as e:
-                logger.error(f"| ❌ | Error loading cog: {file}")
-                logger.error(f"{e}")
-
-    subprocess.call('find . -name "*.pyc" -delete', shell=True)
-    subprocess.call('find . -name "__pycache__" -delete', shell=True)
+    # Fetched for the next restart, so it never holds up this one
+    code, output = await run_command("git", "pull")
+    logger.info(f"git pull exited with {code}: {output}")
+    await clear_bytecode()
 
 async def update_presence():
+    # Imported here so lazy mode keeps it out of startup
+    import psutil
     # get system stats
     memory_usage = psutil.virtual_memory().percent
-    cpu_usage = psutil.cpu_percent(interval=1)
+    # Samples for a second, so it runs in a thread instead of blocking the event loop
+    cpu_usage = await asyncio.to_thread(psutil.cpu_percent, interval=1)
     machine = platform.machine()
     python_version = platform.python_version()
     discord_version = discord.__version__
@@ -102,6 +156,18 @@ async def update_presence():
                                                         )
     await asyncio.sleep(5) # change every 5 seconds
 
+async def teardown():
+    """
+    Unloads every extension (stopping their background tasks) and closes the databases.
+    """
+    for extension in list(bot.extensions):
+        try:
+            await bot.unload_extension(extension)
+        except Exception as e:
+            logger.error(f"Error unloading {extension}: {e}")
+    await get_config().stop()
+    await storage.close_all()
+
 @bot.hybrid_command(name='ping', aliases=['pong', 'latency'])
 async def ping(ctx):
     """
@@ -120,8 +186,7 @@ async def shutdown(ctx):
     Shutdown the bot
     """
     # Clear pycache
-    subprocess.call('find . -name "*.pyc" -delete', shell=True)
-    subprocess.call('find . -name "__pycache__" -delete', shell=True)
+    await clear_bytecode()
     
     # Read log file
     with open(log_file, 'r') as file:
@@ -136,6 +201,9 @@ async def shutdown(ctx):
     # Send the embed
     await ctx.send(embed=embed)
     
+    # Stop the cogs' background workers and flush queued database writes before exiting
+    await teardown()
+
     # Shutdown the bot
     await bot.close()
     sys.exit()
@@ -147,8 +215,7 @@ async def restart(ctx):
     Restart the bot
     """
     # Clear pycache
-    subprocess.call('find . -name "*.pyc" -delete', shell=True)
-    subprocess.call('find . -name "__pycache__" -delete', shell=True)
+    await clear_bytecode()
     
     # Read log file
     with open(log_file, 'r') as file:
@@ -163,12 +230,53 @@ async def restart(ctx):
     # Send the embed
     await ctx.send(embed=embed)
     
+    # Stop the cogs' background workers and flush queued database writes before exiting
+    await teardown()
+
     # Restart the bot
     os.execv(sys.executable, ['python'] + sys.argv)
 
+@bot.hybrid_command(name='startup', aliases=['boot'])
+@commands.is_owner()
+async def startup_report(ctx):
+    """
+    Show how long each startup stage took
+    """
+    embed = discord.Embed(title="Startup report", description="```\n" + "\n".join(startup.lines()) + "\n```", color=CLR)
+    if bot.lazy is not None:
+        loads = [f"{name}: {seconds * 1000:.1f}ms" for name, seconds in bot.lazy.load_times.items()]
+        embed.add_field(name="Loaded on first use", value="\n".join(loads) or "Nothing yet", inline=False)
+    await ctx.send(embed=embed)
+
+@bot.hybrid_command(name='reload_changed', aliases=['hotreload'])
+@commands.has_permissions(administrator=True)
+async def reload_changed(ctx):
+    """
+    Reload only the cogs whose source changed, keeping the bot connected
+    """
+    start = time.perf_counter()
+    results = await bot.reloader.reload_changed()
+    lines = [f"{'❌' if result.error else '✅'} {result.action} {result.extension} in {result.seconds * 1000:.1f}ms"
+             + (f": {result.error}" if result.error else "") for result in results]
+    embed = discord.Embed(title="Reload", description="\n".join(lines) or "No cog changed.", color=CLR)
+    if any(not result.error for result in results):
+        # Only syncs when a reloaded cog changed its slash commands
+        pending = bot.lazy.app_payloads() if bot.lazy is not None else []
+        try:
+            embed.add_field(name="Slash commands", value=await sync_commands(bot, pending), inline=False)
+        except Exception as e:
+            embed.add_field(name="Slash commands", value=f"Sync failed: {e}", inline=False)
+    shared = bot.reloader.changed_shared()
+    if shared:
+        embed.add_field(name="Needs a restart", value=", ".join(shared), inline=False)
+    embed.set_footer(text=f"Took {(time.perf_counter() - start) * 1000:.1f}ms")
+    await ctx.send(embed=embed)
+
 @bot.hybrid_command(name='sync')
 async def sync(ctx):
-    await ctx.bot.tree.sync()
+    # Keeps the slash commands of lazy cogs that haven't loaded yet
+    pending = bot.lazy.app_payloads() if bot.lazy is not None else []
+    await sync_commands(bot, pending, force=True)
     await ctx.send("Commands synced.")
 
 bot.run(TOKEN)
@@ -0,0 +1 @@
+# Description: Shared helpers used by the bot and its cogs
@@ -0,0 +1,132 @@
+# Description: Constant-memory raid detection from member joins and message bursts
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+
+class SlidingWindowCounter:
+    """
+    Counts events over the last ``window`` seconds using a ring of ``buckets`` slots.
+
+    Memory is fixed by the bucket count and each update is O(1) amortised: a slot is
+    only cleared when time moves past it.
+    """
+    __slots__ = ("window", "buckets", "width", "counts", "total", "head")
+
+    def __init__(self, window: float, buckets: int = 30):
+        self.window = window
+        self.buckets = buckets
+        self.width = window / buckets
+        self.counts = [0] * buckets
+        self.total = 0
+        self.head = 0  # absolute index of the newest slot
+
+    def _advance(self, now: float):
+        tick = int(now / self.width)
+        if tick <= self.head:
+            return
+        if tick - self.head >= self.buckets:
+            self.counts = [0] * self.buckets
+            self.total = 0
+        else:
+            for index in range(self.head + 1, tick + 1):
+                slot = index % self.buckets
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+        self.head = tick
+
+    def add(self, now: float, amount: int = 1) -> int:
+        self._advance(now)
+        self.counts[self.head % self.buckets] += amount
+        self.total += amount
+        return self.total
+
+    def count(self, now: float) -> int:
+        self._advance(now)
+        return self.total
+
+
+class Thresholds(NamedTuple):
+    window: float = 60.0
+    max_joins: int = 15
+    young_account_age: float = 7 * 86400
+    max_young_joins: int = 8
+    max_messages: int = 120
+    cooldown: float = 900.0
+    recent_joiners: int = 200
+
+
+class Trigger(NamedTuple):
+    guild_id: int
+    kind: str  # "joins", "messages" or "manual"
+    reason: str
+    joiners: List[int]
+
+
+class GuildRaidState:
+    __slots__ = ("joins", "young_joins", "messages", "recent", "locked_until")
+
+    def __init__(self, thresholds: Thresholds):
+        self.joins = SlidingWindowCounter(thresholds.window)
+        self.young_joins = SlidingWindowCounter(thresholds.window)
+        self.messages = SlidingWindowCounter(thresholds.window)
+        # (joined_at, member_id, young) for the most recent joiners, oldest dropped first
+        self.recent: Deque[tuple] = deque(maxlen=thresholds.recent_joiners)
+        self.locked_until = 0.0
+
+
+class RaidDetector:
+    """
+    Tracks joins, young-account joins and message volume per guild and reports a
+    Trigger the first time a threshold trips, then stays quiet for ``cooldown`` seconds.
+    """
+    def __init__(self, thresholds: Thresholds = Thresholds()):
+        self.thresholds = thresholds
+        self.guilds: Dict[int, GuildRaidState] = {}
+
+    def state(self, guild_id: int) -> GuildRaidState:
+        state = self.guilds.get(guild_id)
+        if state is None:
+            state = self.guilds[guild_id] = GuildRaidState(self.thresholds)
+        return state
+
+    def record_join(self, guild_id: int, member_id: int, account_age: float, now: float) -> Optional[Trigger]:
+        limits = self.thresholds
+        state = self.state(guild_id)
+        young = account_age < limits.young_account_age
+        state.recent.append((now, member_id, young))
+        joins = state.joins.add(now)
+        young_joins = state.young_joins.add(now) if young else state.young_joins.count(now)
+
+        if now < state.locked_until:
+            return None
+        if joins > limits.max_joins:
+            return self._trip(guild_id, state, now, "joins", f"{joins} joins in {limits.window:.0f}s")
+        if young_joins > limits.max_young_joins:
+            return self._trip(guild_id, state, now, "joins", f"{young_joins} new accounts joined in {limits.window:.0f}s")
+        return None
+
+    def record_message(self, guild_id: int, now: float) -> Optional[Trigger]:
+        limits = self.thresholds
+        state = self.state(guild_id)
+        messages = state.messages.add(now)
+        if messages > limits.max_messages and now >= state.locked_until:
+            return self._trip(guild_id, state, now, "messages", f"{messages} messages in {limits.window:.0f}s")
+        return None
+
+    def _trip(self, guild_id: int, state: GuildRaidState, now: float, kind: str, reason: str) -> Trigger:
+        state.locked_until = now + self.thresholds.cooldown
+        cutoff = now - self.thresholds.window
+        joiners = [member_id for joined_at, member_id, young in state.recent if young and joined_at >= cutoff]
+        return Trigger(guild_id, kind, reason, joiners)
+
+    def trip(self, guild_id: int, now: float, reason: str) -> Trigger:
+        """
+        Starts a lockdown by hand, returning the same Trigger a detected raid would.
+        """
+        return self._trip(guild_id, self.state(guild_id), now, "manual", reason)
+
+    def release(self, guild_id: int):
+        """
+        Ends a guild's cooldown early, e.g. when staff lift the lockdown by hand.
+        """
+        self.state(guild_id).locked_until = 0.0
@@ -0,0 +1,222 @@
+# Description: Per-guild auto-moderation rules compiled into a single multi-pattern matcher
+import asyncio
+import logging
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from utils.migrations import Migration
+from utils.storage import Database
+
+MIGRATIONS = [
+    Migration(1, "automod settings and terms", """
+        CREATE TABLE automod_settings (
+            guild_id INTEGER PRIMARY KEY,
+            enabled INTEGER NOT NULL DEFAULT 0,
+            block_invites INTEGER NOT NULL DEFAULT 1,
+            max_mentions INTEGER NOT NULL DEFAULT 5,
+            caps_ratio REAL NOT NULL DEFAULT 0.7,
+            caps_min_length INTEGER NOT NULL DEFAULT 12
+        );
+        CREATE TABLE automod_terms (
+            guild_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (guild_id, kind, value)
+        );
+    """),
+]
+
+WORD = "word"
+PATTERN = "pattern"
+
+INVITE_PATTERN = r"(?:discord(?:app)?\.com/invite|discord\.gg|discord\.me)/[\w-]+"
+
+# \1 or (?(1)...) after an even number of backslashes: group numbers shift once patterns are combined
+_BACKREFERENCE = re.compile(r"(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?\(\d)")
+
+logger = logging.getLogger(__name__)
+
+
+class Settings(NamedTuple):
+    # Off until a guild's staff turn it on, the thresholds below apply from then
+    enabled: bool = False
+    block_invites: bool = True
+    max_mentions: int = 5
+    caps_ratio: float = 0.7
+    caps_min_length: int = 12
+
+
+class Violation(NamedTuple):
+    rule: str
+    detail: str
+
+
+def trie_regex(words: Iterable[str]) -> str:
+    """
+    Builds a regex matching any of ``words`` from a character trie.
+
+    A flat ``a|b|c`` alternation makes the regex engine try every word at every
+    position, so its cost grows with the list. Sharing prefixes means each position
+    follows at most one branch per character, keeping the cost flat as the list grows.
+    """
+    trie: dict = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for char in word.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        terminal = "" in node
+        branches, singles = [], []
+        for char in sorted(key for key in node if key):
+            rest = build(node[char])
+            if rest:
+                branches.append(re.escape(char) + rest)
+            else:
+                singles.append(re.escape(char))
+        if singles:
+            branches.append(singles[0] if len(singles) == 1 else "[" + "".join(singles) + "]")
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # The word may end here or continue into a longer word
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+def pattern_error(pattern: str) -> Optional[str]:
+    """
+    Why ``pattern`` can't be part of the combined matcher, or None if it can. Each pattern
+    is pasted in as ``(?:pattern)`` next to the others, so inline global flags, named
+    groups and numbered backreferences that work on their own break there.
+    """
+    try:
+        compiled = re.compile(f"(?:{pattern})", re.IGNORECASE)
+    except re.error as e:
+        if "global flags" in str(e):
+            return "inline flags like (?i) must be scoped, e.g. (?i:free nitro); matching already ignores case"
+        return str(e)
+    if compiled.groupindex:
+        return "named groups (?P<name>...) are not supported, use (?:...)"
+    if _BACKREFERENCE.search(pattern):
+        return "backreferences like \\1 are not supported"
+    return None
+
+
+class CompiledRules:
+    """
+    A guild's rules compiled into one regex, so each message is scanned exactly once.
+    """
+    def __init__(self, settings: Settings, words: List[str], patterns: List[str]):
+        self.settings = settings
+        groups = []
+        if settings.block_invites:
+            groups.append(f"(?P<invite>{INVITE_PATTERN})")
+        if words:
+            groups.append(rf"(?P<word>(?<!\w){trie_regex(words)}(?!\w))")
+        # Patterns saved before they were validated are skipped rather than breaking the guild
+        self.rejected = [pattern for pattern in patterns if pattern_error(pattern) is not None]
+        patterns = [pattern for pattern in patterns if pattern not in self.rejected]
+        if patterns:
+            groups.append("(?P<pattern>" + "|".join(f"(?:{pattern})" for pattern in patterns) + ")")
+        self.matcher = re.compile("|".join(groups), re.IGNORECASE) if groups else None
+
+    def evaluate(self, content: str, mentions: int = 0) -> Optional[Violation]:
+        settings = self.settings
+        if not settings.enabled:
+            return None
+
+        if settings.max_mentions and mentions > settings.max_mentions:
+            return Violation("mention spam", f"{mentions} mentions")
+
+        if self.matcher is not None:
+            match = self.matcher.search(content)
+            if match is not None:
+                rule = {"invite": "invite link", "word": "banned word", "pattern": "banned pattern"}[match.lastgroup] #type: ignore
+                return Violation(rule, match.group(0))
+
+        if settings.caps_ratio and len(content) >= settings.caps_min_length:
+            letters = [char for char in content if char.isalpha()]
+            if len(letters) >= settings.caps_min_length:
+                upper = sum(1 for char in letters if char.isupper())
+                if upper / len(letters) >= settings.caps_ratio:
+                    return Violation("excessive caps", f"{upper * 100 // len(letters)}% capital letters")
+
+        return None
+
+
+class AutoModStore:
+    """
+    Loads and edits per-guild rules, and caches each guild's compiled rules until they change.
+    """
+    def __init__(self, db: Database):
+        self.db = db
+        self._compiled: Dict[int, CompiledRules] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # Bumped by every rule change so a compile that raced one is not cached
+        self._version = 0
+
+    async def rules(self, guild_id: int) -> CompiledRules:
+        compiled = self._compiled.get(guild_id)
+        if compiled is not None:
+            return compiled
+        # One compile per guild even if a burst of messages arrives before it is cached
+        async with self._locks.setdefault(guild_id, asyncio.Lock()):
+            compiled = self._compiled.get(guild_id)
+            if compiled is None:
+                version = self._version
+                settings, words, patterns = await self.load(guild_id)
+                try:
+                    compiled = await asyncio.to_thread(CompiledRules, settings, words, patterns)
+                except re.error as e:
+                    logger.error(f"AutoMod patterns of guild {guild_id} don't compile together, ignoring them: {e}")
+                    compiled = await asyncio.to_thread(CompiledRules, settings, words, [])
+                if compiled.rejected:
+                    logger.warning(f"Skipping invalid AutoMod patterns of guild {guild_id}: {compiled.rejected}")
+                if version == self._version:
+                    self._compiled[guild_id] = compiled
+            return compiled
+
+    async def load(self, guild_id: int):
+        row = await self.db.fetchone(
+            "SELECT enabled, block_invites, max_mentions, caps_ratio, caps_min_length FROM automod_settings WHERE guild_id = ?",
+            (guild_id,))
+        settings = Settings(bool(row[0]), bool(row[1]), row[2], row[3], row[4]) if row else Settings()
+        terms = await self.db.fetchall("SELECT kind, value FROM automod_terms WHERE guild_id = ?", (guild_id,))
+        words = [value for kind, value in terms if kind == WORD]
+        patterns = [value for kind, value in terms if kind == PATTERN]
+        return settings, words, patterns
+
+    def invalidate(self, guild_id: int):
+        self._version += 1
+        self._compiled.pop(guild_id, None)
+
+    async def add_terms(self, guild_id: int, kind: str, values: Iterable[str]) -> int:
+        result = await self.db.executemany("INSERT OR IGNORE INTO automod_terms (guild_id, kind, value) VALUES (?, ?, ?)",
+                                           [(guild_id, kind, value) for value in values])
+        self.invalidate(guild_id)
+        return result.rowcount
+
+    async def remove_terms(self, guild_id: int, kind: str, values: Iterable[str]) -> int:
+        result = await self.db.executemany("DELETE FROM automod_terms WHERE guild_id = ? AND kind = ? AND value = ?",
+                                           [(guild_id, kind, value) for value in values])
+        self.invalidate(guild_id)
+        return result.rowcount
+
+    async def update_settings(self, guild_id: int, **changes):
+        settings = (await self.load(guild_id))[0]._replace(**changes)
+        await self.db.execute(
+            "INSERT INTO automod_settings (guild_id, enabled, block_invites, max_mentions, caps_ratio, caps_min_length) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(guild_id) DO UPDATE SET enabled = excluded.enabled, "
+            "block_invites = excluded.block_invites, max_mentions = excluded.max_mentions, "
+            "caps_ratio = excluded.caps_ratio, caps_min_length = excluded.caps_min_length",
+            (guild_id, int(settings.enabled), int(settings.block_invites), settings.max_mentions,
+             settings.caps_ratio, settings.caps_min_length))
+        self.invalidate(guild_id)
+        return settings
@@ -0,0 +1,122 @@
+# Description: Bounded-concurrency executor for bulk moderation actions
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+import discord
+
+T = TypeVar('T')
+
+
+class RouteLimiter:
+    """
+    Token bucket for one REST route bucket (e.g. bans in one guild).
+
+    discord.py already retries on 429s, but by then the bucket is exhausted for
+    every other command using the route. Pacing requests below the bucket's
+    limit keeps bulk jobs from starving the rest of the bot.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # The lock makes waiters queue up in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class BulkReport:
+    """
+    Running tally of a bulk job.
+    """
+    def __init__(self, total: int, skipped: Optional[Dict[int, str]] = None):
+        self.total = total
+        self.skipped: Dict[int, str] = skipped or {}
+        self.succeeded: List[int] = []
+        self.failed: Dict[int, str] = {}
+
+    @property
+    def done(self) -> int:
+        return len(self.succeeded) + len(self.failed) + len(self.skipped)
+
+    def describe(self) -> str:
+        return (f"Progress: {self.done}/{self.total}\n"
+                f"Succeeded: {len(self.succeeded)} | Failed: {len(self.failed)} | Skipped: {len(self.skipped)}")
+
+
+class ProgressMessage:
+    """
+    Edits one message with the state of a bulk job, at most once every ``interval`` seconds.
+    """
+    def __init__(self, message: discord.Message, title: str, color: int, interval: float = 2.0):
+        self.message = message
+        self.title = title
+        self.color = color
+        self.interval = interval
+        self._last_edit = 0.0
+
+    def render(self, report: BulkReport, final: bool = False) -> discord.Embed:
+        embed = discord.Embed(title=f"{self.title} {'complete' if final else 'in progress'}",
+                              description=report.describe(), color=self.color)
+        problems = list(report.failed.items()) + list(report.skipped.items())
+        if final and problems:
+            lines = [f"`{target_id}`: {reason}" for target_id, reason in problems[:15]]
+            if len(problems) > 15:
+                lines.append(f"...and {len(problems) - 15} more")
+            embed.add_field(name="Not actioned", value="\n".join(lines)[:1024], inline=False)
+        return embed
+
+    async def update(self, report: BulkReport, final: bool = False):
+        now = time.monotonic()
+        if not final and now - self._last_edit < self.interval:
+            return
+        self._last_edit = now
+        try:
+            await self.message.edit(embed=self.render(report, final))
+        except discord.HTTPException:
+            # Progress is best-effort, the job itself carries on
+            pass
+
+
+async def run_bulk(targets: Iterable[T], key: Callable[[T], int], action: Callable[[T], Awaitable[None]], *,
+                   concurrency: int, limiter: Optional[RouteLimiter] = None,
+                   report: Optional[BulkReport] = None,
+                   progress: Optional[ProgressMessage] = None) -> BulkReport:
+    """
+    Runs ``action`` for every target with at most ``concurrency`` in flight, pacing
+    each call through ``limiter`` and reporting to ``progress`` as results come in.
+    """
+    targets = list(targets)
+    report = report or BulkReport(len(targets))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(target: T):
+        async with semaphore:
+            if limiter is not None:
+                await limiter.acquire()
+            try:
+                await action(target)
+            except discord.HTTPException as e:
+                report.failed[key(target)] = e.text or str(e.status)
+            except Exception as e:
+                report.failed[key(target)] = str(e)
+            else:
+                report.succeeded.append(key(target))
+        if progress is not None:
+            await progress.update(report)
+
+    await asyncio.gather(*(worker(target) for target in targets))
+    if progress is not None:
+        await progress.update(report, final=True)
+    return report
@@ -0,0 +1,82 @@
+# Description: Coalesces bursts of message edits into at most one edit per message per interval
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+Send = Callable[[Any], Awaitable[None]]
+
+
+class EditCoalescer:
+    """
+    Keeps only the latest pending payload per key and sends it at most once every
+    ``interval`` seconds, skipping the send when the payload equals the last one sent.
+
+    The first request for an idle key is sent straight away; requests arriving while a
+    key is cooling down replace each other, so a burst of 200 votes costs a handful of edits.
+    """
+    def __init__(self, interval: float = 2.0, history: int = 4096):
+        self.interval = interval
+        self.pending: Dict[Hashable, Tuple[Any, Send]] = {}
+        self.tasks: Dict[Hashable, asyncio.Task] = {}
+        # Last payload sent and when, for recently edited keys only
+        self.last_sent: LRUCache[Tuple[Any, float]] = LRUCache(history)
+        self.requested = 0
+        self.sent = 0
+        self.unchanged = 0
+        self.failed = 0
+
+    def request(self, key: Hashable, payload: Any, send: Send):
+        """
+        Queues ``send(payload)`` for ``key``, replacing any payload still waiting to go out.
+        """
+        self.requested += 1
+        self.pending[key] = (payload, send)
+        if key not in self.tasks:
+            self.tasks[key] = asyncio.create_task(self._flush(key))
+
+    async def _flush(self, key: Hashable):
+        try:
+            while key in self.pending:
+                last = self.last_sent.get(key)
+                if last is not None:
+                    delay = last[1] + self.interval - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                payload, send = self.pending.pop(key)
+                if last is not None and last[0] == payload:
+                    self.unchanged += 1
+                    continue
+                try:
+                    await send(payload)
+                    self.sent += 1
+                    self.last_sent.set(key, (payload, time.monotonic()))
+                except Exception as e:
+                    self.failed += 1
+                    logger.warning(f"Coalesced edit for {key} failed: {e}")
+                    self.last_sent.set(key, (None, time.monotonic()))
+        finally:
+            self.tasks.pop(key, None)
+
+    async def close(self):
+        """
+        Drops pending edits and stops the flush tasks.
+        """
+        self.pending.clear()
+        for task in list(self.tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'requested': self.requested,
+            'sent': self.sent,
+            'unchanged': self.unchanged,
+            'failed': self.failed,
+            'pending': len(self.pending),
+        }
@@ -0,0 +1,271 @@
+# Description: The bot's configuration, parsed and validated once, shared by every cog and reloaded when the file changes
+import asyncio
+import inspect
+import logging
+import os
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = 'conf/config.yaml'
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class Creds(NamedTuple):
+    token: str
+    prefix: str = '-'
+    support_server: str = ''
+    owner_ids: List[int] = []
+
+
+class TicketsConfig(NamedTuple):
+    category_id: Optional[int] = None
+    log_channel_id: Optional[int] = None
+    unifiedSupportRole: Optional[int] = None
+    ticket_message: str = "Hello {user}, thank you for creating a ticket! Please describe your issue and a staff member will be with you shortly."
+    ticket_name: str = "ticket-{user}"
+    ticket_topic: str = "Ticket opened by {user}"
+    ticket_close_message: str = "Ticket closed by {closer}"
+    ticket_close_reason: str = "No reason provided."
+    ticket_close_log: str = "Ticket closed by {closer} for {reason}"
+    ticket_close_log_reason: str = "No reason provided."
+    ticket_close_log_channel: Optional[int] = None
+    ticket_close_log_color: int = 0
+    ticket_close_log_footer: str = "Ticket closed by {closer}"
+    pool_size: int = 0
+    max_open_per_user: int = 1
+    transcript_html: bool = False
+    auto_close_hours: float = 0
+    throttle_user_per_minute: float = 1
+    throttle_user_burst: int = 2
+    throttle_guild_per_minute: float = 10
+    throttle_guild_burst: int = 10
+    max_concurrent_creations: int = 3
+    auto_assign: bool = True
+    type_priority: Dict[str, int] = {"Order": 0, "Bot Issue": 1, "Issue": 2, "Partnership": 3}
+
+
+class ModerationConfig(NamedTuple):
+    warn_batch_window_ms: float = 20
+    warn_batch_max: int = 100
+    mass_concurrency: int = 5
+    mass_rate_per_second: float = 2
+    mass_burst: int = 5
+    mass_max_targets: int = 1000
+    dm_concurrency: int = 5
+    dm_max_attempts: int = 5
+
+
+class AntiRaidConfig(NamedTuple):
+    window_seconds: float = 60
+    max_joins: int = 15
+    young_account_days: float = 7
+    max_young_joins: int = 8
+    max_messages: int = 120
+    lockdown_minutes: float = 15
+    actions: List[str] = ['slowmode', 'pause_invites']
+    slowmode_seconds: int = 30
+    alert_channel_id: Optional[int] = None
+
+
+class SuggestionConfig(NamedTuple):
+    channel_id: Optional[int] = None
+    edit_interval_seconds: float = 2
+    similar_threshold: float = 0.5
+    similar_budget_ms: float = 250
+    leaderboard_channel_id: Optional[int] = None
+    leaderboard_interval_minutes: float = 10
+    archive_after_days: float = 30
+    retention_interval_hours: float = 24
+
+
+class Config(NamedTuple):
+    creds: Creds
+    CLR: int = 0
+    lazy_cogs: bool = False
+    tickets: TicketsConfig = TicketsConfig()
+    moderation: ModerationConfig = ModerationConfig()
+    antiraid: AntiRaidConfig = AntiRaidConfig()
+    suggestion: SuggestionConfig = SuggestionConfig()
+
+
+# Rates, bursts, concurrency limits and intervals: a limiter divides by them or waits on them, so 0 is an
+# error rather than "off". Every other number in a section only has to be non-negative.
+POSITIVE = {
+    TicketsConfig: {'max_open_per_user', 'throttle_user_per_minute', 'throttle_user_burst',
+                    'throttle_guild_per_minute', 'throttle_guild_burst', 'max_concurrent_creations'},
+    ModerationConfig: {'warn_batch_max', 'mass_concurrency', 'mass_rate_per_second', 'mass_burst',
+                       'mass_max_targets', 'dm_concurrency', 'dm_max_attempts'},
+    AntiRaidConfig: {'window_seconds', 'max_joins', 'max_young_joins', 'max_messages'},
+    SuggestionConfig: {'leaderboard_interval_minutes', 'retention_interval_hours'},
+}
+
+
+def _check(value: Any, hint: Any, path: str) -> Any:
+    """
+    Checks ``value`` against a type hint and returns it converted (ints accepted for floats, sections built).
+    """
+    origin = get_origin(hint)
+    if origin is Union:
+        args = [arg for arg in get_args(hint) if arg is not type(None)]
+        if value is None and len(args) < len(get_args(hint)):
+            return None
+        return _check(value, args[0], path)
+    if origin is list:
+        if not isinstance(value, list):
+            raise ConfigError(f"{path} must be a list")
+        return [_check(item, get_args(hint)[0], f"{path}[{index}]") for index, item in enumerate(value)]
+    if origin is dict:
+        if not isinstance(value, dict):
+            raise ConfigError(f"{path} must be a mapping")
+        key_type, value_type = get_args(hint)
+        return {_check(key, key_type, path): _check(item, value_type, f"{path}.{key}") for key, item in value.items()}
+    if isinstance(hint, type) and issubclass(hint, tuple) and hasattr(hint, '_fields'):
+        return _section(hint, value, path)
+    if hint is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, hint) and not (hint is int and isinstance(value, bool)):
+        return value
+    raise ConfigError(f"{path} must be {hint.__name__}, got {value!r}")
+
+
+def _section(cls, raw: Any, path: str):
+    if raw is None:
+        raw = {}
+    if not isinstance(raw, dict):
+        raise ConfigError(f"{path} must be a mapping")
+    hints = get_type_hints(cls)
+    unknown = sorted(set(raw) - set(hints))
+    if unknown:
+        logger.warning(f"Ignoring unknown config keys in {path}: {', '.join(map(str, unknown))}")
+    values = {}
+    for name, hint in hints.items():
+        if name in raw:
+            values[name] = _check(raw[name], hint, f"{path}.{name}")
+            _check_range(cls, name, values[name], f"{path}.{name}")
+        elif name not in cls._field_defaults:
+            raise ConfigError(f"{path}.{name} is required")
+    return cls(**values)
+
+
+def _check_range(cls, name: str, value: Any, path: str):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return
+    if name in POSITIVE.get(cls, ()):
+        if value <= 0:
+            raise ConfigError(f"{path} must be greater than 0, got {value!r}")
+    elif value < 0:
+        raise ConfigError(f"{path} can't be negative, got {value!r}")
+
+
+def parse(raw: Any) -> Config:
+    """
+    Validates a parsed YAML document against the schema above. Raises ConfigError naming the first bad key.
+    """
+    return _section(Config, raw, "config")
+
+
+class ConfigService:
+    """
+    Holds the current ``Config``. Call ``start`` to poll the file's modification time;
+    when it changes the file is parsed and validated again and, if it is valid,
+    swapped in and passed to every subscriber. An invalid edit is logged and the
+    previous configuration stays in use.
+    """
+    def __init__(self, path: str = CONFIG_PATH):
+        self.path = path
+        self.current: Config = None #type: ignore
+        self.loads = 0
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._subscribers: List[Callable[[Config], Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def _read_stamp(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> Config:
+        stamp = self._read_stamp()
+        with open(self.path, 'r') as file:
+            config = parse(yaml.safe_load(file))
+        self.current, self._stamp = config, stamp
+        self.loads += 1
+        return config
+
+    def subscribe(self, callback: Callable[[Config], Any]):
+        """
+        ``callback(config)`` (plain or async) runs after every successful reload.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Config], Any]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    async def reload(self) -> bool:
+        """
+        Re-reads the file and notifies subscribers. Returns False if it was invalid.
+        """
+        try:
+            config = self.load()
+        except (OSError, yaml.YAMLError, ConfigError) as e:
+            logger.error(f"Keeping the previous configuration, {self.path} is invalid: {e}")
+            return False
+        logger.info(f"Reloaded {self.path}")
+        for callback in list(self._subscribers):
+            try:
+                result = callback(config)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Config subscriber {getattr(callback, '__qualname__', callback)} failed: {e}")
+        return True
+
+    def start(self, interval: float = 5.0):
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll(interval), name="config-reload")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _poll(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                stamp = self._read_stamp()
+            except OSError:
+                continue
+            if stamp != self._stamp:
+                # Remembered before parsing, so a broken edit is reported once rather than every poll
+                self._stamp = stamp
+                await self.reload()
+
+
+_service: Optional[ConfigService] = None
+
+
+def get_config() -> ConfigService:
+    """
+    The shared config service, loading the file on first use.
+    """
+    global _service
+    if _service is None:
+        service = ConfigService()
+        service.load()
+        _service = service
+    return _service
+
+
+def settings() -> Config:
+    return get_config().current
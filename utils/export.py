@@ -0,0 +1,67 @@
+# Description: Streams database rows into gzip-compressed JSONL or CSV files
+import asyncio
+import csv
+import gzip
+import io
+import json
+import tempfile
+from typing import IO, Any, AsyncIterable, Dict, Iterator, List, Sequence, Tuple
+
+FORMATS = ("jsonl", "csv")
+
+
+def encode_rows(rows: List[Dict[str, Any]], fields: Sequence[str], fmt: str) -> Iterator[str]:
+    """
+    Yields one line of text per row.
+    """
+    if fmt == "jsonl":
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def csv_header(fields: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(fields)
+    return buffer.getvalue()
+
+
+async def export_gzip(batches: AsyncIterable[List[Dict[str, Any]]], fields: Sequence[str], fmt: str,
+                      spool_size: int = 1 << 20) -> Tuple[IO[bytes], int]:
+    """
+    Compresses batches of rows into a file as they arrive and returns it rewound, with the row count.
+
+    Only one batch is held at a time and the output stays in memory up to ``spool_size``
+    bytes before spilling to a temporary file, so memory does not grow with the row count.
+    Compression runs in a thread to keep the event loop free.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    file = tempfile.SpooledTemporaryFile(max_size=spool_size)
+    archive = gzip.GzipFile(fileobj=file, mode="wb")
+    if fmt == "csv":
+        archive.write(csv_header(fields).encode())
+
+    def write(rows: List[Dict[str, Any]]):
+        for line in encode_rows(rows, fields, fmt):
+            archive.write(line.encode())
+
+    count = 0
+    try:
+        async for rows in batches:
+            await asyncio.to_thread(write, rows)
+            count += len(rows)
+    except BaseException:
+        archive.close()
+        file.close()
+        raise
+    archive.close()  # flushes the gzip trailer, leaves the underlying file open
+    file.seek(0)
+    return file, count
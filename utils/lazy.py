@@ -0,0 +1,218 @@
+# Description: Lazy extension loading: command stubs from a cached manifest, the real cog imported on first use
+import ast
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = './db/lazy_manifest.json'
+
+# Attribute and decorator names that make a cog do work without any command being used
+_EAGER_MARKERS = {
+    'listener': "event listener",
+    'add_view': "persistent view",
+    'add_dynamic_items': "dynamic items",
+    'loop': "background task",
+}
+
+
+class ManifestEntry(NamedTuple):
+    digest: str
+    commands: List[Dict]
+    app_commands: List[Dict]
+
+
+def source_digest(source: bytes) -> str:
+    return hashlib.sha256(source).hexdigest()
+
+
+def eager_reason(source: bytes) -> Optional[str]:
+    """
+    Reads an extension's source without importing it and says why it must load at
+    startup (it listens to events, registers persistent views, runs a loop or has no
+    ``setup``), or None if loading it on first command use is safe.
+    """
+    tree = ast.parse(source)
+    has_setup = False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == 'setup':
+            has_setup = True
+        elif isinstance(node, ast.ImportFrom) and any(alias.name == 'setup' for alias in node.names):
+            has_setup = True
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and node.attr in _EAGER_MARKERS:
+            return _EAGER_MARKERS[node.attr]
+    return None if has_setup else "no setup function"
+
+
+def extension_source(name: str) -> Optional[bytes]:
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin or not spec.has_location:
+        return None
+    with open(spec.origin, 'rb') as file:
+        return file.read()
+
+
+def app_commands_of(cog: commands.Cog) -> List[app_commands.AppCommand]:
+    # Hybrid commands keep their slash half on the command rather than in the cog's app commands
+    hybrid = [command.app_command for command in cog.get_commands()
+              if isinstance(command, (commands.HybridCommand, commands.HybridGroup)) and command.app_command is not None]
+    return [*cog.get_app_commands(), *hybrid] #type: ignore
+
+
+class LazyCommandTree(app_commands.CommandTree):
+    """
+    Loads a lazy extension before its slash command (or autocomplete) is looked up.
+    """
+    lazy: Optional['LazyExtensions'] = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if self.lazy is not None and isinstance(interaction.data, dict):
+            extension = self.lazy.app_pending.get(interaction.data.get('name')) #type: ignore
+            if extension is not None:
+                await self.lazy.load(extension)
+        return True
+
+
+class LazyExtensions:
+    """
+    Registers stub prefix commands for extensions whose manifest entry matches their
+    source, and loads the real extension the first time a stub or one of its slash
+    commands is used. Anything the manifest can't vouch for (new or edited files, cogs
+    with listeners, persistent views or loops) loads eagerly, and the manifest entry
+    is refreshed from the live commands of each eager load.
+    """
+    def __init__(self, bot: commands.Bot, path: str = MANIFEST_PATH):
+        self.bot = bot
+        self.path = path
+        self.manifest: Dict[str, ManifestEntry] = {}
+        self.digests: Dict[str, str] = {}
+        # Extensions that may be loaded lazily once the manifest knows their commands
+        self.eligible: Set[str] = set()
+        # Stubbed prefix command name -> extension, and top-level slash command name -> extension
+        self.pending: Dict[str, str] = {}
+        self.app_pending: Dict[str, str] = {}
+        self.load_times: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def read_manifest(self):
+        try:
+            with open(self.path, 'r') as file:
+                raw = json.load(file)
+            self.manifest = {name: ManifestEntry(**entry) for name, entry in raw.items()}
+        except (OSError, ValueError, TypeError) as e:
+            logger.info(f"No usable extension manifest at {self.path} ({e}), loading every extension eagerly")
+            self.manifest = {}
+
+    def write_manifest(self):
+        with open(self.path, 'w') as file:
+            json.dump({name: entry._asdict() for name, entry in self.manifest.items()}, file, indent=1)
+
+    def plan(self, extensions: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        Splits the extensions into (eager, lazy).
+        """
+        self.read_manifest()
+        eager, lazy = [], []
+        for name in extensions:
+            source = extension_source(name)
+            if source is None:
+                eager.append(name)
+                continue
+            digest = self.digests[name] = source_digest(source)
+            reason = eager_reason(source)
+            entry = self.manifest.get(name)
+            if reason is not None:
+                logger.info(f"Loading {name} eagerly: {reason}")
+                self.manifest.pop(name, None)
+                eager.append(name)
+                continue
+            self.eligible.add(name)
+            if entry is not None and entry.digest == digest:
+                lazy.append(name)
+            else:
+                eager.append(name)
+        return eager, lazy
+
+    def install(self, extensions: Iterable[str]):
+        # A plain function, commands.Command won't take a bound method as its callback
+        async def invoke(ctx: commands.Context):
+            await self._stub(ctx)
+
+        for name in extensions:
+            entry = self.manifest[name]
+            for command in entry.commands:
+                stub = commands.Command(invoke, name=command['name'], aliases=command['aliases'],
+                                        help=command['help'], hidden=command['hidden'])
+                self.bot.add_command(stub)
+                self.pending[command['name']] = name
+            for payload in entry.app_commands:
+                self.app_pending[payload['name']] = name
+
+    def refresh(self, extensions: Iterable[str]):
+        """
+        Records the live commands of loaded extensions, so they can be stubbed next time.
+        """
+        changed = False
+        for name in extensions:
+            if name not in self.eligible or name not in self.bot.extensions:
+                continue
+            cogs = [cog for cog in self.bot.cogs.values()
+                    if cog.__module__ == name or cog.__module__.startswith(f"{name}.")]
+            entry = ManifestEntry(
+                self.digests[name],
+                [{'name': command.name, 'aliases': list(command.aliases), 'help': command.short_doc, 'hidden': command.hidden}
+                 for cog in cogs for command in cog.get_commands()],
+                [command.to_dict(self.bot.tree) for cog in cogs for command in app_commands_of(cog)])
+            if self.manifest.get(name) != entry:
+                self.manifest[name] = entry
+                changed = True
+        if changed:
+            self.write_manifest()
+
+    def app_payloads(self) -> List[Dict]:
+        """
+        The slash command payloads of extensions that haven't loaded yet, for the global sync.
+        """
+        loaded = set(self.bot.extensions)
+        return [payload for name, entry in self.manifest.items() if name not in loaded
+                and name in self.eligible for payload in entry.app_commands]
+
+    async def load(self, name: str):
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            if name in self.bot.extensions:
+                return
+            for command, extension in list(self.pending.items()):
+                if extension == name:
+                    self.bot.remove_command(command)
+                    del self.pending[command]
+            for command, extension in list(self.app_pending.items()):
+                if extension == name:
+                    del self.app_pending[command]
+            start = time.perf_counter()
+            try:
+                await self.bot.load_extension(name)
+            except Exception:
+                self.install([name])
+                raise
+            self.load_times[name] = time.perf_counter() - start
+            logger.info(f"| ✅ | Loaded {name} on first use in {self.load_times[name] * 1000:.1f}ms")
+
+    async def _stub(self, ctx: commands.Context):
+        extension = self.pending.get(ctx.command.name) #type: ignore
+        if extension is not None:
+            await self.load(extension)
+        # Dispatched again from the start, now to the real command with its own checks and arguments
+        await self.bot.invoke(await self.bot.get_context(ctx.message))
@@ -0,0 +1,34 @@
+# Description: Lightweight in-memory metrics for the bot
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterable, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """
+    Returns the nearest-rank percentile of ``samples``.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class LatencyRecorder:
+    """
+    Keeps the most recent ``size`` durations (in seconds) per name.
+    """
+    def __init__(self, size: int = 1000):
+        self.size = size
+        self.samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.size))
+
+    def record(self, name: str, seconds: float):
+        self.samples[name].append(seconds)
+
+    def percentiles(self, name: str, pcts: Iterable[float] = (50, 95, 99)) -> Dict[float, float]:
+        samples = list(self.samples.get(name, ()))
+        return {pct: percentile(samples, pct) for pct in pcts}
+
+    def names(self):
+        return sorted(self.samples)
+
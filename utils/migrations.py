@@ -0,0 +1,66 @@
+# Description: Versioned schema migrations for the shared SQLite databases
+import logging
+import sqlite3
+from typing import Awaitable, Callable, List, NamedTuple, Sequence, Union
+
+import aiosqlite
+
+from utils.storage import Database
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    """
+    One schema step. ``apply`` is either an SQL script or an async callable taking the writer connection.
+    """
+    version: int
+    description: str
+    apply: Union[str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+
+def split_statements(script: str) -> List[str]:
+    """
+    Splits an SQL script into complete statements (trigger bodies stay intact).
+    """
+    statements, buffer = [], ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip():
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+async def schema_version(db: Database) -> int:
+    row = await db.fetchone("PRAGMA user_version")
+    return row[0] if row else 0
+
+
+async def migrate(db: Database, migrations: Sequence[Migration]) -> int:
+    """
+    Upgrades ``db`` in place by applying every migration newer than its ``user_version``.
+
+    Each migration runs in its own transaction together with the version bump, so a
+    failed step leaves the database at the last good version. Returns the final version.
+    """
+    current = await schema_version(db)
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+
+        async def job(conn: aiosqlite.Connection, migration: Migration = migration):
+            if isinstance(migration.apply, str):
+                for statement in split_statements(migration.apply):
+                    await conn.execute(statement)
+            else:
+                await migration.apply(conn)
+            await conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+
+        await db.transaction(job)
+        current = migration.version
+        logger.info(f"Migrated {db.path} to version {current}: {migration.description}")
+    return current
@@ -0,0 +1,59 @@
+# Description: MinHash signatures and LSH banding for near-duplicate text detection
+import random
+import re
+import struct
+import zlib
+from typing import List, Sequence, Set, Tuple
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS  # two texts share a band with good odds from about 50% similarity
+SHINGLE = 4
+
+# Fixed seed: signatures are stored, so the masks must be the same in every process
+_MASKS = random.Random(0x5EED).sample(range(1 << 32), NUM_HASHES)
+_PACK = struct.Struct(f"<{NUM_HASHES}I")
+_NOISE = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    return _NOISE.sub(" ", text.lower()).strip()
+
+
+def shingles(text: str, size: int = SHINGLE) -> Set[bytes]:
+    """
+    Overlapping character ``size``-grams of the normalized text, so reworded or misspelled copies still overlap.
+    """
+    data = normalize(text).encode()
+    if len(data) <= size:
+        return {data}
+    return {data[i:i + size] for i in range(len(data) - size + 1)}
+
+
+def signature(text: str) -> Tuple[int, ...]:
+    """
+    ``NUM_HASHES`` minimum hash values of the text's shingles, each under a different XOR mask.
+    The share of positions two signatures agree on estimates the Jaccard similarity of their shingles.
+    """
+    hashes = [zlib.crc32(shingle) for shingle in shingles(text)]
+    return tuple(min(map(mask.__xor__, hashes)) for mask in _MASKS)
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def bands(sig: Sequence[int]) -> List[Tuple[int, int]]:
+    """
+    ``(band, hash)`` keys for LSH lookup: texts with any key in common are candidate duplicates.
+    """
+    packed, width = _PACK.pack(*sig), ROWS * 4
+    return [(band, zlib.crc32(packed[band * width:(band + 1) * width])) for band in range(BANDS)]
+
+
+def pack(sig: Sequence[int]) -> bytes:
+    return _PACK.pack(*sig)
+
+
+def unpack(blob: bytes) -> Tuple[int, ...]:
+    return _PACK.unpack(blob)
@@ -0,0 +1,188 @@
+# Description: Persistent outbox for moderation DMs, delivered by a background worker
+import asyncio
+import logging
+import time
+from typing import NamedTuple, Optional, Set
+
+import discord
+
+from utils.migrations import Migration
+from utils.storage import Database
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    Migration(1, "outbox table", """
+        CREATE TABLE outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            fallback_channel_id INTEGER,
+            fallback_message TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX idx_outbox_status_due ON outbox (status, next_attempt_at);
+    """),
+]
+
+COLUMNS = "id, user_id, content, attempts, fallback_channel_id, fallback_message"
+
+
+class OutboxMessage(NamedTuple):
+    id: int
+    user_id: int
+    content: str
+    attempts: int
+    fallback_channel_id: Optional[int]
+    fallback_message: Optional[str]
+
+
+class Outbox:
+    """
+    Moderation commands enqueue DMs here and return straight away; one worker task
+    delivers them with bounded concurrency.
+
+    Rows stay in the table until they are delivered, so pending DMs survive a restart.
+    Transient failures are retried with exponential backoff. Users who cannot be
+    DMed (``discord.Forbidden``/``discord.NotFound``) or who run out of attempts are
+    kept as ``dead`` rows, and the optional fallback message is posted instead.
+    """
+    def __init__(self, bot, db: Database, concurrency: int = 5, max_attempts: int = 5,
+                 base_delay: float = 5.0, batch_size: int = 50):
+        self.bot = bot
+        self.db = db
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._wakeup = asyncio.Event()
+        self._in_flight: Set[int] = set()
+        self._deliveries: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def enqueue(self, user_id: int, content: str, fallback_channel_id: Optional[int] = None,
+                      fallback_message: Optional[str] = None) -> int:
+        now = time.time()
+        result = await self.db.execute(
+            "INSERT INTO outbox (user_id, content, next_attempt_at, fallback_channel_id, fallback_message, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, content, now, fallback_channel_id, fallback_message, now))
+        self._wakeup.set()
+        return result.lastrowid #type: ignore
+
+    async def cancel(self, message_id: int) -> bool:
+        """
+        Drops a message that has not been picked up yet, e.g. because the action it announced failed.
+        """
+        if message_id in self._in_flight:
+            return False
+        result = await self.db.execute("DELETE FROM outbox WHERE id = ? AND status = 'pending'", (message_id,))
+        return result.rowcount > 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="dm-outbox")
+
+    async def stop(self):
+        """
+        Stops the worker and any deliveries in progress. Undelivered messages stay in the table for the next start.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        deliveries = list(self._deliveries)
+        for task in deliveries:
+            task.cancel()
+        await asyncio.gather(*deliveries, return_exceptions=True)
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            self._wakeup.clear()
+            try:
+                delay = await self._dispatch_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker error: {e}")
+                delay = self.base_delay
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch_due(self) -> float:
+        """
+        Starts delivery of due messages, at most ``batch_size`` at once, and returns how long
+        to sleep until the next one. A finishing delivery wakes the worker early.
+        """
+        room = self.batch_size - len(self._in_flight)
+        if room <= 0:
+            return 60.0
+        now = time.time()
+        in_flight = ",".join(str(message_id) for message_id in self._in_flight) or "-1"
+        rows = await self.db.fetchall(
+            f"SELECT {COLUMNS} FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? AND id NOT IN ({in_flight}) "
+            "ORDER BY next_attempt_at LIMIT ?", (now, room))
+        for row in rows:
+            message = OutboxMessage(*row)
+            self._in_flight.add(message.id)
+            task = asyncio.create_task(self._deliver(message))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+        if len(rows) == room:
+            return 60.0
+        in_flight = ",".join(str(message_id) for message_id in self._in_flight) or "-1"
+        row = await self.db.fetchone(
+            f"SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending' AND id NOT IN ({in_flight})")
+        if row is None or row[0] is None:
+            return 60.0
+        return max(0.1, row[0] - now)
+
+    async def _deliver(self, message: OutboxMessage):
+        try:
+            async with self._semaphore:
+                try:
+                    user = self.bot.get_user(message.user_id) or await self.bot.fetch_user(message.user_id)
+                    await user.send(message.content)
+                except (discord.Forbidden, discord.NotFound) as e:
+                    await self._dead_letter(message, e.text or str(e.status))
+                except discord.HTTPException as e:
+                    await self._retry(message, e.text or str(e.status))
+                else:
+                    await self.db.execute("DELETE FROM outbox WHERE id = ?", (message.id,))
+        except Exception as e:
+            logger.error(f"Failed to deliver outbox message {message.id}: {e}")
+        finally:
+            self._in_flight.discard(message.id)
+            self._wakeup.set()
+
+    async def _retry(self, message: OutboxMessage, error: str):
+        attempts = message.attempts + 1
+        if attempts >= self.max_attempts:
+            return await self._dead_letter(message, error)
+        next_attempt_at = time.time() + self.base_delay * 2 ** message.attempts
+        await self.db.execute("UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                              (attempts, next_attempt_at, error, message.id))
+        self._wakeup.set()
+
+    async def _dead_letter(self, message: OutboxMessage, error: str):
+        await self.db.execute("UPDATE outbox SET status = 'dead', attempts = attempts + 1, last_error = ? WHERE id = ?",
+                              (error, message.id))
+        logger.info(f"Outbox message {message.id} to {message.user_id} dead-lettered: {error}")
+        if message.fallback_channel_id and message.fallback_message:
+            channel = self.bot.get_channel(message.fallback_channel_id)
+            if channel is not None:
+                await channel.send(message.fallback_message)
+
+    async def stats(self):
+        return dict(await self.db.fetchall("SELECT status, COUNT(*) FROM outbox GROUP BY status"))
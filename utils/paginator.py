@@ -0,0 +1,79 @@
+# Description: Button-driven embed paginator that fetches pages lazily with keyset cursors
+from typing import Any, Awaitable, Callable, List, Optional
+
+import discord
+
+# fetch(cursor, forward, limit) returns up to ``limit`` items in display order that come
+# after (forward) or before (backward) ``cursor``; cursor is None for the first page.
+Fetch = Callable[[Any, bool, int], Awaitable[List[Any]]]
+
+
+class KeysetPaginator(discord.ui.View):
+    """
+    Shows one page of results at a time and only queries the page being switched to.
+
+    ``key(item)`` returns the cursor for an item and ``render(items, start)`` builds the
+    embed for a page whose first item is the ``start``-th result (1-based).
+    """
+    def __init__(self, author_id: int, fetch: Fetch, key: Callable[[Any], Any],
+                 render: Callable[[List[Any], int], discord.Embed], page_size: int = 10, timeout: float = 180):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.fetch = fetch
+        self.key = key
+        self.render = render
+        self.page_size = page_size
+        self.items: List[Any] = []
+        self.start = 1
+        self.has_next = False
+        self.message: Optional[discord.Message] = None
+
+    async def send(self, ctx, first_page: Optional[List[Any]] = None, **kwargs):
+        """
+        Sends the first page. ``first_page`` may be a prefetched (e.g. cached) list of up to page_size + 1 items.
+        """
+        if first_page is None:
+            first_page = await self.fetch(None, True, self.page_size + 1)
+        self._set_page(first_page, 1)
+        self.message = await ctx.send(embed=self.render(self.items, self.start), view=self, **kwargs)
+
+    def _set_page(self, items: List[Any], start: int, has_next: Optional[bool] = None):
+        self.has_next = len(items) > self.page_size if has_next is None else has_next
+        self.items = items[:self.page_size]
+        self.start = start
+        self.previous_page.disabled = start <= 1
+        self.next_page.disabled = not self.has_next
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Only the person who ran the command can change pages.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not self.items:
+            return await interaction.response.defer()
+        items = await self.fetch(self.key(self.items[0]), False, self.page_size)
+        if not items:
+            # Earlier results were deleted since this page was shown
+            self.previous_page.disabled = True
+            return await interaction.response.edit_message(view=self)
+        # A backwards page is always followed by the page we just left
+        self._set_page(items, max(1, self.start - len(items)), has_next=True)
+        await interaction.response.edit_message(embed=self.render(self.items, self.start), view=self)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not self.items:
+            return await interaction.response.defer()
+        items = await self.fetch(self.key(self.items[-1]), True, self.page_size + 1)
+        self._set_page(items, self.start + len(self.items))
+        await interaction.response.edit_message(embed=self.render(self.items, self.start), view=self)
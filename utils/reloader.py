@@ -0,0 +1,99 @@
+# Description: In-process hot reload of the cogs whose source changed, without restarting the bot
+import hashlib
+import logging
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+
+class ReloadResult(NamedTuple):
+    extension: str
+    action: str  # "reloaded", "loaded" or "unloaded"
+    seconds: float
+    error: Optional[str] = None
+
+
+def hash_sources(directory: str) -> Dict[str, str]:
+    """
+    sha256 of every ``.py`` file directly in ``directory``, keyed by module name (``cogs.tickets``).
+    """
+    digests = {}
+    for file in sorted(os.listdir(directory)):
+        if file.endswith('.py'):
+            with open(os.path.join(directory, file), 'rb') as source:
+                digests[f"{directory}.{file[:-3]}"] = hashlib.sha256(source.read()).hexdigest()
+    return digests
+
+
+class HotReloader:
+    """
+    Remembers the hash of each cog as it was loaded, and reloads only the cogs whose
+    file changed since. The gateway session stays up: reloading runs the cog's
+    ``cog_unload`` and ``cog_load``, which is where cogs register their persistent
+    views and dynamic items again. ``utils`` modules are not reloaded (every cog
+    holds references into them), so a change there is only reported.
+    """
+    def __init__(self, bot: commands.Bot, directory: str = 'cogs', shared: str = 'utils'):
+        self.bot = bot
+        self.directory = directory
+        self.shared = shared
+        self.digests: Dict[str, str] = {}
+        self.shared_digests: Dict[str, str] = {}
+
+    def snapshot(self):
+        """
+        Records the current sources as the loaded ones. Called before the first load.
+        """
+        self.digests = hash_sources(self.directory)
+        self.shared_digests = hash_sources(self.shared)
+
+    def changed_shared(self) -> List[str]:
+        current = hash_sources(self.shared)
+        return sorted(name for name in current.keys() | self.shared_digests.keys()
+                      if current.get(name) != self.shared_digests.get(name))
+
+    async def reload_changed(self) -> List[ReloadResult]:
+        """
+        Reloads changed cogs, loads new ones and unloads deleted ones, in that order.
+        A cog that fails to reload keeps running its previous version (discord.py rolls
+        the reload back) and keeps its old hash, so the next call tries it again.
+        """
+        current = hash_sources(self.directory)
+        results = []
+        for name in sorted(current.keys() | self.digests.keys()):
+            digest, previous = current.get(name), self.digests.get(name)
+            if digest == previous:
+                continue
+            lazy = getattr(self.bot, 'lazy', None)
+            if digest is None:
+                if name not in self.bot.extensions:
+                    del self.digests[name]
+                    continue
+                action, operation = "unloaded", self.bot.unload_extension
+            elif name in self.bot.extensions:
+                action, operation = "reloaded", self.bot.reload_extension
+            elif lazy is not None and name in lazy.pending.values():
+                # Still a stub, the first use imports the new source anyway
+                self.digests[name] = digest
+                continue
+            else:
+                # A new cog, or one that failed to load before
+                action, operation = "loaded", self.bot.load_extension
+            start = time.perf_counter()
+            try:
+                await operation(name)
+            except Exception as e:
+                results.append(ReloadResult(name, action, time.perf_counter() - start, str(e)))
+                logger.error(f"| ❌ | Failed to {action[:-2]} {name}: {e}")
+                continue
+            results.append(ReloadResult(name, action, time.perf_counter() - start))
+            logger.info(f"| ✅ | {action.capitalize()} {name} in {results[-1].seconds * 1000:.1f}ms")
+            if digest is None:
+                del self.digests[name]
+            else:
+                self.digests[name] = digest
+        return results
@@ -0,0 +1,157 @@
+# Description: In-memory routing of tickets to staff: a priority queue of unclaimed tickets and per-staff load
+import heapq
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+import discord
+
+DEFAULT_PRIORITIES = {"Order": 0, "Bot Issue": 1, "Issue": 2, "Partnership": 3}
+
+
+class QueuedTicket(NamedTuple):
+    priority: int
+    created_at: int
+    id: int
+    channel_id: int
+    owner_id: int
+    ticket_type: str
+
+
+class TicketQueue:
+    """
+    Unclaimed tickets ordered by type priority, then age.
+
+    A heap with lazy deletion: removing a ticket only forgets it in ``live`` (O(1)),
+    and its heap entry is discarded when it reaches the top. The heap is rebuilt
+    when stale entries outnumber live ones, so push, pop and remove stay O(log n).
+    """
+    def __init__(self, priorities: Mapping[str, int] = DEFAULT_PRIORITIES):
+        self.priorities = dict(priorities)
+        self.live: Dict[int, QueuedTicket] = {}
+        self._heap: List[QueuedTicket] = []
+
+    def push(self, ticket_id: int, channel_id: int, owner_id: int, ticket_type: str, created_at: int):
+        entry = QueuedTicket(self.priorities.get(ticket_type, len(self.priorities)), created_at, ticket_id,
+                             channel_id, owner_id, ticket_type)
+        self.live[channel_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, channel_id: int) -> bool:
+        if self.live.pop(channel_id, None) is None:
+            return False
+        if len(self._heap) > 2 * len(self.live) + 64:
+            self._heap = list(self.live.values())
+            heapq.heapify(self._heap)
+        return True
+
+    def peek(self) -> Optional[QueuedTicket]:
+        while self._heap:
+            entry = self._heap[0]
+            if self.live.get(entry.channel_id) is entry:
+                return entry
+            heapq.heappop(self._heap)
+        return None
+
+    def pop(self) -> Optional[QueuedTicket]:
+        entry = self.peek()
+        if entry is not None:
+            heapq.heappop(self._heap)
+            del self.live[entry.channel_id]
+        return entry
+
+    def first(self, count: int) -> List[QueuedTicket]:
+        return heapq.nsmallest(count, self.live.values())
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self.live
+
+
+class StaffLoad:
+    """
+    Open claimed tickets per staff member, and which staff are available.
+
+    ``least_loaded`` reads the top of a heap of ``(load, staff_id)`` entries. Changing
+    a load or availability pushes a fresh entry and leaves the old one to be skipped,
+    so every update and lookup is O(log n) amortised.
+    """
+    def __init__(self):
+        self.loads: Dict[int, int] = {}
+        self.available: Set[int] = set()
+        self._heap: List[Tuple[int, int]] = []
+
+    def _push(self, staff_id: int):
+        if staff_id in self.available:
+            heapq.heappush(self._heap, (self.loads.get(staff_id, 0), staff_id))
+            if len(self._heap) > 2 * len(self.available) + 64:
+                self._heap = [(self.loads.get(member, 0), member) for member in self.available]
+                heapq.heapify(self._heap)
+
+    def set_available(self, staff_id: int, available: bool):
+        if available and staff_id not in self.available:
+            self.available.add(staff_id)
+            self._push(staff_id)
+        elif not available:
+            self.available.discard(staff_id)
+
+    def add(self, staff_id: int, amount: int = 1):
+        load = self.loads.get(staff_id, 0) + amount
+        if load > 0:
+            self.loads[staff_id] = load
+        else:
+            self.loads.pop(staff_id, None)
+        self._push(staff_id)
+
+    def least_loaded(self) -> Optional[int]:
+        while self._heap:
+            load, staff_id = self._heap[0]
+            if staff_id in self.available and self.loads.get(staff_id, 0) == load:
+                return staff_id
+            heapq.heappop(self._heap)
+        return None
+
+    def busiest(self, count: int) -> List[Tuple[int, int]]:
+        return heapq.nlargest(count, ((load, staff_id) for staff_id, load in self.loads.items()))
+
+
+def is_available(member: discord.Member) -> bool:
+    return member.status in (discord.Status.online, discord.Status.idle)
+
+
+class TicketRouter:
+    """
+    Assigns new tickets to the least-loaded available staff member, or queues them
+    unclaimed when nobody is available. Claims and closes keep both sides current.
+    """
+    def __init__(self, priorities: Mapping[str, int] = DEFAULT_PRIORITIES):
+        self.queue = TicketQueue(priorities)
+        self.staff = StaffLoad()
+
+    def rebuild(self, loads: Iterable[Tuple[int, int]], unclaimed: Iterable[Tuple[int, int, int, str, int]]):
+        """
+        Loads ``(staff_id, open tickets)`` and ``(ticket_id, channel_id, owner_id, type, created_at)`` rows from the ticket store.
+        """
+        for staff_id, count in loads:
+            self.staff.add(staff_id, count)
+        for row in unclaimed:
+            self.queue.push(*row)
+
+    def assign(self) -> Optional[int]:
+        """
+        Picks the staff member for a new ticket and counts it against them, None if nobody is available.
+        """
+        staff_id = self.staff.least_loaded()
+        if staff_id is not None:
+            self.staff.add(staff_id)
+        return staff_id
+
+    def claimed(self, channel_id: int, staff_id: int):
+        self.queue.remove(channel_id)
+        self.staff.add(staff_id)
+
+    def closed(self, channel_id: int, claimer_id: Optional[int]):
+        if claimer_id is not None:
+            self.staff.add(claimer_id, -1)
+        else:
+            self.queue.remove(channel_id)
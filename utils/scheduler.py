@@ -0,0 +1,188 @@
+# Description: Persistent delayed jobs, kept in one in-memory heap and fired by a single wakeup task
+import asyncio
+import heapq
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from utils.migrations import Migration
+from utils.storage import Database
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    Migration(1, "scheduled jobs", """
+        CREATE TABLE scheduled_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            key INTEGER NOT NULL,
+            due_at REAL NOT NULL,
+            payload TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (kind, key)
+        );
+    """),
+]
+
+COLUMNS = "id, kind, key, due_at, payload, attempts"
+
+Handler = Callable[[int, Any], Awaitable[None]]
+
+
+class ScheduledJob(NamedTuple):
+    id: int
+    kind: str
+    key: int
+    due_at: float
+    payload: Any
+    attempts: int
+
+
+class Scheduler:
+    """
+    Runs ``handler(key, payload)`` for a job kind once its due time has passed, surviving restarts.
+
+    Jobs are rows in SQLite and entries in a heap ordered by due time. One task sleeps
+    until the earliest job is due (or until an earlier one is scheduled), so tens of
+    thousands of pending timers cost one heap entry each instead of a sleeping
+    coroutine each. A ``(kind, key)`` pair has at most one job: scheduling it again
+    moves it, and stale heap entries are skipped when they reach the top.
+
+    A job's row is deleted once its handler returns. Handlers that raise are retried
+    with exponential backoff, up to ``max_attempts`` times.
+    """
+    def __init__(self, bot, db: Database, max_attempts: int = 3, retry_delay: float = 60.0):
+        self.bot = bot
+        self.db = db
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.handlers: Dict[str, Handler] = {}
+        self._jobs: Dict[Tuple[str, int], ScheduledJob] = {}
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._running: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+
+    def register(self, kind: str, handler: Handler):
+        self.handlers[kind] = handler
+
+    def __contains__(self, job: Tuple[str, int]) -> bool:
+        return job in self._jobs
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def pending(self, kind: str) -> List[ScheduledJob]:
+        return [job for (job_kind, _), job in self._jobs.items() if job_kind == kind]
+
+    def due_at(self, kind: str, key: int) -> Optional[float]:
+        job = self._jobs.get((kind, key))
+        return job.due_at if job else None
+
+    async def schedule(self, kind: str, key: int, due_at: float, payload: Any = None) -> ScheduledJob:
+        """
+        Schedules ``kind`` for ``key`` at the ``due_at`` timestamp, replacing any job it already had.
+        """
+        encoded = json.dumps(payload) if payload is not None else None
+        async def job(conn):
+            async with conn.execute(
+                    "INSERT INTO scheduled_jobs (kind, key, due_at, payload) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (kind, key) DO UPDATE SET due_at = excluded.due_at, payload = excluded.payload, attempts = 0 "
+                    "RETURNING id", (kind, key, due_at, encoded)) as cursor:
+                return (await cursor.fetchone())[0]
+        job_id = await self.db.transaction(job)
+        scheduled = ScheduledJob(job_id, kind, key, due_at, payload, 0)
+        self._push(scheduled)
+        return scheduled
+
+    async def cancel(self, kind: str, key: int) -> bool:
+        job = self._jobs.pop((kind, key), None)
+        await self.db.execute("DELETE FROM scheduled_jobs WHERE kind = ? AND key = ?", (kind, key))
+        return job is not None
+
+    def _push(self, job: ScheduledJob):
+        self._jobs[(job.kind, job.key)] = job
+        heapq.heappush(self._heap, (job.due_at, job.id, job.kind, job.key))
+        if self._heap[0][1] == job.id:
+            self._wakeup.set()
+
+    async def start(self):
+        """
+        Loads the pending jobs of every registered kind and starts the wakeup task. Jobs only
+        fire once the bot is ready. Kinds registered by other cogs are left alone, so each
+        cog can run its own scheduler on the shared table.
+        """
+        kinds = list(self.handlers)
+        rows = await self.db.fetchall(f"SELECT {COLUMNS} FROM scheduled_jobs WHERE kind IN ({', '.join('?' * len(kinds))})", kinds)
+        for job_id, kind, key, due_at, payload, attempts in rows:
+            job = ScheduledJob(job_id, kind, key, due_at, json.loads(payload) if payload is not None else None, attempts)
+            self._jobs[(kind, key)] = job
+            self._heap.append((due_at, job_id, kind, key))
+        heapq.heapify(self._heap)
+        if rows:
+            logger.info(f"Loaded {len(rows)} scheduled job(s)")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="scheduler")
+
+    async def stop(self):
+        """
+        Stops the wakeup task and running handlers. Their rows stay, so they run again after the next start.
+        """
+        tasks = [task for task in (self._task, *self._running) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._running.clear()
+
+    def _peek(self) -> Optional[Tuple[float, int, str, int]]:
+        # Drops heap entries of jobs that were cancelled, moved or already fired
+        while self._heap:
+            due_at, job_id, kind, key = self._heap[0]
+            job = self._jobs.get((kind, key))
+            if job is not None and job.id == job_id and job.due_at == due_at:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            head = self._peek()
+            while head is not None and head[0] <= now:
+                heapq.heappop(self._heap)
+                job = self._jobs.pop((head[2], head[3]))
+                task = asyncio.create_task(self._fire(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+                head = self._peek()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=None if head is None else head[0] - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, job: ScheduledJob):
+        self.fired += 1
+        handler = self.handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"no handler registered for {job.kind!r}")
+            await handler(job.key, job.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            attempts = job.attempts + 1
+            if attempts < self.max_attempts and (job.kind, job.key) not in self._jobs:
+                logger.error(f"Scheduled {job.kind} job for {job.key} failed, retrying: {e}")
+                due_at = time.time() + self.retry_delay * 2 ** job.attempts
+                await self.db.execute("UPDATE scheduled_jobs SET due_at = ?, attempts = ? WHERE id = ? AND due_at = ?",
+                                      (due_at, attempts, job.id, job.due_at))
+                self._push(job._replace(due_at=due_at, attempts=attempts))
+                return
+            logger.error(f"Scheduled {job.kind} job for {job.key} failed: {e}")
+        # Unless the handler scheduled the same job again (due_at moved), it is done
+        await self.db.execute("DELETE FROM scheduled_jobs WHERE id = ? AND due_at = ?", (job.id, job.due_at))
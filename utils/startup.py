@@ -0,0 +1,133 @@
+# Description: The bot's one-shot startup pipeline: timed stages, concurrent extension loads and async subprocesses
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+COMMANDS_HASH = './db/commands.sha256'
+
+
+class Stage(NamedTuple):
+    name: str
+    seconds: float
+    ok: bool = True
+    detail: str = ''
+
+
+class StartupReport:
+    """
+    Timings of the startup stages, measured from ``started`` (a ``time.perf_counter``
+    reading taken as early as possible in the process). Stages may run concurrently,
+    so ``total`` is wall time rather than the sum of the stages.
+    """
+    def __init__(self, started: float):
+        self.started = started
+        self.stages: List[Stage] = []
+        self.finished: Optional[float] = None
+
+    def record(self, name: str, seconds: float, ok: bool = True, detail: str = ''):
+        self.stages.append(Stage(name, seconds, ok, detail))
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(name, time.perf_counter() - start, False, str(e))
+            raise
+        self.record(name, time.perf_counter() - start)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def total(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def lines(self) -> List[str]:
+        lines = [f"{'✅' if stage.ok else '❌'} {stage.name:<28} {stage.seconds * 1000:8.1f}ms"
+                 + (f"  {stage.detail}" if stage.detail else "") for stage in self.stages]
+        lines.append(f"   {'total' if self.finished else 'so far':<28} {self.total * 1000:8.1f}ms")
+        return lines
+
+
+async def load_extensions(bot: commands.Bot, names: Iterable[str], report: StartupReport) -> List[str]:
+    """
+    Loads the extensions concurrently, each timed as its own stage. A failing extension
+    is logged and recorded without stopping the others. Returns the names that loaded.
+    """
+    async def load(name: str) -> bool:
+        start = time.perf_counter()
+        try:
+            await bot.load_extension(name)
+        except Exception as e:
+            report.record(name, time.perf_counter() - start, False, str(e))
+            logger.error(f"| ❌ | Error loading {name}: {e}")
+            return False
+        report.record(name, time.perf_counter() - start)
+        logger.info(f"| ✅ | Loaded {name}")
+        return True
+
+    names = list(names)
+    with report.stage(f"extensions ({len(names)} concurrent)"):
+        loaded = await asyncio.gather(*(load(name) for name in names))
+    return [name for name, ok in zip(names, loaded) if ok]
+
+
+def cog_extensions(directory: str = 'cogs') -> List[str]:
+    return sorted(f"{directory}.{file[:-3]}" for file in os.listdir(directory) if file.endswith('.py'))
+
+
+async def run_command(*args: str, timeout: float = 60.0) -> Tuple[Optional[int], str]:
+    """
+    Runs a program without blocking the event loop. Returns its exit code (None if it
+    timed out and was killed) and combined output.
+    """
+    process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None, ''
+    return process.returncode, output.decode(errors='replace').strip()
+
+
+async def clear_bytecode():
+    await run_command('find', '.', '-name', '*.pyc', '-delete')
+    await run_command('find', '.', '-name', '__pycache__', '-delete')
+
+
+async def sync_commands(bot: commands.Bot, pending: Iterable[Dict] = (), force: bool = False, path: str = COMMANDS_HASH) -> str:
+    """
+    Syncs the global application commands, but only when they differ from the last
+    sync, since Discord rate limits syncs heavily. ``pending`` holds the payloads of
+    lazy extensions that aren't loaded yet, which the tree doesn't know about but
+    must not be unregistered. Returns what was done.
+    """
+    pending = list(pending)
+    payload = sorted([*(command.to_dict(bot.tree) for command in bot.tree.get_commands()), *pending],
+                     key=lambda command: command['name'])
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    try:
+        with open(path, 'r') as file:
+            if not force and file.read().strip() == digest:
+                return f"unchanged, {len(payload)} commands"
+    except OSError:
+        pass
+    if pending:
+        synced = await bot.http.bulk_upsert_global_commands(bot.application_id, payload=payload) #type: ignore
+    else:
+        synced = await bot.tree.sync()
+    with open(path, 'w') as file:
+        file.write(digest)
+    return f"synced {len(synced)} commands"
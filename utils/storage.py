@@ -0,0 +1,266 @@
+# Description: Shared async SQLite storage layer used by every cog
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, TypeVar
+
+import aiosqlite
+
+WARNINGS_DB = './db/warnings.db'
+SUGGESTIONS_DB = './db/suggestions.db'
+OUTBOX_DB = './db/outbox.db'
+AUTOMOD_DB = './db/automod.db'
+TICKETS_DB = './db/tickets.db'
+SCHEDULER_DB = './db/scheduler.db'
+ALL_DATABASES = (WARNINGS_DB, SUGGESTIONS_DB, OUTBOX_DB, AUTOMOD_DB, TICKETS_DB, SCHEDULER_DB)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+Job = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+
+class WriteResult(NamedTuple):
+    lastrowid: Optional[int]
+    rowcount: int
+
+
+class Database:
+    """
+    A long-lived SQLite database in WAL mode.
+
+    Reads are spread over a small pool of reader connections, while every write
+    goes through one queue drained by a single writer task, so writers never
+    contend for the database lock and the event loop never blocks on SQLite.
+
+    The writer group-commits: writes already queued, plus any arriving within
+    ``batch_window`` seconds, share one transaction (up to ``max_batch`` writes)
+    and therefore one fsync. Each write still runs in its own savepoint, so a
+    failing write does not undo its neighbours, and every caller is only
+    resumed once the shared COMMIT has succeeded.
+    """
+    def __init__(self, path: str, readers: int = 4, cached_statements: int = 256,
+                 batch_window: float = 0.0, max_batch: int = 64):
+        self.path = path
+        self.reader_count = readers
+        self.cached_statements = cached_statements
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.writes = 0
+        self.commits = 0
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+        self._reader_conns: List[aiosqlite.Connection] = []
+        self._queue: "asyncio.Queue[Optional[tuple]]" = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task] = None
+
+    async def _connect(self) -> aiosqlite.Connection:
+        # isolation_level=None leaves transaction control to the writer task
+        conn = await aiosqlite.connect(self.path, isolation_level=None, cached_statements=self.cached_statements)
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=FULL")
+        await conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    async def open(self):
+        """
+        Opens the writer and reader connections and starts the writer task.
+        """
+        # The writer must be opened first so the database is switched to WAL before readers attach
+        self._writer = await self._connect()
+        for _ in range(self.reader_count):
+            conn = await self._connect()
+            self._reader_conns.append(conn)
+            self._readers.put_nowait(conn)
+        self._writer_task = asyncio.create_task(self._writer_loop(), name=f"db-writer:{self.path}")
+        logger.info(f"Opened database {self.path} with {self.reader_count} readers")
+
+    async def close(self):
+        """
+        Waits for every queued write to finish and closes all connections.
+        """
+        if self._writer_task is not None:
+            await self._queue.put(None)
+            await self._writer_task
+            self._writer_task = None
+        for conn in self._reader_conns:
+            await conn.close()
+        self._reader_conns.clear()
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+        logger.info(f"Closed database {self.path}")
+
+    async def _writer_loop(self):
+        assert self._writer is not None
+        loop = asyncio.get_running_loop()
+        backlog: List[Optional[tuple]] = []
+        while True:
+            item = backlog.pop() if backlog else await self._queue.get()
+            if item is None:
+                break
+            job, transactional, future = item
+            if not transactional:
+                await self._run_script(job, future)
+                continue
+
+            batch = [item]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    nxt = self._queue.get_nowait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        nxt = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if nxt is None or not nxt[1]:
+                    # Shutdown or a schema script: commit what we have first
+                    backlog.append(nxt)
+                    break
+                batch.append(nxt)
+            await self._run_batch(batch)
+
+    async def _run_script(self, job: Job, future: asyncio.Future):
+        try:
+            result = await job(self._writer) #type: ignore
+        except Exception as e:
+            _resolve(future, exception=e)
+        else:
+            _resolve(future, result=result)
+
+    async def _run_batch(self, batch: List[tuple]):
+        conn = self._writer
+        assert conn is not None
+        outcomes = []
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            for job, _, future in batch:
+                await conn.execute("SAVEPOINT write")
+                try:
+                    result = await job(conn)
+                except Exception as e:
+                    await conn.execute("ROLLBACK TO write")
+                    await conn.execute("RELEASE write")
+                    outcomes.append((future, None, e))
+                else:
+                    await conn.execute("RELEASE write")
+                    outcomes.append((future, result, None))
+            await conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                await conn.execute("ROLLBACK")
+            for _, _, future in batch:
+                _resolve(future, exception=e)
+            return
+        self.writes += len(batch)
+        self.commits += 1
+        for future, result, error in outcomes:
+            _resolve(future, result=result, exception=error)
+
+    async def _submit(self, job: Job, transactional: bool = True) -> Any:
+        if self._writer_task is None:
+            raise RuntimeError(f"Database {self.path} is not open.")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, transactional, future))
+        return await future
+
+    async def transaction(self, job: Callable[[aiosqlite.Connection], Awaitable[T]]) -> T:
+        """
+        Runs ``job(conn)`` on the writer connection inside a single transaction.
+        """
+        return await self._submit(job)
+
+    async def execute(self, sql: str, params: Iterable[Any] = ()) -> WriteResult:
+        """
+        Runs one write statement through the writer queue.
+        """
+        async def job(conn: aiosqlite.Connection) -> WriteResult:
+            async with conn.execute(sql, tuple(params)) as cursor:
+                return WriteResult(cursor.lastrowid, cursor.rowcount)
+        return await self._submit(job)
+
+    async def executemany(self, sql: str, seq: Iterable[Iterable[Any]]) -> WriteResult:
+        """
+        Runs one write statement for every parameter set in a single transaction.
+        """
+        rows = [tuple(params) for params in seq]
+
+        async def job(conn: aiosqlite.Connection) -> WriteResult:
+            async with conn.executemany(sql, rows) as cursor:
+                return WriteResult(cursor.lastrowid, cursor.rowcount)
+        return await self._submit(job)
+
+    async def executescript(self, script: str):
+        """
+        Runs a multi-statement script (schema creation) on the writer connection.
+        """
+        async def job(conn: aiosqlite.Connection):
+            await conn.executescript(script)
+        await self._submit(job, transactional=False)
+
+    @asynccontextmanager
+    async def reader(self):
+        """
+        Borrows a reader connection from the pool.
+        """
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    async def fetchone(self, sql: str, params: Iterable[Any] = ()) -> Optional[tuple]:
+        async with self.reader() as conn:
+            async with conn.execute(sql, tuple(params)) as cursor:
+                return await cursor.fetchone()
+
+    async def fetchall(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        async with self.reader() as conn:
+            async with conn.execute(sql, tuple(params)) as cursor:
+                return list(await cursor.fetchall())
+
+
+def _resolve(future: asyncio.Future, result: Any = None, exception: Optional[BaseException] = None):
+    # The caller may have been cancelled while its write was in flight
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+_databases: Dict[str, Database] = {}
+# One lock per path, so cogs loading concurrently open different databases in parallel
+_open_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def get_database(path: str, **settings: Any) -> Database:
+    """
+    Returns the shared, already opened Database for ``path``.
+
+    ``settings`` (e.g. ``batch_window``, ``max_batch``) are applied to the database
+    whether it is opened by this call or was already open.
+    """
+    async with _open_locks.setdefault(path, asyncio.Lock()):
+        db = _databases.get(path) or Database(path)
+        for name, value in settings.items():
+            setattr(db, name, value)
+        if path not in _databases:
+            await db.open()
+            _databases[path] = db
+        return db
+
+
+async def close_all():
+    """
+    Flushes pending writes and closes every shared database.
+    """
+    for path, db in list(_databases.items()):
+        async with _open_locks.setdefault(path, asyncio.Lock()):
+            await db.close()
+            _databases.pop(path, None)
@@ -0,0 +1,531 @@
+# Description: Schema and queries for suggestions and their votes
+import math
+from typing import Any, AsyncIterator, List, NamedTuple, Optional, Tuple
+
+from utils import minhash
+from utils.migrations import Migration
+from utils.storage import Database
+
+
+async def _add_signatures(conn):
+    """
+    Stores a MinHash signature on every suggestion and indexes its LSH bands, so similar
+    suggestions are found by a few index lookups instead of comparing against every row.
+    """
+    await conn.execute("ALTER TABLE suggestions ADD COLUMN minhash BLOB")
+    await conn.execute("""
+        CREATE TABLE suggestion_bands (
+            band INTEGER NOT NULL,
+            hash INTEGER NOT NULL,
+            suggestion_id INTEGER NOT NULL,
+            PRIMARY KEY (band, hash, suggestion_id)
+        ) WITHOUT ROWID
+    """)
+    last_id = 0
+    while True:
+        async with conn.execute("SELECT id, suggestion FROM suggestions WHERE id > ? ORDER BY id LIMIT 1000", (last_id,)) as cursor:
+            rows = await cursor.fetchall()
+        if not rows:
+            return
+        signatures = [(suggestion_id, minhash.signature(text or "")) for suggestion_id, text in rows]
+        await conn.executemany("UPDATE suggestions SET minhash = ? WHERE id = ?",
+                               [(minhash.pack(sig), suggestion_id) for suggestion_id, sig in signatures])
+        await conn.executemany("INSERT OR IGNORE INTO suggestion_bands (band, hash, suggestion_id) VALUES (?, ?, ?)",
+                               [(band, key, suggestion_id) for suggestion_id, sig in signatures for band, key in minhash.bands(sig)])
+        last_id = rows[-1][0]
+
+
+def wilson_lower_bound(upvotes: int, downvotes: int, z: float = 1.96) -> float:
+    """
+    Lower bound of the 95% Wilson interval for the share of upvotes, so a suggestion with
+    few votes ranks below one with many votes at a similar ratio. "nota" votes are
+    abstentions and count toward neither side.
+    """
+    n = upvotes + downvotes
+    if n == 0:
+        return 0.0
+    p = upvotes / n
+    return (p + z * z / (2 * n) - z * math.sqrt((p * (1 - p) + z * z / (4 * n)) / n)) / (1 + z * z / n)
+
+
+async def _add_scores(conn):
+    await conn.execute("ALTER TABLE suggestion_tallies ADD COLUMN score REAL NOT NULL DEFAULT 0")
+    async with conn.execute("SELECT message_id, upvotes, downvotes FROM suggestion_tallies") as cursor:
+        rows = await cursor.fetchall()
+    await conn.executemany("UPDATE suggestion_tallies SET score = ? WHERE message_id = ?",
+                           [(wilson_lower_bound(upvotes, downvotes), message_id) for message_id, upvotes, downvotes in rows])
+    await conn.execute("CREATE INDEX idx_tallies_score ON suggestion_tallies (score, message_id)")
+
+
+MIGRATIONS = [
+    Migration(1, "suggestions and votes tables", """
+        CREATE TABLE IF NOT EXISTS suggestions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            suggestion TEXT,
+            message_link TEXT
+        );
+        CREATE TABLE IF NOT EXISTS votes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id INTEGER,
+            user_id INTEGER,
+            vote_type TEXT
+        );
+    """),
+    # Votes are keyed by message id, so suggestions need it too to be looked up from a button click.
+    # Existing rows get it from the trailing number of their jump URL.
+    Migration(2, "message id on suggestions", """
+        ALTER TABLE suggestions ADD COLUMN message_id INTEGER;
+        UPDATE suggestions
+            SET message_id = CAST(substr(message_link, length(rtrim(message_link, '0123456789')) + 1) AS INTEGER)
+            WHERE message_link IS NOT NULL;
+        CREATE INDEX idx_suggestions_message ON suggestions (message_id);
+    """),
+    # One vote per member per suggestion, enforced by the index rather than a read before every write,
+    # and per-suggestion counts kept in step with votes by triggers so a click never scans the votes.
+    Migration(3, "unique votes and materialized tallies", """
+        DELETE FROM votes WHERE id NOT IN (SELECT MIN(id) FROM votes GROUP BY message_id, user_id);
+        CREATE UNIQUE INDEX idx_votes_message_user ON votes (message_id, user_id);
+        CREATE TABLE suggestion_tallies (
+            message_id INTEGER PRIMARY KEY,
+            upvotes INTEGER NOT NULL DEFAULT 0,
+            downvotes INTEGER NOT NULL DEFAULT 0,
+            nota INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT INTO suggestion_tallies (message_id, upvotes, downvotes, nota)
+            SELECT message_id, SUM(vote_type = 'upvote'), SUM(vote_type = 'downvote'), SUM(vote_type = 'nota')
+            FROM votes GROUP BY message_id;
+        CREATE TRIGGER votes_tally_insert AFTER INSERT ON votes BEGIN
+            INSERT INTO suggestion_tallies (message_id, upvotes, downvotes, nota)
+                VALUES (NEW.message_id, NEW.vote_type = 'upvote', NEW.vote_type = 'downvote', NEW.vote_type = 'nota')
+                ON CONFLICT (message_id) DO UPDATE SET
+                    upvotes = upvotes + excluded.upvotes,
+                    downvotes = downvotes + excluded.downvotes,
+                    nota = nota + excluded.nota;
+        END;
+        CREATE TRIGGER votes_tally_delete AFTER DELETE ON votes BEGIN
+            UPDATE suggestion_tallies SET
+                upvotes = upvotes - (OLD.vote_type = 'upvote'),
+                downvotes = downvotes - (OLD.vote_type = 'downvote'),
+                nota = nota - (OLD.vote_type = 'nota')
+                WHERE message_id = OLD.message_id;
+        END;
+        CREATE TRIGGER votes_tally_update AFTER UPDATE OF message_id, vote_type ON votes BEGIN
+            UPDATE suggestion_tallies SET
+                upvotes = upvotes - (OLD.vote_type = 'upvote'),
+                downvotes = downvotes - (OLD.vote_type = 'downvote'),
+                nota = nota - (OLD.vote_type = 'nota')
+                WHERE message_id = OLD.message_id;
+            INSERT INTO suggestion_tallies (message_id, upvotes, downvotes, nota)
+                VALUES (NEW.message_id, NEW.vote_type = 'upvote', NEW.vote_type = 'downvote', NEW.vote_type = 'nota')
+                ON CONFLICT (message_id) DO UPDATE SET
+                    upvotes = upvotes + excluded.upvotes,
+                    downvotes = downvotes + excluded.downvotes,
+                    nota = nota + excluded.nota;
+        END;
+    """),
+    # Creation time is recovered from the message snowflake for existing suggestions
+    Migration(4, "status, author and creation time", """
+        ALTER TABLE suggestions ADD COLUMN status TEXT NOT NULL DEFAULT 'open';
+        ALTER TABLE suggestions ADD COLUMN author_id INTEGER;
+        ALTER TABLE suggestions ADD COLUMN created_at INTEGER NOT NULL DEFAULT 0;
+        UPDATE suggestions SET created_at = ((message_id >> 22) + 1420070400000) / 1000 WHERE message_id IS NOT NULL;
+        CREATE INDEX idx_suggestions_created ON suggestions (created_at, id);
+        CREATE INDEX idx_suggestions_status_created ON suggestions (status, created_at, id);
+    """),
+    # External content full-text index over suggestions, kept in sync by triggers
+    Migration(5, "full-text search", """
+        CREATE VIRTUAL TABLE suggestions_fts USING fts5(
+            suggestion, content='suggestions', content_rowid='id', tokenize='porter unicode61'
+        );
+        INSERT INTO suggestions_fts (suggestions_fts) VALUES ('rebuild');
+        CREATE TRIGGER suggestions_fts_insert AFTER INSERT ON suggestions BEGIN
+            INSERT INTO suggestions_fts (rowid, suggestion) VALUES (NEW.id, NEW.suggestion);
+        END;
+        CREATE TRIGGER suggestions_fts_delete AFTER DELETE ON suggestions BEGIN
+            INSERT INTO suggestions_fts (suggestions_fts, rowid, suggestion) VALUES ('delete', OLD.id, OLD.suggestion);
+        END;
+        CREATE TRIGGER suggestions_fts_update AFTER UPDATE OF suggestion ON suggestions BEGIN
+            INSERT INTO suggestions_fts (suggestions_fts, rowid, suggestion) VALUES ('delete', OLD.id, OLD.suggestion);
+            INSERT INTO suggestions_fts (rowid, suggestion) VALUES (NEW.id, NEW.suggestion);
+        END;
+    """),
+    Migration(6, "near-duplicate signatures", _add_signatures),
+    # Kept current by toggle_vote rather than by a trigger, as SQLite builds may lack sqrt()
+    Migration(7, "wilson score on tallies", _add_scores),
+    # Archived suggestions keep their counts in suggestion_tallies after their vote rows are
+    # compacted away, so deleting those rows must not decrement the tally
+    Migration(8, "suggestion lifecycle and vote compaction", """
+        ALTER TABLE suggestions ADD COLUMN closed_at INTEGER;
+        ALTER TABLE suggestions ADD COLUMN compacted_at INTEGER;
+        CREATE INDEX idx_suggestions_uncompacted ON suggestions (id) WHERE status = 'archived' AND compacted_at IS NULL;
+        CREATE INDEX idx_suggestions_closed ON suggestions (closed_at) WHERE status IN ('accepted', 'rejected');
+        DROP TRIGGER votes_tally_delete;
+        CREATE TRIGGER votes_tally_delete AFTER DELETE ON votes
+            WHEN NOT EXISTS (SELECT 1 FROM suggestions WHERE message_id = OLD.message_id AND status = 'archived')
+        BEGIN
+            UPDATE suggestion_tallies SET
+                upvotes = upvotes - (OLD.vote_type = 'upvote'),
+                downvotes = downvotes - (OLD.vote_type = 'downvote'),
+                nota = nota - (OLD.vote_type = 'nota')
+                WHERE message_id = OLD.message_id;
+        END;
+    """),
+]
+
+VOTE_TYPES = ("upvote", "downvote", "nota")
+STATUSES = ("open", "accepted", "rejected", "archived")
+# Allowed status changes. Archived is final: its vote rows are compacted away, so
+# reopening it would let members vote a second time.
+TRANSITIONS = {
+    "open": {"accepted", "rejected", "archived"},
+    "accepted": {"open", "rejected", "archived"},
+    "rejected": {"open", "accepted", "archived"},
+    "archived": set(),
+}
+
+
+class Tally(NamedTuple):
+    upvotes: int = 0
+    downvotes: int = 0
+    nota: int = 0
+
+
+class SuggestionRecord(NamedTuple):
+    id: int
+    suggestion: str
+    message_link: Optional[str]
+    message_id: Optional[int]
+    author_id: Optional[int]
+    status: str
+    created_at: int
+    upvotes: int
+    downvotes: int
+    nota: int
+
+    @property
+    def score(self) -> int:
+        return self.upvotes - self.downvotes
+
+
+class SuggestionFilter(NamedTuple):
+    status: Optional[str] = None
+    since: Optional[int] = None  # unix seconds, inclusive
+    until: Optional[int] = None  # unix seconds, exclusive
+    min_score: Optional[int] = None
+    max_score: Optional[int] = None
+
+    def where(self) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if self.status is not None:
+            clauses.append("s.status = ?")
+            params.append(self.status)
+        if self.since is not None:
+            clauses.append("s.created_at >= ?")
+            params.append(self.since)
+        if self.until is not None:
+            clauses.append("s.created_at < ?")
+            params.append(self.until)
+        if self.min_score is not None:
+            clauses.append("COALESCE(t.upvotes - t.downvotes, 0) >= ?")
+            params.append(self.min_score)
+        if self.max_score is not None:
+            clauses.append("COALESCE(t.upvotes - t.downvotes, 0) <= ?")
+            params.append(self.max_score)
+        return " AND ".join(clauses) or "1", params
+
+
+COLUMNS = ("s.id, s.suggestion, s.message_link, s.message_id, s.author_id, s.status, s.created_at, "
+           "COALESCE(t.upvotes, 0), COALESCE(t.downvotes, 0), COALESCE(t.nota, 0)")
+FROM = "suggestions s LEFT JOIN suggestion_tallies t ON t.message_id = s.message_id"
+
+
+class SearchResult(NamedTuple):
+    id: int
+    message_link: Optional[str]
+    status: str
+    snippet: str
+
+
+class SimilarSuggestion(NamedTuple):
+    id: int
+    suggestion: str
+    message_link: Optional[str]
+    similarity: float
+
+
+class LeaderboardEntry(NamedTuple):
+    id: int
+    suggestion: str
+    message_link: Optional[str]
+    message_id: int
+    upvotes: int
+    downvotes: int
+    nota: int
+    score: float
+
+
+class VoteOutcome(NamedTuple):
+    action: str  # "added", "removed", "conflict" or "closed"
+    existing_vote: Optional[str]
+    tally: Optional[Tally]  # counts after the change, None on a conflict
+
+
+class SuggestionStore:
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def add(self, suggestion: str, message_id: int, message_link: str, author_id: int, created_at: int,
+                  signature: Optional[Tuple[int, ...]] = None) -> int:
+        """
+        Stores a suggestion along with its MinHash signature and LSH bands.
+        Pass the ``signature`` computed for find_similar to avoid hashing the text twice.
+        """
+        signature = signature or minhash.signature(suggestion)
+
+        async def job(conn):
+            async with conn.execute(
+                    "INSERT INTO suggestions (suggestion, message_link, message_id, author_id, created_at, minhash) "
+                    "VALUES (?, ?, ?, ?, ?, ?) RETURNING id",
+                    (suggestion, message_link, message_id, author_id, created_at, minhash.pack(signature))) as cursor:
+                suggestion_id = (await cursor.fetchone())[0]
+            await conn.executemany("INSERT OR IGNORE INTO suggestion_bands (band, hash, suggestion_id) VALUES (?, ?, ?)",
+                                   [(band, key, suggestion_id) for band, key in minhash.bands(signature)])
+            return suggestion_id
+
+        return await self.db.transaction(job)
+
+    async def find_similar(self, signature: Tuple[int, ...], threshold: float = 0.5, limit: int = 3,
+                           max_candidates: int = 50) -> List[SimilarSuggestion]:
+        """
+        Returns the suggestions whose estimated similarity to ``signature`` is at least ``threshold``, most similar first.
+        Candidates come from the band index, so the cost depends on how many near matches exist, not on the table size.
+        """
+        keys = minhash.bands(signature)
+        # Candidates sharing the most bands are the likeliest matches, so those are checked first
+        rows = await self.db.fetchall(
+            "WITH keys (band, hash) AS (VALUES " + ", ".join("(?, ?)" for _ in keys) + "), "
+            "candidates AS (SELECT b.suggestion_id FROM keys CROSS JOIN suggestion_bands b "
+            "ON b.band = keys.band AND b.hash = keys.hash GROUP BY b.suggestion_id ORDER BY COUNT(*) DESC LIMIT ?) "
+            "SELECT s.id, s.suggestion, s.message_link, s.minhash FROM candidates JOIN suggestions s ON s.id = candidates.suggestion_id",
+            (*(value for key in keys for value in key), max_candidates))
+        similar = []
+        for suggestion_id, text, message_link, blob in rows:
+            if blob is None:
+                continue
+            score = minhash.similarity(signature, minhash.unpack(blob))
+            if score >= threshold:
+                similar.append(SimilarSuggestion(suggestion_id, text, message_link, score))
+        similar.sort(key=lambda item: item.similarity, reverse=True)
+        return similar[:limit]
+
+    async def search(self, query: str, limit: int = 10) -> List[SearchResult]:
+        """
+        Full-text search ranked by bm25. Every word of ``query`` must match, with stemming.
+        """
+        terms = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+        if not terms:
+            return []
+        rows = await self.db.fetchall(
+            "SELECT s.id, s.message_link, s.status, snippet(suggestions_fts, 0, '**', '**', '...', 16) "
+            "FROM suggestions_fts JOIN suggestions s ON s.id = suggestions_fts.rowid "
+            "WHERE suggestions_fts MATCH ? ORDER BY rank LIMIT ?", (terms, limit))
+        return [SearchResult(*row) for row in rows]
+
+    async def get(self, suggestion_id: int) -> Optional[SuggestionRecord]:
+        row = await self.db.fetchone(f"SELECT {COLUMNS} FROM {FROM} WHERE s.id = ?", (suggestion_id,))
+        return SuggestionRecord(*row) if row else None
+
+    async def set_status(self, suggestion_id: int, status: str, now: int) -> SuggestionRecord:
+        """
+        Moves a suggestion to another lifecycle state.
+        Raises ValueError with a message for the user if the suggestion is missing or the change is not allowed.
+        """
+        async def job(conn):
+            async with conn.execute("SELECT status FROM suggestions WHERE id = ?", (suggestion_id,)) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                raise ValueError(f"Suggestion #{suggestion_id} does not exist.")
+            if status not in TRANSITIONS[row[0]]:
+                raise ValueError(f"Suggestion #{suggestion_id} is {row[0]} and can't be changed to {status}.")
+            await conn.execute("UPDATE suggestions SET status = ?, closed_at = ? WHERE id = ?",
+                               (status, None if status == "open" else now, suggestion_id))
+
+        await self.db.transaction(job)
+        return await self.get(suggestion_id) #type: ignore
+
+    async def archive_closed(self, before: int) -> int:
+        """
+        Archives accepted and rejected suggestions that were closed before ``before``.
+        """
+        result = await self.db.execute(
+            "UPDATE suggestions SET status = 'archived' WHERE status IN ('accepted', 'rejected') AND closed_at < ?", (before,))
+        return result.rowcount
+
+    async def compact_archived(self, batch_size: int = 100) -> Tuple[int, int]:
+        """
+        Deletes the per-member vote rows of archived suggestions, leaving only their tally rows.
+
+        Voting is closed for good once archived, so no record of who voted is needed to
+        prevent double votes. Works ``batch_size`` suggestions per transaction so votes on
+        open suggestions are never held up for long. Returns (suggestions, votes) compacted.
+        """
+        suggestions = votes = 0
+        while True:
+            async def job(conn):
+                async with conn.execute("SELECT id, message_id FROM suggestions INDEXED BY idx_suggestions_uncompacted "
+                                        "WHERE status = 'archived' AND compacted_at IS NULL LIMIT ?", (batch_size,)) as cursor:
+                    rows = await cursor.fetchall()
+                if not rows:
+                    return 0, 0
+                placeholders = ", ".join("?" for _ in rows)
+                async with conn.execute(f"DELETE FROM votes WHERE message_id IN ({placeholders})",
+                                        [message_id for _, message_id in rows]) as cursor:
+                    deleted = cursor.rowcount
+                await conn.execute(f"UPDATE suggestions SET compacted_at = strftime('%s', 'now') WHERE id IN ({placeholders})",
+                                   [suggestion_id for suggestion_id, _ in rows])
+                return len(rows), deleted
+
+            compacted, deleted = await self.db.transaction(job)
+            if not compacted:
+                return suggestions, votes
+            suggestions += compacted
+            votes += deleted
+
+    async def _vacuum_state(self) -> Tuple[int, int]:
+        # Asked on the writer: reader connections keep reporting the auto_vacuum mode they opened with
+        async def job(conn):
+            async with conn.execute("PRAGMA auto_vacuum") as cursor:
+                mode = (await cursor.fetchone())[0]
+            async with conn.execute("PRAGMA freelist_count") as cursor:
+                return mode, (await cursor.fetchone())[0]
+        return await self.db.transaction(job)
+
+    async def enable_incremental_vacuum(self) -> bool:
+        """
+        Switches the database to incremental auto-vacuum, which takes a full VACUUM (instant
+        while it has no tables yet). Call it at startup, before the store serves anything.
+        Returns True if existing data had to be rewritten.
+        """
+        mode, _ = await self._vacuum_state()
+        if mode == 2:
+            return False
+        has_tables = await self.db.fetchone("SELECT 1 FROM sqlite_master WHERE type = 'table' LIMIT 1")
+        await self.db.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM;")
+        return has_tables is not None
+
+    async def reclaim_space(self, pages: int = 1000) -> int:
+        """
+        Returns up to ``pages`` free pages to the file system with incremental VACUUM and reports how many were freed.
+
+        Each call is one short step on the writer. Does nothing until ``enable_incremental_vacuum`` has run.
+        """
+        mode, free = await self._vacuum_state()
+        if mode != 2 or not free:
+            return 0
+        await self.db.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+        return min(free, pages)
+
+    async def page(self, filters: SuggestionFilter = SuggestionFilter(), after: Optional[Tuple[int, int]] = None,
+                   before: Optional[Tuple[int, int]] = None, limit: int = 10) -> List[SuggestionRecord]:
+        """
+        Returns up to ``limit`` matching suggestions newest first, strictly after or before a ``(created_at, id)`` cursor.
+        """
+        where, params = filters.where()
+        if before is not None:
+            rows = await self.db.fetchall(
+                f"SELECT {COLUMNS} FROM {FROM} WHERE {where} AND (s.created_at, s.id) > (?, ?) "
+                "ORDER BY s.created_at, s.id LIMIT ?", (*params, *before, limit))
+            rows.reverse()
+        elif after is not None:
+            rows = await self.db.fetchall(
+                f"SELECT {COLUMNS} FROM {FROM} WHERE {where} AND (s.created_at, s.id) < (?, ?) "
+                "ORDER BY s.created_at DESC, s.id DESC LIMIT ?", (*params, *after, limit))
+        else:
+            rows = await self.db.fetchall(
+                f"SELECT {COLUMNS} FROM {FROM} WHERE {where} ORDER BY s.created_at DESC, s.id DESC LIMIT ?", (*params, limit))
+        return [SuggestionRecord(*row) for row in rows]
+
+    async def batches(self, filters: SuggestionFilter = SuggestionFilter(), size: int = 500) -> AsyncIterator[List[SuggestionRecord]]:
+        """
+        Yields every matching suggestion newest first, ``size`` rows at a time.
+
+        Each batch is its own keyset query, so memory stays bounded and no reader
+        connection is held between batches.
+        """
+        cursor = None
+        while True:
+            batch = await self.page(filters, after=cursor, limit=size)
+            if not batch:
+                return
+            yield batch
+            if len(batch) < size:
+                return
+            cursor = (batch[-1].created_at, batch[-1].id)
+
+    async def toggle_vote(self, message_id: int, user_id: int, vote_type: str) -> VoteOutcome:
+        """
+        Adds the vote, or removes it if the user clicks the same button again.
+        A user who already voted for a different option is refused.
+
+        The unique (message_id, user_id) index makes a first vote a single upsert, and the
+        tally triggers mean the new counts are one primary key read in the same transaction.
+        The suggestion's leaderboard score is updated from those counts in the same transaction.
+        """
+        async def job(conn):
+            async with conn.execute("SELECT status FROM suggestions WHERE message_id = ?", (message_id,)) as cursor:
+                status = await cursor.fetchone()
+            if status is not None and status[0] != "open":
+                return VoteOutcome("closed", None, None)
+
+            async with conn.execute("INSERT INTO votes (message_id, user_id, vote_type) VALUES (?, ?, ?) "
+                                    "ON CONFLICT (message_id, user_id) DO NOTHING RETURNING id",
+                                    (message_id, user_id, vote_type)) as cursor:
+                inserted = await cursor.fetchone()
+
+            if inserted:
+                action = "added"
+            else:
+                async with conn.execute("DELETE FROM votes WHERE message_id = ? AND user_id = ? AND vote_type = ? RETURNING id",
+                                        (message_id, user_id, vote_type)) as cursor:
+                    removed = await cursor.fetchone()
+                if not removed:
+                    async with conn.execute("SELECT vote_type FROM votes WHERE message_id = ? AND user_id = ?", (message_id, user_id)) as cursor:
+                        existing_vote = await cursor.fetchone()
+                    return VoteOutcome("conflict", existing_vote[0] if existing_vote else None, None)
+                action = "removed"
+
+            async with conn.execute("SELECT upvotes, downvotes, nota FROM suggestion_tallies WHERE message_id = ?", (message_id,)) as cursor:
+                row = await cursor.fetchone()
+            tally = Tally(*row) if row else Tally()
+            await conn.execute("UPDATE suggestion_tallies SET score = ? WHERE message_id = ?",
+                               (wilson_lower_bound(tally.upvotes, tally.downvotes), message_id))
+            return VoteOutcome(action, None, tally)
+
+        return await self.db.transaction(job)
+
+    async def leaderboard(self, after: Optional[Tuple[float, int]] = None, before: Optional[Tuple[float, int]] = None,
+                          limit: int = 10) -> List[LeaderboardEntry]:
+        """
+        Returns up to ``limit`` suggestions best score first, strictly after or before a ``(score, message_id)`` cursor.
+        Every page is a range read of the score index, however many votes there are.
+        """
+        columns = "s.id, s.suggestion, s.message_link, t.message_id, t.upvotes, t.downvotes, t.nota, t.score"
+        # CROSS JOIN keeps the score index as the outer loop, so the planner can't pick a scan of suggestions
+        source = "suggestion_tallies t CROSS JOIN suggestions s ON s.message_id = t.message_id"
+        if before is not None:
+            rows = await self.db.fetchall(
+                f"SELECT {columns} FROM {source} WHERE (t.score, t.message_id) > (?, ?) "
+                "ORDER BY t.score, t.message_id LIMIT ?", (*before, limit))
+            rows.reverse()
+        elif after is not None:
+            rows = await self.db.fetchall(
+                f"SELECT {columns} FROM {source} WHERE (t.score, t.message_id) < (?, ?) "
+                "ORDER BY t.score DESC, t.message_id DESC LIMIT ?", (*after, limit))
+        else:
+            rows = await self.db.fetchall(
+                f"SELECT {columns} FROM {source} ORDER BY t.score DESC, t.message_id DESC LIMIT ?", (limit,))
+        return [LeaderboardEntry(*row) for row in rows]
+
+    async def tally(self, message_id: int) -> Tally:
+        row = await self.db.fetchone("SELECT upvotes, downvotes, nota FROM suggestion_tallies WHERE message_id = ?", (message_id,))
+        return Tally(*row) if row else Tally()
@@ -0,0 +1,161 @@
+# Description: Keyed token buckets and an in-flight cap with queue positions, for interaction-triggered REST work
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedLimiter:
+    """
+    One token bucket of ``burst`` tokens refilled at ``rate`` per second for every key.
+
+    Each bucket is stored as a single float, the time at which it will be full again
+    (the GCRA form of a token bucket), so refill is computed lazily on access and a
+    key costs one dict entry. A bucket past that time is indistinguishable from a new
+    one, so such buckets are dropped every ``evict_interval`` seconds without losing state.
+    """
+    __slots__ = ("interval", "tolerance", "full_at", "evict_interval", "next_eviction")
+
+    def __init__(self, rate: float, burst: int, evict_interval: float = 60.0):
+        self.configure(rate, burst)
+        self.full_at: Dict[Hashable, float] = {}
+        self.evict_interval = evict_interval
+        self.next_eviction = 0.0
+
+    def configure(self, rate: float, burst: int):
+        self.interval = 1 / rate
+        self.tolerance = (burst - 1) * self.interval
+
+    def retry_after(self, key: Hashable, now: float) -> float:
+        """
+        Seconds until ``key`` has a token, 0 if it has one now. Does not take it.
+        """
+        if now >= self.next_eviction:
+            self.evict(now)
+        full_at = self.full_at.get(key, now)
+        return max(0.0, full_at - now - self.tolerance)
+
+    def take(self, key: Hashable, now: float):
+        self.full_at[key] = max(self.full_at.get(key, now), now) + self.interval
+
+    def acquire(self, key: Hashable, now: float) -> float:
+        """
+        Takes a token if there is one. Returns 0 on success, otherwise the seconds to wait.
+        """
+        wait = self.retry_after(key, now)
+        if not wait:
+            self.take(key, now)
+        return wait
+
+    def evict(self, now: float) -> int:
+        before = len(self.full_at)
+        self.full_at = {key: full_at for key, full_at in self.full_at.items() if full_at > now}
+        self.next_eviction = now + self.evict_interval
+        return before - len(self.full_at)
+
+    def __len__(self) -> int:
+        return len(self.full_at)
+
+
+class InFlightLimiter:
+    """
+    Lets at most ``limit`` holders run at once; the rest wait in arrival order and are
+    told their position in the queue. Failing to tell them doesn't cost them their place.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self, on_queued: Optional[Callable[[int], Awaitable[None]]] = None):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                if on_queued is not None:
+                    try:
+                        await on_queued(len(self._waiters))
+                    except Exception as e:
+                        logger.warning(f"Failed to report queue position: {e}")
+                await waiter
+            except BaseException:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just as we gave up on it
+                    self._release()
+                else:
+                    waiter.cancel()
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def set_limit(self, limit: int):
+        self.limit = limit
+        while self.active < self.limit and self._wake_next():
+            self.active += 1
+
+    def _wake_next(self) -> bool:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return True
+        return False
+
+    def _release(self):
+        # The slot passes straight to the next waiter, so ``active`` stays the same,
+        # unless the limit was lowered since it was taken
+        if self.active <= self.limit and self._wake_next():
+            return
+        self.active -= 1
+
+
+class TicketThrottle:
+    """
+    Per-user and per-guild buckets in front of ticket creation, plus a cap on channel
+    creations in flight. A token is only taken when both buckets have one, so a
+    refused request doesn't use up the other bucket.
+    """
+    def __init__(self, user_rate: float, user_burst: int, guild_rate: float, guild_burst: int, max_in_flight: int):
+        self.users = KeyedLimiter(user_rate, user_burst)
+        self.guilds = KeyedLimiter(guild_rate, guild_burst)
+        self.in_flight = InFlightLimiter(max_in_flight)
+
+    def configure(self, user_rate: float, user_burst: int, guild_rate: float, guild_burst: int, max_in_flight: int):
+        """
+        Applies new limits without forgetting the current buckets or queue.
+        """
+        self.users.configure(user_rate, user_burst)
+        self.guilds.configure(guild_rate, guild_burst)
+        self.in_flight.set_limit(max_in_flight)
+
+    def check(self, guild_id: int, user_id: int, now: Optional[float] = None) -> Optional[str]:
+        """
+        Takes a token from both buckets. Returns None when allowed, otherwise what ran out ("user" or "guild").
+        """
+        now = time.monotonic() if now is None else now
+        if self.users.retry_after(user_id, now):
+            return "user"
+        if self.guilds.retry_after(guild_id, now):
+            return "guild"
+        self.users.take(user_id, now)
+        self.guilds.take(guild_id, now)
+        return None
+
+    def retry_after(self, guild_id: int, user_id: int, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        return max(self.users.retry_after(user_id, now), self.guilds.retry_after(guild_id, now))
@@ -0,0 +1,246 @@
+# Description: Schema and queries for the ticket registry
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from utils.migrations import Migration
+from utils.storage import Database
+
+MIGRATIONS = [
+    Migration(1, "ticket registry", """
+        CREATE TABLE tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER UNIQUE,
+            owner_id INTEGER NOT NULL,
+            ticket_type TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'open',
+            claimer_id INTEGER,
+            created_at INTEGER NOT NULL,
+            claimed_at INTEGER,
+            closed_at INTEGER
+        );
+        CREATE INDEX idx_tickets_owner ON tickets (guild_id, owner_id, status);
+        -- Unclaimed tickets are the claimer_id IS NULL range of this index
+        CREATE INDEX idx_tickets_claimer ON tickets (claimer_id, status, guild_id, created_at, id);
+    """),
+    Migration(2, "transcript export progress", """
+        CREATE TABLE transcripts (
+            channel_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            channel_name TEXT NOT NULL,
+            closer_id INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'exporting',
+            last_message_id INTEGER,
+            messages INTEGER NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL DEFAULT 0,
+            delete_at REAL NOT NULL,
+            created_at INTEGER NOT NULL,
+            finished_at INTEGER
+        );
+        CREATE INDEX idx_transcripts_pending ON transcripts (status) WHERE status != 'done';
+    """),
+    Migration(3, "ticket activity", """
+        ALTER TABLE tickets ADD COLUMN last_activity_at INTEGER;
+    """),
+]
+
+COLUMNS = "id, guild_id, channel_id, owner_id, ticket_type, status, claimer_id, created_at, claimed_at, closed_at"
+TRANSCRIPT_COLUMNS = "channel_id, guild_id, channel_name, closer_id, path, status, last_message_id, messages, size, delete_at"
+
+
+class TicketRecord(NamedTuple):
+    id: int
+    guild_id: int
+    channel_id: Optional[int]
+    owner_id: int
+    ticket_type: str
+    status: str  # "open" or "closed"
+    claimer_id: Optional[int]
+    created_at: int
+    claimed_at: Optional[int]
+    closed_at: Optional[int]
+
+
+class TranscriptJob(NamedTuple):
+    channel_id: int
+    guild_id: int
+    channel_name: str
+    closer_id: int
+    path: str
+    status: str  # "exporting", "exported" (channel may still need deleting) or "done"
+    last_message_id: Optional[int]  # last message safely written to ``path``
+    messages: int
+    size: int  # bytes of ``path`` covered by the checkpoint, anything past it is a partial write
+    delete_at: float
+
+
+class TicketStore:
+    """
+    Ticket queries. Per-member, per-claimer and unclaimed lookups each have their own index,
+    so none of them needs to look at Discord channels or at other members' tickets.
+    """
+    def __init__(self, db: Database, page_size: int = 10):
+        self.db = db
+        self.page_size = page_size
+
+    async def reserve(self, guild_id: int, owner_id: int, ticket_type: str, max_open: int) -> Optional[int]:
+        """
+        Records a new open ticket, without a channel yet, unless the member already has ``max_open`` open tickets.
+
+        The limit check and the insert are one statement on the writer, so two clicks at the
+        same moment can't both get past the limit. Returns the ticket id, or None at the limit.
+        """
+        async def job(conn):
+            async with conn.execute(
+                    "INSERT INTO tickets (guild_id, owner_id, ticket_type, created_at) SELECT ?, ?, ?, ? "
+                    "WHERE (SELECT COUNT(*) FROM tickets WHERE guild_id = ? AND owner_id = ? AND status = 'open') < ? "
+                    "RETURNING id",
+                    (guild_id, owner_id, ticket_type, int(time.time()), guild_id, owner_id, max_open)) as cursor:
+                row = await cursor.fetchone()
+            return row[0] if row else None
+        return await self.db.transaction(job)
+
+    async def attach_channel(self, ticket_id: int, channel_id: int):
+        await self.db.execute("UPDATE tickets SET channel_id = ? WHERE id = ?", (channel_id, ticket_id))
+
+    async def discard(self, ticket_id: int):
+        """
+        Drops a ticket whose creation failed part way, with or without its channel attached.
+        """
+        await self.db.execute("DELETE FROM tickets WHERE id = ?", (ticket_id,))
+
+    async def discard_stale(self, older_than: float) -> int:
+        """
+        Drops reservations that never got a channel (the bot stopped while creating it).
+        """
+        result = await self.db.execute("DELETE FROM tickets WHERE channel_id IS NULL AND status = 'open' AND created_at < ?",
+                                       (int(older_than),))
+        return result.rowcount
+
+    async def get_by_channel(self, channel_id: int) -> Optional[TicketRecord]:
+        row = await self.db.fetchone(f"SELECT {COLUMNS} FROM tickets WHERE channel_id = ?", (channel_id,))
+        return TicketRecord(*row) if row else None
+
+    async def open_channels(self) -> List[Tuple[int, int]]:
+        """
+        ``(channel_id, last activity or creation time)`` of every open ticket with a channel.
+        """
+        return await self.db.fetchall("SELECT channel_id, COALESCE(last_activity_at, created_at) FROM tickets "
+                                      "WHERE status = 'open' AND channel_id IS NOT NULL")
+
+    async def open_by_guild(self) -> List[Tuple[int, int]]:
+        """
+        ``(guild_id, channel_id)`` of every open ticket with a channel.
+        """
+        return await self.db.fetchall("SELECT guild_id, channel_id FROM tickets WHERE status = 'open' AND channel_id IS NOT NULL")
+
+    async def claimer_loads(self) -> List[Tuple[int, int, int]]:
+        """
+        ``(guild_id, claimer_id, open tickets)`` for every staff member with open claimed tickets.
+        """
+        return await self.db.fetchall("SELECT guild_id, claimer_id, COUNT(*) FROM tickets "
+                                      "WHERE claimer_id IS NOT NULL AND status = 'open' GROUP BY guild_id, claimer_id")
+
+    async def unclaimed(self) -> List[Tuple[int, int, int, int, str, int]]:
+        """
+        ``(guild_id, id, channel_id, owner_id, ticket_type, created_at)`` of every open ticket nobody has claimed.
+        """
+        return await self.db.fetchall("SELECT guild_id, id, channel_id, owner_id, ticket_type, created_at FROM tickets "
+                                      "WHERE claimer_id IS NULL AND status = 'open' AND channel_id IS NOT NULL")
+
+    async def last_activity(self, channel_id: int) -> Optional[int]:
+        row = await self.db.fetchone("SELECT COALESCE(last_activity_at, created_at) FROM tickets WHERE channel_id = ?", (channel_id,))
+        return row[0] if row else None
+
+    async def touch_many(self, activity: Dict[int, int]):
+        """
+        Stores the latest message time of each ticket channel in one write.
+        """
+        await self.db.executemany("UPDATE tickets SET last_activity_at = MAX(COALESCE(last_activity_at, 0), ?) WHERE channel_id = ?",
+                                  ((timestamp, channel_id) for channel_id, timestamp in activity.items()))
+
+    async def open_count(self, guild_id: int, owner_id: int) -> int:
+        row = await self.db.fetchone("SELECT COUNT(*) FROM tickets WHERE guild_id = ? AND owner_id = ? AND status = 'open'",
+                                     (guild_id, owner_id))
+        return row[0] if row else 0
+
+    async def claim(self, channel_id: int, claimer_id: int) -> Tuple[bool, Optional[TicketRecord]]:
+        """
+        Claims an open, unclaimed ticket. Returns whether it was claimed now and the ticket as it is
+        afterwards (None for channels that aren't registered tickets).
+        """
+        async def job(conn):
+            async with conn.execute("UPDATE tickets SET claimer_id = ?, claimed_at = ? "
+                                    "WHERE channel_id = ? AND status = 'open' AND claimer_id IS NULL RETURNING id",
+                                    (claimer_id, int(time.time()), channel_id)) as cursor:
+                claimed = await cursor.fetchone()
+            async with conn.execute(f"SELECT {COLUMNS} FROM tickets WHERE channel_id = ?", (channel_id,)) as cursor:
+                row = await cursor.fetchone()
+            return claimed is not None, TicketRecord(*row) if row else None
+        return await self.db.transaction(job)
+
+    async def close(self, channel_id: int) -> bool:
+        result = await self.db.execute("UPDATE tickets SET status = 'closed', closed_at = ? WHERE channel_id = ? AND status = 'open'",
+                                       (int(time.time()), channel_id))
+        return result.rowcount > 0
+
+    async def claimed_page(self, guild_id: int, claimer_id: int, after: Optional[Tuple[int, int]] = None,
+                           before: Optional[Tuple[int, int]] = None, limit: Optional[int] = None) -> List[TicketRecord]:
+        """
+        Open tickets claimed by ``claimer_id``, oldest first, strictly after or before a ``(created_at, id)`` cursor.
+        """
+        return await self._page("claimer_id = ? AND status = 'open' AND guild_id = ?", (claimer_id, guild_id), after, before, limit)
+
+    async def unclaimed_page(self, guild_id: int, after: Optional[Tuple[int, int]] = None,
+                             before: Optional[Tuple[int, int]] = None, limit: Optional[int] = None) -> List[TicketRecord]:
+        """
+        Open tickets nobody has claimed yet, oldest first, strictly after or before a ``(created_at, id)`` cursor.
+        """
+        return await self._page("guild_id = ? AND status = 'open' AND claimer_id IS NULL", (guild_id,), after, before, limit)
+
+    async def _page(self, where: str, params: tuple, after, before, limit) -> List[TicketRecord]:
+        limit = limit or self.page_size
+        if before is not None:
+            rows = await self.db.fetchall(
+                f"SELECT {COLUMNS} FROM tickets WHERE {where} AND (created_at, id) < (?, ?) "
+                "ORDER BY created_at DESC, id DESC LIMIT ?", (*params, *before, limit))
+            rows.reverse()
+        elif after is not None:
+            rows = await self.db.fetchall(
+                f"SELECT {COLUMNS} FROM tickets WHERE {where} AND (created_at, id) > (?, ?) "
+                "ORDER BY created_at, id LIMIT ?", (*params, *after, limit))
+        else:
+            rows = await self.db.fetchall(
+                f"SELECT {COLUMNS} FROM tickets WHERE {where} ORDER BY created_at, id LIMIT ?", (*params, limit))
+        return [TicketRecord(*row) for row in rows]
+
+    async def start_transcript(self, channel_id: int, guild_id: int, channel_name: str, closer_id: int, path: str,
+                               delete_at: float) -> Optional[TranscriptJob]:
+        """
+        Records a transcript export for a closing channel. Returns None if one was already started.
+        """
+        async def job(conn):
+            async with conn.execute(
+                    "INSERT INTO transcripts (channel_id, guild_id, channel_name, closer_id, path, delete_at, created_at) "
+                    f"VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT DO NOTHING RETURNING {TRANSCRIPT_COLUMNS}",
+                    (channel_id, guild_id, channel_name, closer_id, path, delete_at, int(time.time()))) as cursor:
+                row = await cursor.fetchone()
+            return TranscriptJob(*row) if row else None
+        return await self.db.transaction(job)
+
+    async def checkpoint_transcript(self, channel_id: int, last_message_id: int, messages: int, size: int):
+        await self.db.execute("UPDATE transcripts SET last_message_id = ?, messages = ?, size = ? WHERE channel_id = ?",
+                              (last_message_id, messages, size, channel_id))
+
+    async def set_transcript_status(self, channel_id: int, status: str):
+        await self.db.execute("UPDATE transcripts SET status = ?, finished_at = CASE ? WHEN 'done' THEN ? END WHERE channel_id = ?",
+                              (status, status, int(time.time()), channel_id))
+
+    async def get_transcript(self, channel_id: int) -> Optional[TranscriptJob]:
+        row = await self.db.fetchone(f"SELECT {TRANSCRIPT_COLUMNS} FROM transcripts WHERE channel_id = ?", (channel_id,))
+        return TranscriptJob(*row) if row else None
+
+    async def pending_transcripts(self) -> List[TranscriptJob]:
+        rows = await self.db.fetchall(f"SELECT {TRANSCRIPT_COLUMNS} FROM transcripts WHERE status != 'done' ORDER BY created_at")
+        return [TranscriptJob(*row) for row in rows]
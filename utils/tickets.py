@@ -0,0 +1,112 @@
+# Description: Ticket channel provisioning in as few REST requests as possible, with an optional warm pool
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+POOL_NAME = "ticket-pool"
+
+
+def ticket_overwrites(guild: discord.Guild, owner: discord.abc.Snowflake, role: discord.abc.Snowflake) -> Dict:
+    """
+    Permission overwrites of an open ticket: hidden from everyone but the owner, the support role and the bot.
+    """
+    return {
+        guild.default_role: discord.PermissionOverwrite(view_channel=False),
+        owner: discord.PermissionOverwrite(view_channel=True, send_messages=True),
+        role: discord.PermissionOverwrite(view_channel=True, send_messages=True),
+        guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True),
+    }
+
+
+def pool_overwrites(guild: discord.Guild) -> Dict:
+    return {
+        guild.default_role: discord.PermissionOverwrite(view_channel=False),
+        guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True),
+    }
+
+
+class TicketProvisioner:
+    """
+    Creates ticket channels with their permissions in one request and posts the header and
+    embed in a second, instead of a create, three permission edits and two sends.
+
+    With ``pool_size`` above zero, hidden channels are created ahead of time in the tickets
+    category, so a new ticket only needs one edit that renames the channel and swaps its
+    overwrites. The pool is topped up in the background after each ticket.
+    """
+    def __init__(self, pool_size: int = 0):
+        self.pool_size = pool_size
+        self.pools: Dict[int, List[int]] = {}
+        self._refills: Dict[int, asyncio.Task] = {}
+        self.pool_hits = 0
+        self.pool_misses = 0
+
+    async def provision(self, category: discord.CategoryChannel, owner: discord.abc.Snowflake, role: discord.abc.Snowflake,
+                        name: str, topic: Optional[str] = None, **message) -> discord.TextChannel:
+        """
+        Returns a ready ticket channel with ``message`` (content, embed, view...) posted in it.
+        """
+        guild = category.guild
+        overwrites = ticket_overwrites(guild, owner, role)
+        channel = self._take_pooled(category)
+        if channel is not None:
+            self.pool_hits += 1
+            try:
+                await channel.edit(name=name, topic=topic, overwrites=overwrites, reason="Ticket opened")
+            except discord.NotFound:
+                # Deleted by hand since it was pooled
+                channel = None
+        if channel is None:
+            self.pool_misses += 1
+            channel = await category.create_text_channel(name=name, topic=topic, overwrites=overwrites, reason="Ticket opened")
+
+        self.refill(category)
+        await channel.send(**message)
+        return channel
+
+    def _take_pooled(self, category: discord.CategoryChannel) -> Optional[discord.TextChannel]:
+        pool = self.pools.get(category.id)
+        while pool:
+            channel = category.guild.get_channel(pool.pop())
+            # Skip channels deleted or moved out of the category since they were pooled
+            if channel is not None and channel.category_id == category.id:
+                return channel #type: ignore
+        return None
+
+    async def warm(self, category: discord.CategoryChannel):
+        """
+        Adopts pool channels left from before a restart and creates any that are missing.
+        """
+        if not self.pool_size:
+            return
+        existing = [channel.id for channel in category.text_channels if channel.name == POOL_NAME]
+        self.pools[category.id] = existing[:self.pool_size]
+        await self._fill(category)
+
+    def refill(self, category: discord.CategoryChannel):
+        if not self.pool_size:
+            return
+        task = self._refills.get(category.id)
+        if task is None or task.done():
+            self._refills[category.id] = asyncio.create_task(self._fill(category))
+
+    async def _fill(self, category: discord.CategoryChannel):
+        pool = self.pools.setdefault(category.id, [])
+        while len(pool) < self.pool_size:
+            try:
+                channel = await category.create_text_channel(name=POOL_NAME, overwrites=pool_overwrites(category.guild),
+                                                             reason="Pre-created ticket channel")
+            except discord.HTTPException as e:
+                logger.error(f"Failed to pre-create a ticket channel: {e}")
+                return
+            pool.append(channel.id)
+
+    async def close(self):
+        for task in self._refills.values():
+            task.cancel()
+        await asyncio.gather(*self._refills.values(), return_exceptions=True)
+        self._refills.clear()
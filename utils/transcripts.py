@@ -0,0 +1,226 @@
+# Description: Streams closed ticket channels into gzip-compressed JSONL transcripts, resumable across restarts
+import asyncio
+import gzip
+import html
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import discord
+
+from utils.scheduler import Scheduler
+from utils.ticket_store import TicketStore, TranscriptJob
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_DIR = './db/transcripts'
+DELETE_JOB = "ticket_delete"
+
+HTML_HEADER = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>body{{font-family:sans-serif;background:#313338;color:#dbdee1}}.message{{margin:6px 0}}
+.author{{font-weight:bold;color:#fff}}time{{color:#949ba4;font-size:.8em;margin-left:6px}}p{{margin:2px 0;white-space:pre-wrap}}
+a{{color:#00a8fc}}</style></head><body><h1>{title}</h1>
+"""
+HTML_FOOTER = "</body></html>\n"
+
+
+def message_record(message: discord.Message) -> Dict[str, Any]:
+    return {
+        "id": message.id,
+        "author_id": message.author.id,
+        "author": str(message.author),
+        "created_at": message.created_at.isoformat(),
+        "edited_at": message.edited_at.isoformat() if message.edited_at else None,
+        "content": message.content,
+        "attachments": [attachment.url for attachment in message.attachments],
+        "embeds": [embed.to_dict() for embed in message.embeds],
+        "reply_to": message.reference.message_id if message.reference else None,
+    }
+
+
+def append_member(path: str, lines: List[str], size: int) -> int:
+    """
+    Drops anything past ``size`` (a write cut short by a restart) and appends ``lines`` as one
+    more gzip member. Concatenated members read back as a single gzip stream.
+    Returns the new checkpointed size.
+    """
+    data = gzip.compress("".join(lines).encode(), compresslevel=6)
+    with open(path, "ab") as file:
+        file.truncate(size)
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    return size + len(data)
+
+
+def render_html(source: str, target: str, title: str):
+    """
+    Converts a JSONL transcript into a gzip-compressed HTML page, one line at a time.
+    """
+    with gzip.open(source, "rt", encoding="utf-8") as lines, gzip.open(target, "wt", encoding="utf-8") as page:
+        page.write(HTML_HEADER.format(title=html.escape(title)))
+        for line in lines:
+            message = json.loads(line)
+            attachments = "".join(f'<br><a href="{html.escape(url)}">{html.escape(url.rsplit("/", 1)[-1])}</a>'
+                                  for url in message["attachments"])
+            embeds = f"<br><i>{len(message['embeds'])} embed(s)</i>" if message["embeds"] else ""
+            page.write(f'<div class="message"><span class="author">{html.escape(message["author"])}</span>'
+                       f'<time>{message["created_at"][:19].replace("T", " ")}</time>'
+                       f'<p>{html.escape(message["content"])}{attachments}{embeds}</p></div>\n')
+        page.write(HTML_FOOTER)
+
+
+class TranscriptArchiver:
+    """
+    Saves a ticket's history before its channel is deleted, in the background.
+
+    History is read oldest first with async iteration and written ``batch_size`` messages
+    at a time as gzip members, so memory stays bounded however long the ticket is. After
+    each batch the last message id and file size are checkpointed in the ticket registry;
+    an export interrupted by a restart picks up after the last checkpoint on the next start.
+
+    Once its history is saved, the channel's deletion is handed to the scheduler for
+    ``delete_at``; the transcript is posted to the log channel after the channel is gone.
+    """
+    def __init__(self, bot, store: TicketStore, scheduler: Scheduler, log_channel_id: Optional[int], log_message: str = "Ticket closed by {closer}",
+                 reason: str = "No reason provided.", html: bool = False, directory: str = TRANSCRIPT_DIR,
+                 batch_size: int = 500, concurrency: int = 2):
+        self.bot = bot
+        self.store = store
+        self.scheduler = scheduler
+        self.log_channel_id = log_channel_id
+        self.log_message = log_message
+        self.reason = reason
+        self.html = html
+        self.directory = directory
+        self.batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._jobs: Dict[int, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        scheduler.register(DELETE_JOB, self.finish)
+
+    async def archive(self, channel: discord.TextChannel, closer_id: int, delay: float = 10.0) -> bool:
+        """
+        Starts archiving ``channel``. Returns False if it is already being archived.
+        """
+        path = os.path.join(self.directory, f"{channel.guild.id}-{channel.id}.jsonl.gz")
+        job = await self.store.start_transcript(channel.id, channel.guild.id, channel.name, closer_id, path, time.time() + delay)
+        if job is None:
+            return False
+        self._spawn(job)
+        return True
+
+    def start(self):
+        """
+        Resumes exports left unfinished by the last run, once the bot is ready.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if self._task is None:
+            self._task = asyncio.create_task(self._resume(), name="ticket-transcripts")
+
+    async def stop(self):
+        """
+        Cancels running exports. Their progress is checkpointed, so they resume on the next start.
+        """
+        tasks = [task for task in (self._task, *self._jobs.values()) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._jobs.clear()
+
+    async def _resume(self):
+        await self.bot.wait_until_ready()
+        pending = await self.store.pending_transcripts()
+        if pending:
+            logger.info(f"Resuming {len(pending)} unfinished ticket transcript(s)")
+        for job in pending:
+            self._spawn(job)
+
+    def _spawn(self, job: TranscriptJob):
+        task = self._jobs.get(job.channel_id)
+        if task is None or task.done():
+            self._jobs[job.channel_id] = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: TranscriptJob):
+        try:
+            if job.status == "exporting":
+                channel = self.bot.get_channel(job.channel_id)
+                if channel is not None:
+                    async with self._semaphore:
+                        job = await self._export(job, channel)
+                else:
+                    logger.warning(f"Ticket channel {job.channel_id} is gone, archiving the {job.messages} messages saved before it was")
+                await self.store.set_transcript_status(job.channel_id, "exported")
+
+            if self.bot.get_channel(job.channel_id) is not None:
+                if (DELETE_JOB, job.channel_id) not in self.scheduler:
+                    await self.scheduler.schedule(DELETE_JOB, job.channel_id, job.delete_at)
+            else:
+                await self._publish(job)
+                await self.store.set_transcript_status(job.channel_id, "done")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Left pending: the channel is only deleted once its history is saved, so nothing is lost
+            logger.error(f"Failed to archive the transcript of ticket channel {job.channel_id}: {e}")
+        finally:
+            self._jobs.pop(job.channel_id, None)
+
+    async def finish(self, channel_id: int, payload=None):
+        """
+        Scheduler handler: deletes an exported ticket channel and posts its transcript.
+        """
+        job = await self.store.get_transcript(channel_id)
+        if job is None or job.status != "exported":
+            return
+        channel = self.bot.get_channel(channel_id)
+        if channel is not None:
+            try:
+                await channel.delete(reason="Ticket closed")
+            except discord.NotFound:
+                pass
+        await self._publish(job)
+        await self.store.set_transcript_status(channel_id, "done")
+
+    async def _export(self, job: TranscriptJob, channel: discord.TextChannel) -> TranscriptJob:
+        after = discord.Object(job.last_message_id) if job.last_message_id else None
+        last_message_id, messages, size = job.last_message_id, job.messages, job.size
+        batch: List[str] = []
+        async for message in channel.history(limit=None, after=after, oldest_first=True):
+            batch.append(json.dumps(message_record(message), ensure_ascii=False) + "\n")
+            last_message_id = message.id
+            if len(batch) >= self.batch_size:
+                size = await asyncio.to_thread(append_member, job.path, batch, size)
+                messages += len(batch)
+                batch = []
+                await self.store.checkpoint_transcript(job.channel_id, last_message_id, messages, size) #type: ignore
+        if batch or not os.path.exists(job.path) or os.path.getsize(job.path) != size:
+            size = await asyncio.to_thread(append_member, job.path, batch, size)
+            messages += len(batch)
+            await self.store.checkpoint_transcript(job.channel_id, last_message_id, messages, size) #type: ignore
+        return job._replace(last_message_id=last_message_id, messages=messages, size=size)
+
+    async def _publish(self, job: TranscriptJob):
+        log_channel = self.bot.get_channel(self.log_channel_id) if self.log_channel_id else None
+        if log_channel is None:
+            logger.info(f"Transcript of #{job.channel_name} saved to {job.path} ({job.messages} messages)")
+            return
+
+        paths = [job.path]
+        if self.html and os.path.exists(job.path):
+            html_path = job.path.replace(".jsonl.gz", ".html.gz")
+            await asyncio.to_thread(render_html, job.path, html_path, f"#{job.channel_name}")
+            paths.append(html_path)
+
+        limit = getattr(getattr(log_channel, "guild", None), "filesize_limit", 10 * 1024 * 1024)
+        uploads = [path for path in paths if os.path.exists(path) and os.path.getsize(path) <= limit]
+        content = self.log_message.format(closer=f"<@{job.closer_id}>", reason=self.reason)
+        content += f"\nTranscript of #{job.channel_name}: {job.messages} messages"
+        if len(uploads) < len(paths):
+            content += f" (too large to upload, kept at `{job.path}`)"
+        await log_channel.send(content=content, files=[discord.File(path) for path in uploads],
+                               allowed_mentions=discord.AllowedMentions.none())
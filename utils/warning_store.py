@@ -0,0 +1,162 @@
+# Description: Schema and queries for the moderation warnings table
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+from utils.cache import LRUCache
+from utils.migrations import Migration
+from utils.storage import Database
+
+MIGRATIONS = [
+    Migration(1, "legacy warnings table", """
+        CREATE TABLE IF NOT EXISTS warnings (user_id INTEGER, reason TEXT);
+    """),
+    # Rows from the legacy table have no guild, moderator or timestamp. They are kept
+    # in their original order under guild 0 until WarningStore.adopt_legacy claims them.
+    Migration(2, "per-guild warnings with moderator, timestamp and lookup index", """
+        CREATE TABLE warnings_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            moderator_id INTEGER,
+            reason TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        );
+        INSERT INTO warnings_v2 (guild_id, user_id, moderator_id, reason, created_at)
+            SELECT 0, user_id, NULL, COALESCE(reason, 'No reason provided'), 0 FROM warnings ORDER BY rowid;
+        DROP TABLE warnings;
+        ALTER TABLE warnings_v2 RENAME TO warnings;
+        CREATE INDEX idx_warnings_guild_user_created ON warnings (guild_id, user_id, created_at);
+    """),
+]
+
+LEGACY_GUILD_ID = 0
+
+COLUMNS = "id, guild_id, user_id, moderator_id, reason, created_at"
+
+
+class WarningRecord(NamedTuple):
+    id: int
+    guild_id: int
+    user_id: int
+    moderator_id: Optional[int]
+    reason: str
+    created_at: int
+
+
+class WarningSummary(NamedTuple):
+    count: int
+    first_page: List[WarningRecord]
+
+
+class WarningStore:
+    """
+    Warning queries. Every lookup is served by the ``(guild_id, user_id, created_at)`` index,
+    so it only touches the rows of one member in one guild.
+
+    Each member's warning count and first page are kept in an LRU cache, which every
+    write through this store invalidates.
+    """
+    def __init__(self, db: Database, page_size: int = 10, cache_size: int = 1024):
+        self.db = db
+        self.page_size = page_size
+        self.cache: LRUCache[WarningSummary] = LRUCache(cache_size)
+        # Bumped on every write so a read that overlapped a write is not cached
+        self._generation = 0
+
+    def _invalidate(self, guild_id: int, user_id: int):
+        self._generation += 1
+        self.cache.invalidate((guild_id, user_id))
+
+    async def add(self, guild_id: int, user_id: int, moderator_id: Optional[int], reason: str) -> int:
+        self._generation += 1
+        try:
+            result = await self.db.execute(
+                "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, created_at) VALUES (?, ?, ?, ?, ?)",
+                (guild_id, user_id, moderator_id, reason, int(time.time())))
+        finally:
+            self._invalidate(guild_id, user_id)
+        return result.lastrowid #type: ignore
+
+    async def count(self, guild_id: int, user_id: int) -> int:
+        row = await self.db.fetchone("SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+        return row[0] if row else 0
+
+    async def get(self, guild_id: int, warning_id: int) -> Optional[WarningRecord]:
+        row = await self.db.fetchone(f"SELECT {COLUMNS} FROM warnings WHERE id = ? AND guild_id = ?", (warning_id, guild_id))
+        return WarningRecord(*row) if row else None
+
+    async def get_by_position(self, guild_id: int, user_id: int, position: int) -> Optional[WarningRecord]:
+        """
+        Returns the member's ``position``-th warning (1-based, oldest first) without loading the others.
+        """
+        if position < 1:
+            return None
+        row = await self.db.fetchone(
+            f"SELECT {COLUMNS} FROM warnings WHERE guild_id = ? AND user_id = ? ORDER BY created_at, id LIMIT 1 OFFSET ?",
+            (guild_id, user_id, position - 1))
+        return WarningRecord(*row) if row else None
+
+    async def page(self, guild_id: int, user_id: int, after: Optional[Tuple[int, int]] = None,
+                   before: Optional[Tuple[int, int]] = None, limit: Optional[int] = None) -> List[WarningRecord]:
+        """
+        Returns up to ``limit`` warnings oldest first, strictly after or before a ``(created_at, id)`` cursor.
+        """
+        limit = limit or self.page_size
+        if before is not None:
+            rows = await self.db.fetchall(
+                f"SELECT {COLUMNS} FROM warnings WHERE guild_id = ? AND user_id = ? AND (created_at, id) < (?, ?) "
+                "ORDER BY created_at DESC, id DESC LIMIT ?", (guild_id, user_id, *before, limit))
+            rows.reverse()
+        elif after is not None:
+            rows = await self.db.fetchall(
+                f"SELECT {COLUMNS} FROM warnings WHERE guild_id = ? AND user_id = ? AND (created_at, id) > (?, ?) "
+                "ORDER BY created_at, id LIMIT ?", (guild_id, user_id, *after, limit))
+        else:
+            rows = await self.db.fetchall(
+                f"SELECT {COLUMNS} FROM warnings WHERE guild_id = ? AND user_id = ? ORDER BY created_at, id LIMIT ?",
+                (guild_id, user_id, limit))
+        return [WarningRecord(*row) for row in rows]
+
+    async def summary(self, guild_id: int, user_id: int) -> WarningSummary:
+        """
+        Returns the member's warning count and first page (plus one row, to tell if there are more), from cache when possible.
+        """
+        key = (guild_id, user_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        generation = self._generation
+        summary = WarningSummary(await self.count(guild_id, user_id),
+                                 await self.page(guild_id, user_id, limit=self.page_size + 1))
+        if generation == self._generation:
+            self.cache.set(key, summary)
+        return summary
+
+    async def remove(self, guild_id: int, warning_id: int) -> bool:
+        self._generation += 1
+
+        async def job(conn):
+            async with conn.execute("DELETE FROM warnings WHERE id = ? AND guild_id = ? RETURNING user_id", (warning_id, guild_id)) as cursor:
+                return await cursor.fetchone()
+        row = await self.db.transaction(job)
+        if row is None:
+            return False
+        self._invalidate(guild_id, row[0])
+        return True
+
+    async def legacy_count(self) -> int:
+        """
+        How many warnings migrated from the legacy table still belong to no guild.
+        """
+        row = await self.db.fetchone("SELECT COUNT(*) FROM warnings WHERE guild_id = ?", (LEGACY_GUILD_ID,))
+        return row[0] if row else 0
+
+    async def adopt_legacy(self, guild_id: int) -> int:
+        """
+        Moves warnings migrated from the guild-less legacy table into ``guild_id``.
+        """
+        self._generation += 1
+        result = await self.db.execute("UPDATE warnings SET guild_id = ? WHERE guild_id = ?", (guild_id, LEGACY_GUILD_ID))
+        if result.rowcount:
+            self.cache.clear()
+        return result.rowcount